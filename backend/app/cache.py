@@ -0,0 +1,342 @@
+"""
+Caché LRU en memoria con capacidad configurable y contadores de aciertos/fallos,
+una caché por usuario y tipo de dato con vencimiento e invalidación selectiva,
+valores compartidos que se refrescan en segundo plano, y la agrupación de lecturas
+idénticas simultáneas en una sola llamada (single-flight).
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from .cache_disco import CacheDisco
+
+logger = logging.getLogger(__name__)
+
+# UN SOLO VUELO
+# Si llegan varias peticiones con la misma clave mientras la primera está en curso, solo esa va a la
+# fuente; las demás esperan y reciben su mismo resultado o su misma excepción.
+class _Vuelo:
+    __slots__ = ("listo", "resultado", "error", "esperando")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error: Optional[BaseException] = None
+        self.esperando = 0
+
+class UnVuelo:
+    """Agrupa llamadas simultáneas con la misma clave entre hilos."""
+    def __init__(self, copiar: Callable[[Any], Any] = copy.deepcopy):
+        # Quienes esperan reciben una copia para que nadie modifique el resultado de otro.
+        self.copiar = copiar
+        self._vuelos: Dict[Hashable, _Vuelo] = {}
+        self._candado = threading.Lock()
+        self.llamadas = 0
+        self.compartidas = 0
+
+    def hacer(self, clave: Hashable, funcion: Callable[[], Any]) -> Any:
+        with self._candado:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+                self.llamadas += 1
+            else:
+                vuelo.esperando += 1
+                self.compartidas += 1
+        if not lider:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return self.copiar(vuelo.resultado)
+        try:
+            vuelo.resultado = funcion()
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._candado:
+                del self._vuelos[clave]
+                compartido = vuelo.esperando > 0
+            vuelo.listo.set()
+        return self.copiar(vuelo.resultado) if compartido else vuelo.resultado
+
+    def estadisticas(self) -> dict:
+        return {"llamadas": self.llamadas, "compartidas": self.compartidas}
+
+class UnVueloAsync:
+    """Lo mismo que UnVuelo para corrutinas de un mismo event loop."""
+    def __init__(self, copiar: Callable[[Any], Any] = copy.deepcopy):
+        self.copiar = copiar
+        self._vuelos: Dict[Hashable, asyncio.Future] = {}
+        self._esperando: Counter = Counter()
+        self.llamadas = 0
+        self.compartidas = 0
+
+    async def hacer(self, clave: Hashable, funcion: Callable[[], Any]) -> Any:
+        """`funcion` devuelve la corrutina a ejecutar; solo se llama si no hay un vuelo en curso."""
+        while clave in self._vuelos:
+            futuro = self._vuelos[clave]
+            self._esperando[clave] += 1
+            self.compartidas += 1
+            try:
+                resultado = await asyncio.shield(futuro)
+            except asyncio.CancelledError:
+                # Si se canceló quien hacía la llamada (y no esta espera), se reintenta.
+                if futuro.cancelled():
+                    continue
+                raise
+            return self.copiar(resultado)
+
+        futuro = self._vuelos[clave] = asyncio.get_running_loop().create_future()
+        self.llamadas += 1
+        try:
+            resultado = await funcion()
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            futuro.exception()  # evita el aviso de excepción no leída si nadie esperaba
+            raise
+        else:
+            futuro.set_result(resultado)
+            return self.copiar(resultado) if self._esperando[clave] else resultado
+        finally:
+            del self._vuelos[clave]
+            self._esperando.pop(clave, None)
+
+    def estadisticas(self) -> dict:
+        return {"llamadas": self.llamadas, "compartidas": self.compartidas}
+
+class CacheLRU:
+    def __init__(self, capacidad: int):
+        self.capacidad = max(0, capacidad)
+        self._datos: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        """Devuelve el valor guardado o None, y lo marca como usado recientemente."""
+        with self._candado:
+            try:
+                self._datos.move_to_end(clave)
+            except KeyError:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            return self._datos[clave]
+
+    def guardar(self, clave: Hashable, valor: Any) -> None:
+        if self.capacidad == 0:
+            return
+        with self._candado:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            if len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def descartar(self, clave: Hashable) -> None:
+        with self._candado:
+            self._datos.pop(clave, None)
+
+    def invalidar(self) -> None:
+        """Vacía la caché conservando los contadores."""
+        with self._candado:
+            self._datos.clear()
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "capacidad": self.capacidad,
+            "entradas": len(self._datos),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+        }
+
+class CachePorUsuario:
+    """
+    Datos cacheados por (usuario, tipo) durante `ttl` segundos. Invalidar afecta solo a las entradas
+    indicadas de un usuario, no a las de los demás. Los aciertos y fallos se cuentan por tipo.
+
+    Con `disco` (una CacheDisco) hay dos niveles: la LRU del proceso y el archivo compartido con los
+    demás procesos del equipo. Cada entrada recuerda la versión de su clave en el disco; si otro proceso
+    la invalidó, la copia en memoria deja de servir.
+    """
+    def __init__(self, ttl: float, capacidad: int, disco: Optional[CacheDisco] = None):
+        self.ttl = ttl
+        self.disco = disco
+        self._lru = CacheLRU(capacidad)
+        self._tipos: set = set()
+        self._candado = threading.Lock()
+        self.aciertos: Counter = Counter()
+        self.aciertos_disco: Counter = Counter()
+        self.fallos: Counter = Counter()
+        self.invalidaciones: Counter = Counter()
+        self._vuelos = UnVuelo()
+
+    @staticmethod
+    def _clave_disco(usuario_id: str, tipo: str) -> str:
+        return f"{usuario_id}:{tipo}"
+
+    def _contar(self, contador: Counter, tipo: str) -> None:
+        with self._candado:
+            contador[tipo] += 1
+
+    def obtener(self, usuario_id: str, tipo: str, contar_fallo: bool = True) -> Optional[Any]:
+        """Devuelve el valor vigente o None. Con `contar_fallo=False` no cuenta el fallo, porque quien llama lo va a cargar."""
+        entrada = self._lru.obtener((usuario_id, tipo))
+        if entrada is not None and entrada[0] > time.monotonic():
+            if self.disco is None or self.disco.version(self._clave_disco(usuario_id, tipo)) == entrada[1]:
+                self._contar(self.aciertos, tipo)
+                return entrada[2]
+        if self.disco is not None:
+            leida = self.disco.leer(self._clave_disco(usuario_id, tipo))
+            if leida is not None:
+                version, vence, valor = leida
+                self._guardar_memoria(usuario_id, tipo, version, valor, min(self.ttl, vence - time.time()))
+                self._contar(self.aciertos_disco, tipo)
+                return valor
+        if contar_fallo:
+            self._contar(self.fallos, tipo)
+        return None
+
+    def _guardar_memoria(self, usuario_id: str, tipo: str, version: int, valor: Any, ttl: float) -> None:
+        with self._candado:
+            self._tipos.add(tipo)
+        self._lru.guardar((usuario_id, tipo), (time.monotonic() + ttl, version, valor))
+
+    def guardar(self, usuario_id: str, tipo: str, valor: Any, version: Optional[int] = None) -> None:
+        """Guarda el valor en ambos niveles. `version` es la que tenía la clave al empezar a calcularlo."""
+        if self.disco is None:
+            self._guardar_memoria(usuario_id, tipo, 0, valor, self.ttl)
+            return
+        clave = self._clave_disco(usuario_id, tipo)
+        if version is None:
+            version = self.disco.version(clave)
+        self._guardar_memoria(usuario_id, tipo, version, valor, self.ttl)
+        self.disco.guardar(clave, version, valor, self.ttl)
+
+    def cargar(self, usuario_id: str, tipo: str, funcion: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor cacheado o lo calcula con `funcion`; los resultados None no se guardan.
+        Los fallos simultáneos de la misma entrada comparten una sola llamada a `funcion`.
+        """
+        valor = self.obtener(usuario_id, tipo)
+        if valor is not None:
+            return valor
+
+        def calcular():
+            version = self.disco.version(self._clave_disco(usuario_id, tipo)) if self.disco is not None else 0
+            valor = funcion()
+            if valor is not None:
+                self.guardar(usuario_id, tipo, valor, version)
+            return valor
+        return self._vuelos.hacer((usuario_id, tipo), calcular)
+
+    def invalidar(self, usuario_id: str, tipos: Optional[Iterable[str]] = None) -> None:
+        """Descarta los `tipos` del usuario, o todos sus datos si no se indican, en ambos niveles."""
+        with self._candado:
+            tipos = set(self._tipos if tipos is None else tipos)
+            self.invalidaciones.update(tipos)
+        for tipo in tipos:
+            self._lru.descartar((usuario_id, tipo))
+            if self.disco is not None:
+                self.disco.invalidar(self._clave_disco(usuario_id, tipo))
+
+    def estadisticas(self) -> Dict[str, dict]:
+        """Aciertos (en memoria y en disco), fallos, invalidaciones y tasa de aciertos por tipo de dato."""
+        with self._candado:
+            tipos = sorted(self._tipos | set(self.fallos))
+            resultado = {}
+            for tipo in tipos:
+                aciertos = self.aciertos[tipo] + self.aciertos_disco[tipo]
+                consultas = aciertos + self.fallos[tipo]
+                resultado[tipo] = {
+                    "aciertos": self.aciertos[tipo],
+                    "aciertos_disco": self.aciertos_disco[tipo],
+                    "fallos": self.fallos[tipo],
+                    "invalidaciones": self.invalidaciones[tipo],
+                    "tasa_aciertos": round(aciertos / consultas, 4) if consultas else 0.0,
+                }
+        lru = self._lru.estadisticas()
+        return {
+            "entradas": lru["entradas"], "desalojos": lru["desalojos"], "tipos": resultado, "vuelos": self._vuelos.estadisticas(),
+            "disco": self.disco.estadisticas() if self.disco is not None else None,
+        }
+
+class ValorRefrescado:
+    """
+    Dato compartido por todo el proceso (p. ej. un catálogo) que se lee sin consultar la fuente:
+    se carga una vez y un hilo lo vuelve a cargar cada `intervalo` segundos. `version` solo avanza
+    cuando el contenido cambia. Si una recarga falla se conserva el último valor.
+    """
+    def __init__(self, cargar: Callable[[], Any], intervalo: float, nombre: str = "valor"):
+        self._cargar = cargar
+        self.intervalo = intervalo
+        self.nombre = nombre
+        self.version = 0
+        self.cargado_en: Optional[float] = None
+        self._valor: Any = None
+        self._huella: Optional[str] = None
+        self._candado = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._vuelos = UnVuelo(copiar=lambda cambio: cambio)
+
+    def refrescar(self) -> bool:
+        """
+        Carga el valor desde la fuente. Devuelve True si cambió. Propaga el error de la carga.
+        Si ya hay una carga en curso, espera esa en lugar de empezar otra.
+        """
+        return self._vuelos.hacer(None, self._refrescar)
+
+    def _refrescar(self) -> bool:
+        valor = self._cargar()
+        huella = hashlib.sha1(json.dumps(valor, sort_keys=True, default=str).encode()).hexdigest()
+        with self._candado:
+            self.cargado_en = time.monotonic()
+            if huella == self._huella:
+                return False
+            self._valor, self._huella = valor, huella
+            self.version += 1
+            return True
+
+    def obtener(self) -> Tuple[int, Any]:
+        """Devuelve (version, valor); solo consulta la fuente si todavía no se cargó nunca."""
+        if self.version == 0:
+            self.refrescar()
+        with self._candado:
+            return self.version, self._valor
+
+    def _ciclo(self) -> None:
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.refrescar()
+            except Exception:
+                logger.warning("No se pudo refrescar %s", self.nombre, exc_info=True)
+
+    def iniciar(self) -> None:
+        """Precarga el valor (sin fallar si la fuente no responde) y arranca el hilo de refresco, una sola vez."""
+        with self._candado:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._ciclo, name=f"refresco-{self.nombre}", daemon=True)
+        try:
+            self.refrescar()
+        except Exception:
+            logger.warning("No se pudo precargar %s", self.nombre, exc_info=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
@@ -0,0 +1,127 @@
+"""
+Segundo nivel de caché en un archivo SQLite local (modo WAL), compartido por todos los procesos
+del mismo equipo y conservado entre reinicios.
+Cada clave tiene una versión: invalidar la incrementa, y un valor solo se guarda si la versión no
+cambió desde que se empezó a calcular, así que un cálculo lento no pisa una invalidación posterior.
+Guarda datos de los usuarios, así que el archivo solo lo puede leer su dueño (0600).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    clave TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    vence REAL,
+    valor TEXT
+);
+CREATE INDEX IF NOT EXISTS entradas_vence ON entradas (vence) WHERE valor IS NOT NULL;
+"""
+
+SQL_VERSION = "SELECT version FROM entradas WHERE clave = ?"
+SQL_LEER = "SELECT version, vence, valor FROM entradas WHERE clave = ?"
+SQL_GUARDAR = """
+INSERT INTO entradas (clave, version, vence, valor) VALUES (?1, ?2, ?3, ?4)
+ON CONFLICT (clave) DO UPDATE SET vence = excluded.vence, valor = excluded.valor
+WHERE entradas.version = excluded.version
+"""
+SQL_INVALIDAR = """
+INSERT INTO entradas (clave, version) VALUES (?1, 1)
+ON CONFLICT (clave) DO UPDATE SET version = version + 1, vence = NULL, valor = NULL
+"""
+# Al podar se borra el valor pero se conserva la fila con su versión.
+SQL_VENCIDAS = "UPDATE entradas SET vence = NULL, valor = NULL WHERE valor IS NOT NULL AND vence <= ?"
+SQL_CONTAR = "SELECT COUNT(*) FROM entradas WHERE valor IS NOT NULL"
+SQL_DESALOJAR = """
+UPDATE entradas SET vence = NULL, valor = NULL WHERE clave IN (
+    SELECT clave FROM entradas WHERE valor IS NOT NULL ORDER BY vence LIMIT ?
+)
+"""
+
+def crear_privado(ruta: str) -> None:
+    """Crea el archivo (y su directorio) solo para el dueño; si ya existían, les quita los permisos de los demás."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    os.close(os.open(ruta, os.O_CREAT | os.O_RDWR, 0o600))
+    # SQLite crea el -wal y el -shm con los permisos del archivo principal; los de corridas anteriores se corrigen.
+    for archivo in (ruta, f"{ruta}-wal", f"{ruta}-shm"):
+        if os.path.exists(archivo):
+            os.chmod(archivo, 0o600)
+
+class CacheDisco:
+    def __init__(self, ruta: str, capacidad: int, podar_cada: int = 256):
+        self.ruta = ruta
+        self.capacidad = max(1, capacidad)
+        self.podar_cada = podar_cada
+        crear_privado(ruta)
+        self._conexion = sqlite3.connect(ruta, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode = WAL")
+        self._conexion.execute("PRAGMA synchronous = NORMAL")
+        self._conexion.executescript(ESQUEMA)
+        self._candado = threading.Lock()
+        self._escrituras = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.vencidas = 0
+        self.desalojos = 0
+
+    def version(self, clave: str) -> int:
+        with self._candado:
+            fila = self._conexion.execute(SQL_VERSION, (clave,)).fetchone()
+        return fila[0] if fila else 0
+
+    def leer(self, clave: str) -> Optional[Tuple[int, float, Any]]:
+        """Devuelve (version, vence, valor) si hay un valor vigente, o None."""
+        with self._candado:
+            fila = self._conexion.execute(SQL_LEER, (clave,)).fetchone()
+            if fila is None or fila[2] is None or fila[1] <= time.time():
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+        return fila[0], fila[1], json.loads(fila[2])
+
+    def guardar(self, clave: str, version: int, valor: Any, ttl: float) -> None:
+        texto = json.dumps(valor, default=str)
+        with self._candado:
+            self._conexion.execute(SQL_GUARDAR, (clave, version, time.time() + ttl, texto))
+            self._escrituras += 1
+            if self._escrituras % self.podar_cada == 0:
+                self._podar()
+
+    def invalidar(self, clave: str) -> None:
+        with self._candado:
+            self._conexion.execute(SQL_INVALIDAR, (clave,))
+
+    def _podar(self) -> None:
+        self.vencidas += self._conexion.execute(SQL_VENCIDAS, (time.time(),)).rowcount
+        sobrantes = self._conexion.execute(SQL_CONTAR).fetchone()[0] - self.capacidad
+        if sobrantes > 0:
+            self.desalojos += self._conexion.execute(SQL_DESALOJAR, (sobrantes,)).rowcount
+
+    def podar(self) -> None:
+        """Descarta los valores vencidos y, si se supera la capacidad, los que vencen antes."""
+        with self._candado:
+            self._podar()
+
+    def estadisticas(self) -> dict:
+        with self._candado:
+            entradas = self._conexion.execute(SQL_CONTAR).fetchone()[0]
+        consultas = self.aciertos + self.fallos
+        return {
+            "ruta": self.ruta,
+            "capacidad": self.capacidad,
+            "entradas": entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "vencidas": self.vencidas,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+        }
+
+    def cerrar(self) -> None:
+        with self._candado:
+            self._conexion.close()
@@ -0,0 +1,146 @@
+"""
+Carga el catálogo de consejos de sostenibilidad desde un archivo local y lo compila una sola vez.
+Los umbrales de urgencia quedan ordenados, así que los consejos urgentes para un consumo salen de
+una búsqueda binaria; los consejos cumplidos de un usuario se representan como un conjunto de bits.
+"""
+import bisect
+import functools
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple, Union
+from .cache import CacheLRU
+
+RUTA_CONSEJOS = os.environ.get("BIOTRACK_CONSEJOS", os.path.join(os.path.dirname(__file__), "consejos.json"))
+RUTA_CONSEJOS_AMPLIADO = os.path.join(os.path.dirname(__file__), "consejos_ampliado.json")
+
+# Combinaciones de listas generadas que se conservan por catálogo.
+CAPACIDAD_GENERADOS = int(os.environ.get("BIOTRACK_CACHE_CONSEJOS", "1024"))
+# Usuarios cuyo consejo del día se recuerda; cada uno ocupa una entrada, la del día en curso.
+CAPACIDAD_DEL_DIA = int(os.environ.get("BIOTRACK_CACHE_CONSEJO_DIA", "4096"))
+
+@dataclass(frozen=True)
+class Consejo:
+    id: str
+    texto: str
+    urgente_desde_kwh: Optional[float]
+
+class CatalogoConsejos:
+    """
+    Catálogo compilado e inmutable. Las filas que devuelve `generar` son compartidas entre llamadas
+    y no deben modificarse.
+    """
+    def __init__(self, consejos: Iterable[Consejo]):
+        self.consejos: Tuple[Consejo, ...] = tuple(consejos)
+        # Un id repetido comparte el bit: marcarlo cumplido marca todas sus apariciones.
+        self._bits_por_id: Dict[str, int] = {}
+        for posicion, consejo in enumerate(self.consejos):
+            self._bits_por_id[consejo.id] = self._bits_por_id.get(consejo.id, 0) | (1 << posicion)
+
+        con_umbral = sorted((c.urgente_desde_kwh, posicion) for posicion, c in enumerate(self.consejos) if c.urgente_desde_kwh is not None)
+        self.umbrales: Tuple[float, ...] = tuple(umbral for umbral, _ in con_umbral)
+        # _rango[i]: lugar del consejo i entre los umbrales ordenados; con k umbrales superados son urgentes los de rango < k.
+        self._rango = [len(con_umbral)] * len(self.consejos)
+        mascaras = [0]
+        for rango, (_, posicion) in enumerate(con_umbral):
+            self._rango[posicion] = rango
+            mascaras.append(mascaras[-1] | (1 << posicion))
+        self._mascaras_urgentes: Tuple[int, ...] = tuple(mascaras)
+
+        # Las cuatro variantes (urgente, cumplido) de cada fila se arman una sola vez.
+        self._filas = tuple(
+            tuple(tuple({"id": c.id, "texto": c.texto, "urgente": urgente, "cumplido": cumplido} for cumplido in (False, True)) for urgente in (False, True))
+            for c in self.consejos
+        )
+        self._generar = functools.lru_cache(maxsize=CAPACIDAD_GENERADOS)(self._armar)
+        self._del_dia = CacheLRU(CAPACIDAD_DEL_DIA)
+
+    @classmethod
+    def compilar(cls, datos: dict) -> "CatalogoConsejos":
+        return cls(
+            Consejo(str(c["id"]), str(c["texto"]), None if c.get("urgente_desde_kwh") is None else float(c["urgente_desde_kwh"]))
+            for c in datos["consejos"]
+        )
+
+    def __len__(self) -> int:
+        return len(self.consejos)
+
+    def mascara(self, consejos_ids: Iterable[str]) -> int:
+        """Conjunto de bits de los consejos indicados; los ids que no están en el catálogo se ignoran."""
+        bits = 0
+        for consejo_id in consejos_ids:
+            bits |= self._bits_por_id.get(consejo_id, 0)
+        return bits
+
+    def superados(self, consumo_kwh: float) -> int:
+        """Cantidad de umbrales de urgencia que el consumo supera."""
+        return bisect.bisect_left(self.umbrales, consumo_kwh)
+
+    def urgentes(self, consumo_kwh: float) -> int:
+        """Conjunto de bits de los consejos urgentes para un consumo."""
+        return self._mascaras_urgentes[self.superados(consumo_kwh)]
+
+    def generar(self, consumo_kwh: float, cumplidos: Union[int, Iterable[str]]) -> Tuple[dict, ...]:
+        """
+        Todos los consejos del catálogo en orden, con `urgente` según el consumo y `cumplido` según
+        `cumplidos` (un conjunto de bits o una lista de ids). El resultado solo depende de cuántos
+        umbrales se superan y de los cumplidos, así que se reutiliza entre usuarios en la misma situación.
+        """
+        if not isinstance(cumplidos, int):
+            cumplidos = self.mascara(cumplidos)
+        return self._generar(self.superados(consumo_kwh), cumplidos)
+
+    def _armar(self, superados: int, cumplidos: int) -> Tuple[dict, ...]:
+        filas = [variantes[rango < superados][False] for variantes, rango in zip(self._filas, self._rango)]
+        while cumplidos:
+            bit = cumplidos & -cumplidos
+            posicion = bit.bit_length() - 1
+            filas[posicion] = self._filas[posicion][self._rango[posicion] < superados][True]
+            cumplidos ^= bit
+        return tuple(filas)
+
+    def consejo_del_dia(self, usuario_id: str, consumo_kwh: float, cumplidos: Union[int, Iterable[str]], fecha: Optional[date] = None) -> Optional[dict]:
+        """
+        Consejo no cumplido que le toca al usuario en la fecha (hoy si no se indica), o None si ya
+        cumplió todos. La elección depende solo de (usuario, fecha) y de los cumplidos: se mantiene
+        durante el día y cambia cuando el usuario cumple un consejo.
+        """
+        if not isinstance(cumplidos, int):
+            cumplidos = self.mascara(cumplidos)
+        fecha = fecha or date.today()
+        guardado = self._del_dia.obtener(usuario_id)
+        if guardado is not None and guardado[0] == fecha and guardado[1] == cumplidos:
+            posicion = guardado[2]
+        else:
+            posicion = self._elegir(usuario_id, fecha, cumplidos)
+            self._del_dia.guardar(usuario_id, (fecha, cumplidos, posicion))
+        if posicion is None:
+            return None
+        return self._filas[posicion][self._rango[posicion] < self.superados(consumo_kwh)][False]
+
+    def _elegir(self, usuario_id: str, fecha: date, cumplidos: int) -> Optional[int]:
+        posiciones_cumplidas = []
+        while cumplidos:
+            bit = cumplidos & -cumplidos
+            posiciones_cumplidas.append(bit.bit_length() - 1)
+            cumplidos ^= bit
+        pendientes = len(self.consejos) - len(posiciones_cumplidas)
+        if pendientes <= 0:
+            return None
+        semilla = hashlib.blake2b(f"{usuario_id}|{fecha.isoformat()}".encode(), digest_size=8).digest()
+        # El n-ésimo consejo pendiente: se corre n una posición por cada cumplido que queda antes.
+        posicion = int.from_bytes(semilla, "big") % pendientes
+        for cumplida in posiciones_cumplidas:
+            if cumplida > posicion:
+                break
+            posicion += 1
+        return posicion
+
+def cargar_catalogo(ruta: str = RUTA_CONSEJOS) -> CatalogoConsejos:
+    """Lee y compila un catálogo de consejos desde un archivo JSON."""
+    with open(ruta, encoding="utf-8") as f:
+        return CatalogoConsejos.compilar(json.load(f))
+
+catalogo = cargar_catalogo()
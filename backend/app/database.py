@@ -2,7 +2,13 @@
 Simula una base de datos en memoria para el almacenamiento de datos de la aplicación.
 Incluye datos de usuarios y un catálogo de electrodomésticos.
 """
-from datetime import datetime
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from starlette.concurrency import run_in_threadpool
 
 # BASE DE DATOS SIMULADA
 db_usuarios = {
@@ -21,6 +27,460 @@ db_usuarios = {
     }
 }
 
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+_NUMERO_MES = {nombre.lower(): i for i, nombre in enumerate(MESES, start=1)}
+
+def numero_mes(mes) -> int:
+    """Convierte el mes de una factura ("Enero", "enero", "1" o 1) en su número."""
+    numero = _NUMERO_MES.get(str(mes).strip().lower()) or (int(mes) if str(mes).strip().isdigit() else 0)
+    if not 1 <= numero <= 12:
+        raise ValueError(f"Mes inválido: {mes}")
+    return numero
+
+class ColeccionFacturas:
+    """
+    Facturas de un usuario guardadas por columnas: año y mes como enteros chicos, montos como double.
+    `_orden` guarda las posiciones ordenadas por (año, mes, id) y `_por_id` indexa la posición de cada id.
+    Una baja solo quita el id del índice (O(1)); las columnas se compactan cuando hay más posiciones
+    libres que facturas vivas. Los dicts con la forma de la API se arman solo al leer.
+    """
+    __slots__ = ("_ids", "_anios", "_meses", "_kwh", "_costos", "_orden", "_por_id")
+
+    def __init__(self, facturas=()):
+        self._ids: List[str] = []
+        self._anios = array("h")
+        self._meses = array("b")
+        self._kwh = array("d")
+        self._costos = array("d")
+        self._orden = array("i")
+        self._por_id: Dict[str, int] = {}
+        for factura in facturas:
+            self.anadir(factura)
+
+    @classmethod
+    def desde_columnas(cls, ids: List[str], anios, meses, kwh, costos) -> "ColeccionFacturas":
+        """Arma la colección con columnas que ya vienen ordenadas por (año, mes, id) y sin ids repetidos."""
+        coleccion = cls()
+        coleccion._ids = list(ids)
+        coleccion._anios = array("h", anios)
+        coleccion._meses = array("b", meses)
+        coleccion._kwh = array("d", kwh)
+        coleccion._costos = array("d", costos)
+        coleccion._orden = array("i", range(len(coleccion._ids)))
+        coleccion._por_id = {factura_id: i for i, factura_id in enumerate(coleccion._ids)}
+        return coleccion
+
+    def columnas(self) -> Tuple[List[str], array, array, array, array]:
+        """Columnas (ids, años, meses, kWh, costos) de las facturas vivas, en orden cronológico."""
+        self._compactar()
+        return self._ids, self._anios, self._meses, self._kwh, self._costos
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    def __iter__(self) -> Iterator[dict]:
+        return self._recorrer(0, len(self._orden))
+
+    def __contains__(self, factura_id: str) -> bool:
+        return factura_id in self._por_id
+
+    def _clave(self, posicion: int) -> Tuple[int, int, str]:
+        return (self._anios[posicion], self._meses[posicion], self._ids[posicion])
+
+    def _periodo(self, posicion: int) -> Tuple[int, int]:
+        return (self._anios[posicion], self._meses[posicion])
+
+    def _viva(self, posicion: int) -> bool:
+        return self._por_id.get(self._ids[posicion]) == posicion
+
+    def _fila(self, posicion: int) -> dict:
+        return {
+            "id": self._ids[posicion], "mes": MESES[self._meses[posicion] - 1], "anio": self._anios[posicion],
+            "consumo_kwh": self._kwh[posicion], "costo": self._costos[posicion],
+        }
+
+    def _recorrer(self, inicio: int, fin: int) -> Iterator[dict]:
+        for posicion in self._orden[inicio:fin]:
+            if self._viva(posicion):
+                yield self._fila(posicion)
+
+    def obtener(self, factura_id: str) -> Optional[dict]:
+        posicion = self._por_id.get(factura_id)
+        return None if posicion is None else self._fila(posicion)
+
+    def anadir(self, factura: dict) -> None:
+        """Añade una factura. Lanza KeyError si el id ya existe y ValueError si el año o el mes son inválidos."""
+        factura_id = factura["id"]
+        if factura_id in self._por_id:
+            raise KeyError(factura_id)
+        anio, mes = int(factura["anio"]), numero_mes(factura["mes"])
+        kwh, costo = float(factura["consumo_kwh"]), float(factura["costo"])
+        if not 0 <= anio <= 9999:
+            raise ValueError(f"Año inválido: {anio}")
+        posicion = len(self._ids)
+        self._ids.append(factura_id)
+        self._anios.append(anio)
+        self._meses.append(mes)
+        self._kwh.append(kwh)
+        self._costos.append(costo)
+        clave = (anio, mes, factura_id)
+        if not self._orden or clave > self._clave(self._orden[-1]):
+            self._orden.append(posicion)
+        else:
+            self._orden.insert(bisect_right(self._orden, clave, key=self._clave), posicion)
+        self._por_id[factura_id] = posicion
+
+    def eliminar(self, factura_id: str) -> Optional[dict]:
+        """Quita la factura y la devuelve, o None si no existía."""
+        posicion = self._por_id.pop(factura_id, None)
+        if posicion is None:
+            return None
+        factura = self._fila(posicion)
+        if len(self._ids) - len(self._por_id) > len(self._por_id):
+            self._compactar()
+        return factura
+
+    def _compactar(self) -> None:
+        """Reescribe las columnas solo con las facturas vivas, ya en orden cronológico."""
+        if len(self._ids) == len(self._por_id) and all(i == p for i, p in enumerate(self._orden)):
+            return
+        vivas = [posicion for posicion in self._orden if self._viva(posicion)]
+        self._ids = [self._ids[p] for p in vivas]
+        self._anios = array("h", (self._anios[p] for p in vivas))
+        self._meses = array("b", (self._meses[p] for p in vivas))
+        self._kwh = array("d", (self._kwh[p] for p in vivas))
+        self._costos = array("d", (self._costos[p] for p in vivas))
+        self._orden = array("i", range(len(vivas)))
+        self._por_id = {factura_id: i for i, factura_id in enumerate(self._ids)}
+
+    def entre(self, desde: Optional[Tuple[int, int]] = None, hasta: Optional[Tuple[int, int]] = None) -> Iterator[dict]:
+        """Facturas cuyo período (año, mes) está entre `desde` y `hasta`, ambos incluidos."""
+        inicio = bisect_left(self._orden, desde, key=self._periodo) if desde else 0
+        fin = bisect_left(self._orden, (hasta[0], hasta[1] + 1), key=self._periodo) if hasta else len(self._orden)
+        return self._recorrer(inicio, fin)
+
+    def pagina(self, limite: int, despues: Optional[Tuple[int, int, str]] = None, descendente: bool = False) -> List[dict]:
+        """
+        Hasta `limite` facturas que siguen a la clave (año, mes, id) `despues`, en orden cronológico
+        o inverso. Cuesta una búsqueda binaria más las filas devueltas.
+        """
+        if descendente:
+            fin = bisect_left(self._orden, despues, key=self._clave) if despues else len(self._orden)
+            posiciones = (self._orden[i] for i in range(fin - 1, -1, -1))
+        else:
+            inicio = bisect_right(self._orden, despues, key=self._clave) if despues else 0
+            posiciones = (self._orden[i] for i in range(inicio, len(self._orden)))
+        filas = []
+        for posicion in posiciones:
+            if len(filas) == limite:
+                break
+            if self._viva(posicion):
+                filas.append(self._fila(posicion))
+        return filas
+
+def consumo_mensual_kwh(potencia: float, horas_dia: float, dias_mes: float, cantidad: int) -> float:
+    return (potencia / 1000) * horas_dia * dias_mes * cantidad
+
+def consumo_electrodomestico_kwh(ed: dict) -> float:
+    """Consumo mensual estimado de un electrodoméstico."""
+    return consumo_mensual_kwh(ed["potencia"], ed["horas_dia"], ed["dias_mes"], ed["cantidad"])
+
+@dataclass(slots=True)
+class Electrodomestico:
+    id: str
+    nombre: str
+    cantidad: int
+    potencia: float
+    eficiencia: Optional[str]
+    horas_dia: float
+    dias_mes: int
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "Electrodomestico":
+        return cls(datos["id"], datos["nombre"], datos["cantidad"], datos["potencia"], datos.get("eficiencia"), datos["horas_dia"], datos["dias_mes"])
+
+    def a_dict(self) -> dict:
+        return {
+            "id": self.id, "nombre": self.nombre, "cantidad": self.cantidad, "potencia": self.potencia,
+            "eficiencia": self.eficiencia, "horas_dia": self.horas_dia, "dias_mes": self.dias_mes,
+        }
+
+    @property
+    def consumo_kwh(self) -> float:
+        return consumo_mensual_kwh(self.potencia, self.horas_dia, self.dias_mes, self.cantidad)
+
+CAMPOS_PERFIL = ("id", "username", "password", "nombre", "ubicacion", "nivel_subsidio", "puntos_sostenibilidad")
+CAMPOS_EDITABLES = ("username", "password", "nombre", "ubicacion", "nivel_subsidio")
+
+@dataclass(slots=True)
+class Usuario:
+    """Usuario en memoria. El progreso se guarda como fechas ordinales y puntos en arrays paralelos."""
+    id: str
+    username: str
+    password: str
+    nombre: Optional[str] = None
+    ubicacion: Optional[str] = None
+    nivel_subsidio: Optional[str] = None
+    puntos_sostenibilidad: int = 0
+    facturas: ColeccionFacturas = field(default_factory=ColeccionFacturas)
+    electrodomesticos: List[Electrodomestico] = field(default_factory=list)
+    consejos_cumplidos: List[str] = field(default_factory=list)
+    progreso_fechas: array = field(default_factory=lambda: array("i"))
+    progreso_puntos: array = field(default_factory=lambda: array("q"))
+
+    @classmethod
+    def desde_dict(cls, registro: dict) -> "Usuario":
+        usuario = cls(**{campo: registro[campo] for campo in CAMPOS_PERFIL if campo in registro})
+        facturas = registro.get("facturas", [])
+        usuario.facturas = facturas if isinstance(facturas, ColeccionFacturas) else ColeccionFacturas(facturas)
+        usuario.electrodomesticos = [Electrodomestico.desde_dict(ed) for ed in registro.get("electrodomesticos", [])]
+        usuario.consejos_cumplidos = list(registro.get("consejos_cumplidos", []))
+        for progreso in registro.get("progreso_sostenibilidad", []):
+            usuario.registrar_progreso(progreso["fecha"], progreso["puntos"])
+        return usuario
+
+    def a_dict(self) -> dict:
+        """Perfil con la forma de la API; las facturas y los electrodomésticos se leen aparte."""
+        perfil = {campo: getattr(self, campo) for campo in CAMPOS_PERFIL}
+        perfil["consejos_cumplidos"] = list(self.consejos_cumplidos)
+        perfil["progreso_sostenibilidad"] = [
+            {"fecha": date.fromordinal(fecha).isoformat(), "puntos": puntos}
+            for fecha, puntos in zip(self.progreso_fechas, self.progreso_puntos)
+        ]
+        return perfil
+
+    def registrar_progreso(self, fecha: str, puntos: int) -> None:
+        """Guarda los puntos del día, reemplazando el último registro si es de la misma fecha."""
+        ordinal = date.fromisoformat(fecha).toordinal()
+        if self.progreso_fechas and self.progreso_fechas[-1] == ordinal:
+            self.progreso_puntos[-1] = puntos
+        else:
+            self.progreso_fechas.append(ordinal)
+            self.progreso_puntos.append(puntos)
+
+class AgregadosUsuario:
+    """
+    Totales de un usuario que se mantienen al día con cada alta, baja o modificación,
+    para que las métricas no tengan que recorrer todas sus facturas y electrodomésticos.
+    """
+    __slots__ = ("facturas", "consumo_kwh", "costo", "por_anio", "por_mes", "kwh_electrodomesticos", "estimado_kwh")
+
+    def __init__(self):
+        self.facturas = 0
+        self.consumo_kwh = 0.0
+        self.costo = 0.0
+        self.por_anio: Dict[int, list] = {}
+        self.por_mes: Dict[Tuple[int, int], list] = {}
+        self.kwh_electrodomesticos: Dict[str, float] = {}
+        self.estimado_kwh = 0.0
+
+    @classmethod
+    def desde_usuario(cls, usuario: Usuario) -> "AgregadosUsuario":
+        agregados = cls()
+        for factura in usuario.facturas:
+            agregados.sumar_factura(factura)
+        for ed in usuario.electrodomesticos:
+            agregados.fijar_electrodomestico(ed.id, ed.consumo_kwh)
+        return agregados
+
+    @staticmethod
+    def _acumular(tabla: dict, clave, kwh: float, costo: float, signo: int) -> None:
+        fila = tabla.setdefault(clave, [0, 0.0, 0.0])
+        fila[0] += signo
+        if fila[0] == 0:
+            del tabla[clave]
+        else:
+            fila[1] += signo * kwh
+            fila[2] += signo * costo
+
+    def sumar_factura(self, factura: dict, signo: int = 1) -> None:
+        """Suma (o resta, con signo=-1) una factura a todos los totales."""
+        kwh, costo = factura["consumo_kwh"], factura["costo"]
+        self.facturas += signo
+        if self.facturas == 0:
+            # Sin facturas los totales vuelven a cero exacto, sin arrastrar error de redondeo.
+            self.consumo_kwh = self.costo = 0.0
+        else:
+            self.consumo_kwh += signo * kwh
+            self.costo += signo * costo
+        self._acumular(self.por_anio, factura["anio"], kwh, costo, signo)
+        self._acumular(self.por_mes, (factura["anio"], numero_mes(factura["mes"])), kwh, costo, signo)
+
+    def fijar_electrodomestico(self, ed_id: str, kwh: float) -> None:
+        """Registra o reemplaza el consumo estimado de un electrodoméstico."""
+        self.estimado_kwh += kwh - self.kwh_electrodomesticos.get(ed_id, 0.0)
+        self.kwh_electrodomesticos[ed_id] = kwh
+
+    def quitar_electrodomestico(self, ed_id: str) -> None:
+        self.estimado_kwh -= self.kwh_electrodomesticos.pop(ed_id, 0.0)
+        if not self.kwh_electrodomesticos:
+            self.estimado_kwh = 0.0
+
+    def resumen_por_anio(self) -> Dict[int, dict]:
+        return {anio: {"facturas": n, "consumo_kwh": kwh, "costo": costo} for anio, (n, kwh, costo) in sorted(self.por_anio.items())}
+
+class RepositorioUsuarios:
+    """
+    Acceso a los usuarios con índices id → usuario y username → usuario.
+    Todas las altas y modificaciones deben pasar por aquí para mantener ambos índices consistentes.
+    Los datos se guardan compactos (`Usuario`, `ColeccionFacturas`) y se devuelven como dicts con la
+    forma de la API. `RepositorioSQLite` implementa la misma interfaz.
+    """
+    def __init__(self, registros: Dict[str, dict]):
+        self._por_username: Dict[str, Usuario] = {}
+        self._por_id: Dict[str, Usuario] = {}
+        self._agregados: Dict[str, AgregadosUsuario] = {}
+        self.reemplazar([Usuario.desde_dict(registro) for registro in registros.values()])
+
+    def reemplazar(self, usuarios: List[Usuario], agregados: Optional[Dict[str, AgregadosUsuario]] = None) -> None:
+        """Sustituye todo el contenido (p. ej. al restaurar un snapshot). Los agregados que no se pasen se recalculan."""
+        agregados = agregados or {}
+        self._por_username = {u.username: u for u in usuarios}
+        self._por_id = {u.id: u for u in usuarios}
+        self._agregados = {u.id: agregados.get(u.id) or AgregadosUsuario.desde_usuario(u) for u in usuarios}
+
+    def usuarios(self) -> List[Usuario]:
+        """Todos los usuarios tal como están guardados, con sus facturas y electrodomésticos."""
+        return list(self._por_id.values())
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    def por_id(self, usuario_id: str) -> Optional[dict]:
+        usuario = self._por_id.get(usuario_id)
+        return None if usuario is None else usuario.a_dict()
+
+    def por_username(self, username: str) -> Optional[dict]:
+        usuario = self._por_username.get(username)
+        return None if usuario is None else usuario.a_dict()
+
+    def existe(self, username: str) -> bool:
+        return username in self._por_username
+
+    def registrar(self, registro: dict) -> None:
+        if registro["username"] in self._por_username or registro["id"] in self._por_id:
+            raise ValueError("El usuario ya existe")
+        usuario = Usuario.desde_dict(registro)
+        self._por_username[usuario.username] = usuario
+        self._por_id[usuario.id] = usuario
+        self._agregados[usuario.id] = AgregadosUsuario.desde_usuario(usuario)
+
+    def actualizar(self, usuario_id: str, cambios: dict) -> Optional[dict]:
+        """Aplica los cambios al usuario y reindexa si cambió su username. Devuelve None si no existe."""
+        usuario = self._por_id.get(usuario_id)
+        if usuario is None:
+            return None
+        if "id" in cambios and cambios["id"] != usuario_id:
+            raise ValueError("El id de un usuario no se puede modificar")
+        campos = [c for c in cambios if c != "id"]
+        if desconocidos := set(campos) - set(CAMPOS_EDITABLES):
+            raise ValueError(f"Campos no editables: {', '.join(sorted(desconocidos))}")
+        nuevo_username = cambios.get("username", usuario.username)
+        if nuevo_username != usuario.username:
+            if nuevo_username in self._por_username:
+                raise ValueError("El usuario ya existe")
+            del self._por_username[usuario.username]
+            self._por_username[nuevo_username] = usuario
+        for campo in campos:
+            setattr(usuario, campo, cambios[campo])
+        return usuario.a_dict()
+
+    # FACTURAS Y ELECTRODOMÉSTICOS
+    # Cada cambio actualiza los agregados del usuario en O(1).
+    def agregados(self, usuario_id: str) -> Optional[AgregadosUsuario]:
+        return self._agregados.get(usuario_id)
+
+    def anadir_factura(self, usuario_id: str, factura: dict) -> None:
+        """Lanza KeyError si el usuario ya tiene una factura con ese id."""
+        self._por_id[usuario_id].facturas.anadir(factura)
+        self._agregados[usuario_id].sumar_factura(factura)
+
+    def eliminar_factura(self, usuario_id: str, factura_id: str) -> bool:
+        """Elimina la factura indicada. Devuelve False si el usuario no la tenía."""
+        factura = self._por_id[usuario_id].facturas.eliminar(factura_id)
+        if factura is None:
+            return False
+        self._agregados[usuario_id].sumar_factura(factura, signo=-1)
+        return True
+
+    def facturas(self, usuario_id: str, desde: Optional[Tuple[int, int]] = None, hasta: Optional[Tuple[int, int]] = None) -> List[dict]:
+        """Facturas del usuario en orden cronológico, opcionalmente limitadas a un rango de períodos."""
+        return list(self._por_id[usuario_id].facturas.entre(desde, hasta))
+
+    def facturas_pagina(self, usuario_id: str, limite: int, despues: Optional[Tuple[int, int, str]] = None, descendente: bool = False) -> List[dict]:
+        """Hasta `limite` facturas siguientes a la clave (año, número de mes, id) `despues`."""
+        return self._por_id[usuario_id].facturas.pagina(limite, despues, descendente)
+
+    def electrodomesticos(self, usuario_id: str) -> List[dict]:
+        return [ed.a_dict() for ed in self._por_id[usuario_id].electrodomesticos]
+
+    def anadir_electrodomestico(self, usuario_id: str, ed: dict) -> None:
+        electrodomestico = Electrodomestico.desde_dict(ed)
+        self._por_id[usuario_id].electrodomesticos.append(electrodomestico)
+        self._agregados[usuario_id].fijar_electrodomestico(electrodomestico.id, electrodomestico.consumo_kwh)
+
+    def actualizar_electrodomestico(self, usuario_id: str, ed_id: str, cambios: dict) -> Optional[dict]:
+        """Aplica los cambios al electrodoméstico indicado. Devuelve None si el usuario no lo tenía."""
+        for ed in self._por_id[usuario_id].electrodomesticos:
+            if ed.id == ed_id:
+                for campo, valor in cambios.items():
+                    if campo != "id" and hasattr(ed, campo):
+                        setattr(ed, campo, valor)
+                self._agregados[usuario_id].fijar_electrodomestico(ed.id, ed.consumo_kwh)
+                return ed.a_dict()
+        return None
+
+    def eliminar_electrodomestico(self, usuario_id: str, ed_id: str) -> bool:
+        electrodomesticos = self._por_id[usuario_id].electrodomesticos
+        for i, ed in enumerate(electrodomesticos):
+            if ed.id == ed_id:
+                del electrodomesticos[i]
+                self._agregados[usuario_id].quitar_electrodomestico(ed_id)
+                return True
+        return False
+
+    # CONSEJOS
+    def marcar_consejo_cumplido(self, usuario_id: str, consejo_id: str, puntos: int, fecha: str) -> Optional[int]:
+        """
+        Marca el consejo, suma los puntos y registra el progreso del día.
+        Devuelve el nuevo total de puntos, o None si el consejo ya estaba cumplido.
+        """
+        usuario = self._por_id[usuario_id]
+        if consejo_id in usuario.consejos_cumplidos:
+            return None
+        usuario.consejos_cumplidos.append(consejo_id)
+        usuario.puntos_sostenibilidad += puntos
+        usuario.registrar_progreso(fecha, usuario.puntos_sostenibilidad)
+        return usuario.puntos_sostenibilidad
+
+# MOTOR DE ALMACENAMIENTO
+# Con BIOTRACK_DB=sqlite los datos se guardan en un archivo SQLite que comparten todos los workers.
+MOTOR_DB = os.environ.get("BIOTRACK_DB", "memoria")
+if MOTOR_DB == "sqlite":
+    from .repositorio_sqlite import RepositorioSQLite
+    usuarios = RepositorioSQLite(
+        os.environ.get("BIOTRACK_SQLITE_PATH", "biotrack.db"),
+        tamano_pool=int(os.environ.get("BIOTRACK_SQLITE_POOL", "4")),
+        semilla=db_usuarios.values(),
+    )
+elif MOTOR_DB == "memoria":
+    usuarios = RepositorioUsuarios(db_usuarios)
+else:
+    raise ValueError(f"BIOTRACK_DB desconocido: {MOTOR_DB}")
+
+T = TypeVar("T")
+
+async def en_almacenamiento(funcion: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Llama desde un endpoint async a `funcion`, que usa `usuarios`. Con SQLite corre en el pool de hilos:
+    sus consultas bloquean, y una escritura puede esperar hasta el timeout a que otro worker suelte la base.
+    En memoria se llama directo, en el event loop: las operaciones no bloquean y el repositorio no es
+    seguro entre hilos.
+    """
+    if MOTOR_DB == "sqlite":
+        return await run_in_threadpool(funcion, *args, **kwargs)
+    return funcion(*args, **kwargs)
+
 BASE_ELECTRODOMESTICOS = [
     {"id": "cat-001", "nombre": "Heladera c/freezer (moderno)", "potencia_base": 150, "eficiencia_estandar": "Alta", "horas_dia_estandar": 8, "dias_mes_estandar": 30},
     {"id": "cat-002", "nombre": "Freezer independiente", "potencia_base": 250, "eficiencia_estandar": "Baja", "horas_dia_estandar": 7.2, "dias_mes_estandar": 30},
@@ -54,4 +514,4 @@ BASE_ELECTRODOMESTICOS = [
     {"id": "cat-030", "nombre": "Cargador de celular", "potencia_base": 5, "eficiencia_estandar": "Alta", "horas_dia_estandar": 6.0, "dias_mes_estandar": 30},
     {"id": "cat-031", "nombre": "Consola en standby", "potencia_base": 100, "eficiencia_estandar": "Baja", "horas_dia_estandar": 2.0, "dias_mes_estandar": 30},
     {"id": "cat-032", "nombre": "Router WiFi", "potencia_base": 10, "eficiencia_estandar": "Alta", "horas_dia_estandar": 24.0, "dias_mes_estandar": 30},
-]
\ No newline at end of file
+]
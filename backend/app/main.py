@@ -2,16 +2,49 @@
 Archivo principal de la aplicación FastAPI.
 Inicializa la app, configura CORS y agrega todos los routers modulares.
 """
+import asyncio
+import contextlib
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import snapshot
+from .database import MOTOR_DB, usuarios
+from .supabase_async import supabase
 from .routers import auth, users, invoices, appliances, calculations, advice, metrics
 
+# CICLO DE VIDA
+# En modo memoria, si BIOTRACK_SNAPSHOT_PATH está definido, los datos se restauran al arrancar,
+# se guardan cada BIOTRACK_SNAPSHOT_INTERVALO segundos y una última vez al apagar.
+# Al apagar también se cierran las conexiones del cliente asíncrono de Supabase.
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        if MOTOR_DB == "memoria" and snapshot.RUTA_SNAPSHOT:
+            async with _snapshots():
+                yield
+        else:
+            yield
+    finally:
+        await supabase.cerrar()
+
+@contextlib.asynccontextmanager
+async def _snapshots():
+    snapshot.restaurar(usuarios, snapshot.RUTA_SNAPSHOT)
+    tarea = asyncio.create_task(snapshot.guardar_periodicamente(usuarios, snapshot.RUTA_SNAPSHOT, snapshot.INTERVALO_SNAPSHOT))
+    try:
+        yield
+    finally:
+        tarea.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await tarea
+        await snapshot.guardar(usuarios, snapshot.RUTA_SNAPSHOT)
+
 # INICIALIZACIÓN DE LA APP
 app = FastAPI(
     title="BioTrack API",
     description="API para gestionar datos de consumo energético y sostenibilidad.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # MIDDLEWARE
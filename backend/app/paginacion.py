@@ -0,0 +1,112 @@
+"""
+Paginación por clave (keyset): cada página sigue a la última clave devuelta en lugar de saltear
+filas con un offset, así que pedir una página lejana cuesta lo mismo que la primera.
+El cursor que ve el cliente es la clave codificada y opaca.
+"""
+import base64
+import binascii
+import json
+from typing import List, Optional, Sequence, Tuple
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+def codificar_cursor(clave: Sequence) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(clave), separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, tipos: Sequence[type]) -> tuple:
+    """
+    Devuelve la clave de un cursor, cuyos valores deben ser de los `tipos` indicados en orden.
+    Lanza ValueError si el cursor no es válido.
+    """
+    try:
+        clave = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(clave, list) or len(clave) != len(tipos):
+        raise ValueError("Cursor inválido")
+    # bool es subclase de int, pero true/false nunca son una clave válida.
+    if any(isinstance(valor, bool) or not isinstance(valor, tipo) for valor, tipo in zip(clave, tipos)):
+        raise ValueError("Cursor inválido")
+    return tuple(clave)
+
+def columnas_pedidas(fields: Optional[str], permitidas: Sequence[str]) -> Optional[List[str]]:
+    """Convierte `fields=a,b` en la lista de columnas pedidas. Lanza ValueError si alguna no existe."""
+    if not fields:
+        return None
+    columnas = list(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+    desconocidas = [c for c in columnas if c not in permitidas]
+    if desconocidas:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidas)}")
+    return columnas
+
+def proyectar(filas: List[dict], columnas: Optional[List[str]]) -> List[dict]:
+    if columnas is None:
+        return filas
+    return [{c: fila[c] for c in columnas} for fila in filas]
+
+def cortar(filas: List[dict], claves: Sequence[str], limite: int) -> Tuple[List[dict], Optional[tuple]]:
+    """
+    Recibe hasta `limite + 1` filas y devuelve la página y la clave de su última fila,
+    o None si no quedan más filas después.
+    """
+    if len(filas) <= limite:
+        return filas, None
+    filas = filas[:limite]
+    return filas, tuple(filas[-1][c] for c in claves)
+
+# FACTURAS EN SUPABASE
+# El mes se guarda como nombre ("Enero"…"Diciembre"), que como texto no sigue el orden del calendario.
+# Las páginas de facturas se ordenan por mes_num, una columna generada con el número del mes (SQL_MES_NUM).
+MESES = ("Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre")
+CLAVES_FACTURAS = ("anio", "mes_num", "id")
+TIPOS_CLAVES_FACTURAS = (int, int, str)
+
+_CASOS_MES = " ".join(f"when '{nombre}' then {numero}" for numero, nombre in enumerate(MESES, start=1))
+SQL_MES_NUM = f"""
+-- Un mes que no es uno de los nombres queda en 0, antes de Enero, para que la clave nunca sea nula.
+alter table public.facturas add column if not exists mes_num smallint not null
+    generated always as (case mes {_CASOS_MES} else 0 end) stored;
+create index if not exists facturas_usuario_periodo on public.facturas (usuario_id, anio, mes_num, id);
+"""
+
+def mes_num(mes) -> int:
+    """Valor de la columna mes_num para el mes de una factura."""
+    return MESES.index(mes) + 1 if mes in MESES else 0
+
+# POSTGREST
+def _valor(valor) -> str:
+    """Valor para un filtro `or`: los textos van entre comillas, con `\\` y `"` escapados como los lee PostgREST."""
+    if isinstance(valor, str):
+        return '"' + valor.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return str(valor)
+
+def filtro_posterior(claves: Sequence[str], despues: Sequence, descendente: bool = False) -> str:
+    """
+    Filtro `or` de PostgREST que deja las filas que siguen a `despues` en el orden de `claves`:
+    (a, b) > (x, y) se escribe a.gt.x,and(a.eq.x,b.gt.y).
+    """
+    operador = "lt" if descendente else "gt"
+    ramas = []
+    for i, clave in enumerate(claves):
+        condiciones = [f"{c}.eq.{_valor(v)}" for c, v in zip(claves[:i], despues[:i])]
+        condiciones.append(f"{clave}.{operador}.{_valor(despues[i])}")
+        ramas.append(condiciones[0] if len(condiciones) == 1 else f"and({','.join(condiciones)})")
+    return ",".join(ramas)
+
+def consulta_pagina(consulta, claves: Sequence[str], limite: int, despues: Optional[Sequence] = None, descendente: bool = False):
+    """
+    Completa una consulta de supabase-py (síncrona o asíncrona) para traer una página:
+    ordena por `claves`, continúa después de `despues` y pide una fila extra para saber si hay más.
+    """
+    if despues is not None:
+        consulta = consulta.or_(filtro_posterior(claves, despues, descendente))
+    for clave in claves:
+        consulta = consulta.order(clave, desc=descendente)
+    return consulta.limit(limite + 1)
+
+def columnas_consulta(columnas: Optional[List[str]], claves: Sequence[str]) -> str:
+    """Columnas a pedir a la base: las solicitadas más las claves que necesita el cursor."""
+    if columnas is None:
+        return "*"
+    return ",".join(dict.fromkeys([*columnas, *claves]))
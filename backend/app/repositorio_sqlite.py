@@ -0,0 +1,409 @@
+"""
+Repositorio de usuarios sobre un archivo SQLite en modo WAL, con la misma interfaz que
+`RepositorioUsuarios`. Varios workers de uvicorn pueden compartirlo sin divergir.
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .database import CAMPOS_EDITABLES, MESES, AgregadosUsuario, consumo_electrodomestico_kwh, numero_mes
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    nombre TEXT,
+    ubicacion TEXT,
+    nivel_subsidio TEXT,
+    puntos_sostenibilidad INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS facturas (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    anio INTEGER NOT NULL,
+    mes_num INTEGER NOT NULL,
+    mes TEXT NOT NULL,
+    consumo_kwh REAL NOT NULL,
+    costo REAL NOT NULL,
+    PRIMARY KEY (usuario_id, id)
+);
+CREATE INDEX IF NOT EXISTS facturas_usuario_periodo ON facturas (usuario_id, anio, mes_num, id);
+CREATE TABLE IF NOT EXISTS electrodomesticos (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    potencia REAL NOT NULL,
+    eficiencia TEXT,
+    horas_dia REAL NOT NULL,
+    dias_mes INTEGER NOT NULL,
+    kwh REAL NOT NULL,
+    PRIMARY KEY (usuario_id, id)
+);
+CREATE TABLE IF NOT EXISTS consejos_cumplidos (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    consejo_id TEXT NOT NULL,
+    PRIMARY KEY (usuario_id, consejo_id)
+);
+CREATE TABLE IF NOT EXISTS progreso_sostenibilidad (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    fecha TEXT NOT NULL,
+    puntos INTEGER NOT NULL,
+    PRIMARY KEY (usuario_id, fecha)
+);
+CREATE TABLE IF NOT EXISTS agregados (
+    usuario_id TEXT PRIMARY KEY REFERENCES usuarios(id) ON DELETE CASCADE,
+    facturas INTEGER NOT NULL DEFAULT 0,
+    consumo_kwh REAL NOT NULL DEFAULT 0,
+    costo REAL NOT NULL DEFAULT 0,
+    estimado_kwh REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS agregados_anio (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    anio INTEGER NOT NULL,
+    facturas INTEGER NOT NULL,
+    consumo_kwh REAL NOT NULL,
+    costo REAL NOT NULL,
+    PRIMARY KEY (usuario_id, anio)
+);
+CREATE TABLE IF NOT EXISTS agregados_mes (
+    usuario_id TEXT NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    anio INTEGER NOT NULL,
+    mes_num INTEGER NOT NULL,
+    facturas INTEGER NOT NULL,
+    consumo_kwh REAL NOT NULL,
+    costo REAL NOT NULL,
+    PRIMARY KEY (usuario_id, anio, mes_num)
+);
+"""
+
+# SENTENCIAS
+# Texto constante y parámetros con "?": sqlite3 reutiliza la sentencia preparada de cada conexión.
+SQL_USUARIO_POR_ID = "SELECT id, username, password, nombre, ubicacion, nivel_subsidio, puntos_sostenibilidad FROM usuarios WHERE id = ?"
+SQL_USUARIO_POR_USERNAME = "SELECT id, username, password, nombre, ubicacion, nivel_subsidio, puntos_sostenibilidad FROM usuarios WHERE username = ?"
+SQL_CONSEJOS = "SELECT consejo_id FROM consejos_cumplidos WHERE usuario_id = ? ORDER BY rowid"
+SQL_PROGRESO = "SELECT fecha, puntos FROM progreso_sostenibilidad WHERE usuario_id = ? ORDER BY fecha"
+SQL_INSERTAR_USUARIO = "INSERT INTO usuarios (id, username, password, nombre, ubicacion, nivel_subsidio, puntos_sostenibilidad) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SQL_INSERTAR_AGREGADOS = "INSERT INTO agregados (usuario_id) VALUES (?)"
+SQL_INSERTAR_CONSEJO = "INSERT OR IGNORE INTO consejos_cumplidos (usuario_id, consejo_id) VALUES (?, ?)"
+SQL_GUARDAR_PROGRESO = """
+    INSERT INTO progreso_sostenibilidad (usuario_id, fecha, puntos) VALUES (?, ?, ?)
+    ON CONFLICT (usuario_id, fecha) DO UPDATE SET puntos = excluded.puntos
+"""
+SQL_SUMAR_PUNTOS = "UPDATE usuarios SET puntos_sostenibilidad = puntos_sostenibilidad + ? WHERE id = ?"
+SQL_PUNTOS = "SELECT puntos_sostenibilidad FROM usuarios WHERE id = ?"
+
+SQL_FACTURAS_ENTRE = """
+    SELECT id, mes, anio, consumo_kwh, costo FROM facturas
+    WHERE usuario_id = ? AND (anio, mes_num) >= (?, ?) AND (anio, mes_num) <= (?, ?)
+    ORDER BY anio, mes_num, id
+"""
+SQL_FACTURAS_PAGINA = """
+    SELECT id, mes, anio, consumo_kwh, costo FROM facturas
+    WHERE usuario_id = ? AND (anio, mes_num, id) > (?, ?, ?)
+    ORDER BY anio, mes_num, id LIMIT ?
+"""
+SQL_FACTURAS_PAGINA_DESC = """
+    SELECT id, mes, anio, consumo_kwh, costo FROM facturas
+    WHERE usuario_id = ? AND (anio, mes_num, id) < (?, ?, ?)
+    ORDER BY anio DESC, mes_num DESC, id DESC LIMIT ?
+"""
+SQL_FACTURA = "SELECT anio, mes_num, consumo_kwh, costo FROM facturas WHERE usuario_id = ? AND id = ?"
+SQL_INSERTAR_FACTURA = "INSERT INTO facturas (usuario_id, id, anio, mes_num, mes, consumo_kwh, costo) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SQL_BORRAR_FACTURA = "DELETE FROM facturas WHERE usuario_id = ? AND id = ?"
+
+SQL_ELECTRODOMESTICOS = "SELECT id, nombre, cantidad, potencia, eficiencia, horas_dia, dias_mes FROM electrodomesticos WHERE usuario_id = ? ORDER BY rowid"
+SQL_ELECTRODOMESTICO = "SELECT id, nombre, cantidad, potencia, eficiencia, horas_dia, dias_mes, kwh FROM electrodomesticos WHERE usuario_id = ? AND id = ?"
+SQL_INSERTAR_ELECTRODOMESTICO = """
+    INSERT INTO electrodomesticos (usuario_id, id, nombre, cantidad, potencia, eficiencia, horas_dia, dias_mes, kwh)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_ACTUALIZAR_ELECTRODOMESTICO = """
+    UPDATE electrodomesticos SET nombre = ?, cantidad = ?, potencia = ?, eficiencia = ?, horas_dia = ?, dias_mes = ?, kwh = ?
+    WHERE usuario_id = ? AND id = ?
+"""
+SQL_BORRAR_ELECTRODOMESTICO = "DELETE FROM electrodomesticos WHERE usuario_id = ? AND id = ?"
+
+SQL_AGREGADOS = "SELECT facturas, consumo_kwh, costo, estimado_kwh FROM agregados WHERE usuario_id = ?"
+SQL_AGREGADOS_ANIO = "SELECT anio, facturas, consumo_kwh, costo FROM agregados_anio WHERE usuario_id = ?"
+SQL_AGREGADOS_MES = "SELECT anio, mes_num, facturas, consumo_kwh, costo FROM agregados_mes WHERE usuario_id = ?"
+SQL_KWH_ELECTRODOMESTICOS = "SELECT id, kwh FROM electrodomesticos WHERE usuario_id = ? ORDER BY rowid"
+# Cuando el usuario se queda sin facturas los totales vuelven a cero exacto, como en memoria.
+SQL_SUMAR_FACTURA = """
+    UPDATE agregados SET
+        facturas = facturas + ?1,
+        consumo_kwh = CASE WHEN facturas + ?1 = 0 THEN 0.0 ELSE consumo_kwh + ?2 END,
+        costo = CASE WHEN facturas + ?1 = 0 THEN 0.0 ELSE costo + ?3 END
+    WHERE usuario_id = ?4
+"""
+SQL_SUMAR_ANIO = """
+    INSERT INTO agregados_anio (usuario_id, anio, facturas, consumo_kwh, costo) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (usuario_id, anio) DO UPDATE SET
+        facturas = facturas + excluded.facturas,
+        consumo_kwh = consumo_kwh + excluded.consumo_kwh,
+        costo = costo + excluded.costo
+"""
+SQL_PODAR_ANIO = "DELETE FROM agregados_anio WHERE usuario_id = ? AND anio = ? AND facturas = 0"
+SQL_SUMAR_MES = """
+    INSERT INTO agregados_mes (usuario_id, anio, mes_num, facturas, consumo_kwh, costo) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (usuario_id, anio, mes_num) DO UPDATE SET
+        facturas = facturas + excluded.facturas,
+        consumo_kwh = consumo_kwh + excluded.consumo_kwh,
+        costo = costo + excluded.costo
+"""
+SQL_PODAR_MES = "DELETE FROM agregados_mes WHERE usuario_id = ? AND anio = ? AND mes_num = ? AND facturas = 0"
+SQL_SUMAR_ESTIMADO = """
+    UPDATE agregados SET estimado_kwh = CASE
+        WHEN EXISTS (SELECT 1 FROM electrodomesticos WHERE usuario_id = ?1) THEN estimado_kwh + ?2 ELSE 0.0 END
+    WHERE usuario_id = ?1
+"""
+
+PERIODO_MINIMO = (0, 0)
+PERIODO_MAXIMO = (10**9, 12)
+# Claves fuera del rango válido, para empezar una página desde un extremo.
+CLAVE_MINIMA = (0, 0, 0)
+CLAVE_MAXIMA = (10**9, 13, 0)
+
+class RepositorioSQLite:
+    def __init__(self, ruta: str, tamano_pool: int = 4, semilla: Iterable[dict] = ()):
+        self.ruta = ruta
+        self.tamano_pool = max(1, tamano_pool)
+        self._libres: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._abiertas = 0
+        self._candado = threading.Lock()
+        with self._conexion() as conexion:
+            conexion.execute("PRAGMA journal_mode = WAL")
+            conexion.executescript(ESQUEMA)
+        for registro in semilla:
+            if not self.existe(registro["username"]):
+                try:
+                    self.registrar(registro)
+                except ValueError:
+                    pass  # Otro worker lo insertó al mismo tiempo.
+
+    # CONEXIONES
+    def _abrir(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.ruta, timeout=10, isolation_level=None, check_same_thread=False, cached_statements=256)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute("PRAGMA foreign_keys = ON")
+        conexion.execute("PRAGMA synchronous = NORMAL")
+        return conexion
+
+    @contextmanager
+    def _conexion(self) -> Iterator[sqlite3.Connection]:
+        """Toma una conexión del pool, abriendo una nueva mientras no se llegue al tamaño máximo."""
+        try:
+            conexion = self._libres.get_nowait()
+        except queue.Empty:
+            with self._candado:
+                abrir = self._abiertas < self.tamano_pool
+                if abrir:
+                    self._abiertas += 1
+            conexion = self._abrir() if abrir else self._libres.get()
+        try:
+            yield conexion
+        finally:
+            self._libres.put(conexion)
+
+    @contextmanager
+    def _transaccion(self, escritura: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Transacción explícita. Las de escritura toman el candado de escritura al empezar
+        (BEGIN IMMEDIATE) para que dos workers no lean y escriban el mismo dato a la vez.
+        """
+        with self._conexion() as conexion:
+            conexion.execute("BEGIN IMMEDIATE" if escritura else "BEGIN")
+            try:
+                yield conexion
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            conexion.execute("COMMIT")
+
+    def cerrar(self) -> None:
+        with self._candado:
+            while True:
+                try:
+                    self._libres.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._abiertas = 0
+
+    # USUARIOS
+    def __len__(self) -> int:
+        with self._conexion() as conexion:
+            return conexion.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    @staticmethod
+    def _registro(conexion: sqlite3.Connection, fila: Optional[sqlite3.Row]) -> Optional[dict]:
+        if fila is None:
+            return None
+        registro = dict(fila)
+        registro["consejos_cumplidos"] = [consejo for (consejo,) in conexion.execute(SQL_CONSEJOS, (registro["id"],))]
+        registro["progreso_sostenibilidad"] = [{"fecha": fecha, "puntos": puntos} for fecha, puntos in conexion.execute(SQL_PROGRESO, (registro["id"],))]
+        return registro
+
+    def por_id(self, usuario_id: str) -> Optional[dict]:
+        with self._transaccion() as conexion:
+            return self._registro(conexion, conexion.execute(SQL_USUARIO_POR_ID, (usuario_id,)).fetchone())
+
+    def por_username(self, username: str) -> Optional[dict]:
+        with self._transaccion() as conexion:
+            return self._registro(conexion, conexion.execute(SQL_USUARIO_POR_USERNAME, (username,)).fetchone())
+
+    def existe(self, username: str) -> bool:
+        with self._conexion() as conexion:
+            return conexion.execute("SELECT 1 FROM usuarios WHERE username = ?", (username,)).fetchone() is not None
+
+    def registrar(self, registro: dict) -> None:
+        try:
+            with self._transaccion(escritura=True) as conexion:
+                conexion.execute(SQL_INSERTAR_USUARIO, (
+                    registro["id"], registro["username"], registro["password"], registro.get("nombre"),
+                    registro.get("ubicacion"), registro.get("nivel_subsidio"), registro.get("puntos_sostenibilidad", 0),
+                ))
+                conexion.execute(SQL_INSERTAR_AGREGADOS, (registro["id"],))
+                for consejo_id in registro.get("consejos_cumplidos", []):
+                    conexion.execute(SQL_INSERTAR_CONSEJO, (registro["id"], consejo_id))
+                for progreso in registro.get("progreso_sostenibilidad", []):
+                    conexion.execute(SQL_GUARDAR_PROGRESO, (registro["id"], progreso["fecha"], progreso["puntos"]))
+                for factura in registro.get("facturas", []):
+                    self._insertar_factura(conexion, registro["id"], factura)
+                for ed in registro.get("electrodomesticos", []):
+                    self._insertar_electrodomestico(conexion, registro["id"], ed)
+        except sqlite3.IntegrityError:
+            raise ValueError("El usuario ya existe")
+
+    def actualizar(self, usuario_id: str, cambios: dict) -> Optional[dict]:
+        """Aplica los cambios al usuario. Devuelve None si no existe."""
+        if "id" in cambios and cambios["id"] != usuario_id:
+            raise ValueError("El id de un usuario no se puede modificar")
+        columnas = [c for c in cambios if c != "id"]
+        if desconocidas := set(columnas) - set(CAMPOS_EDITABLES):
+            raise ValueError(f"Campos no editables: {', '.join(sorted(desconocidas))}")
+        try:
+            with self._transaccion(escritura=True) as conexion:
+                if columnas:
+                    asignaciones = ", ".join(f"{c} = ?" for c in columnas)
+                    conexion.execute(f"UPDATE usuarios SET {asignaciones} WHERE id = ?", [cambios[c] for c in columnas] + [usuario_id])
+                return self._registro(conexion, conexion.execute(SQL_USUARIO_POR_ID, (usuario_id,)).fetchone())
+        except sqlite3.IntegrityError:
+            raise ValueError("El usuario ya existe")
+
+    # FACTURAS Y ELECTRODOMÉSTICOS
+    # Los agregados se actualizan en la misma transacción que el cambio que los origina.
+    def agregados(self, usuario_id: str) -> Optional[AgregadosUsuario]:
+        with self._transaccion() as conexion:
+            fila = conexion.execute(SQL_AGREGADOS, (usuario_id,)).fetchone()
+            if fila is None:
+                return None
+            agregados = AgregadosUsuario()
+            agregados.facturas, agregados.consumo_kwh, agregados.costo, agregados.estimado_kwh = fila
+            agregados.por_anio = {anio: [n, kwh, costo] for anio, n, kwh, costo in conexion.execute(SQL_AGREGADOS_ANIO, (usuario_id,))}
+            agregados.por_mes = {(anio, mes): [n, kwh, costo] for anio, mes, n, kwh, costo in conexion.execute(SQL_AGREGADOS_MES, (usuario_id,))}
+            agregados.kwh_electrodomesticos = {ed_id: kwh for ed_id, kwh in conexion.execute(SQL_KWH_ELECTRODOMESTICOS, (usuario_id,))}
+            return agregados
+
+    @staticmethod
+    def _sumar_factura(conexion: sqlite3.Connection, usuario_id: str, anio: int, mes: int, kwh: float, costo: float, signo: int) -> None:
+        conexion.execute(SQL_SUMAR_FACTURA, (signo, signo * kwh, signo * costo, usuario_id))
+        conexion.execute(SQL_SUMAR_ANIO, (usuario_id, anio, signo, signo * kwh, signo * costo))
+        conexion.execute(SQL_SUMAR_MES, (usuario_id, anio, mes, signo, signo * kwh, signo * costo))
+        if signo < 0:
+            conexion.execute(SQL_PODAR_ANIO, (usuario_id, anio))
+            conexion.execute(SQL_PODAR_MES, (usuario_id, anio, mes))
+
+    def _insertar_factura(self, conexion: sqlite3.Connection, usuario_id: str, factura: dict) -> None:
+        anio, mes = int(factura["anio"]), numero_mes(factura["mes"])
+        conexion.execute(SQL_INSERTAR_FACTURA, (usuario_id, factura["id"], anio, mes, MESES[mes - 1], factura["consumo_kwh"], factura["costo"]))
+        self._sumar_factura(conexion, usuario_id, anio, mes, factura["consumo_kwh"], factura["costo"], 1)
+
+    def anadir_factura(self, usuario_id: str, factura: dict) -> None:
+        """Lanza KeyError si el usuario ya tiene una factura con ese id."""
+        try:
+            with self._transaccion(escritura=True) as conexion:
+                self._insertar_factura(conexion, usuario_id, factura)
+        except sqlite3.IntegrityError:
+            raise KeyError(factura["id"])
+
+    def eliminar_factura(self, usuario_id: str, factura_id: str) -> bool:
+        """Elimina la factura indicada. Devuelve False si el usuario no la tenía."""
+        with self._transaccion(escritura=True) as conexion:
+            fila = conexion.execute(SQL_FACTURA, (usuario_id, factura_id)).fetchone()
+            if fila is None:
+                return False
+            conexion.execute(SQL_BORRAR_FACTURA, (usuario_id, factura_id))
+            self._sumar_factura(conexion, usuario_id, *fila, -1)
+            return True
+
+    def facturas(self, usuario_id: str, desde: Optional[Tuple[int, int]] = None, hasta: Optional[Tuple[int, int]] = None) -> List[dict]:
+        """Facturas del usuario en orden cronológico, opcionalmente limitadas a un rango de períodos."""
+        with self._conexion() as conexion:
+            filas = conexion.execute(SQL_FACTURAS_ENTRE, (usuario_id, *(desde or PERIODO_MINIMO), *(hasta or PERIODO_MAXIMO)))
+            return [dict(fila) for fila in filas]
+
+    def facturas_pagina(self, usuario_id: str, limite: int, despues: Optional[Tuple[int, int, str]] = None, descendente: bool = False) -> List[dict]:
+        """Hasta `limite` facturas siguientes a la clave (año, número de mes, id) `despues`; usa el índice del usuario."""
+        sql, inicio = (SQL_FACTURAS_PAGINA_DESC, CLAVE_MAXIMA) if descendente else (SQL_FACTURAS_PAGINA, CLAVE_MINIMA)
+        with self._conexion() as conexion:
+            return [dict(fila) for fila in conexion.execute(sql, (usuario_id, *(despues or inicio), limite))]
+
+    def electrodomesticos(self, usuario_id: str) -> List[dict]:
+        with self._conexion() as conexion:
+            return [dict(fila) for fila in conexion.execute(SQL_ELECTRODOMESTICOS, (usuario_id,))]
+
+    @staticmethod
+    def _insertar_electrodomestico(conexion: sqlite3.Connection, usuario_id: str, ed: dict) -> None:
+        kwh = consumo_electrodomestico_kwh(ed)
+        conexion.execute(SQL_INSERTAR_ELECTRODOMESTICO, (
+            usuario_id, ed["id"], ed["nombre"], ed["cantidad"], ed["potencia"], ed.get("eficiencia"), ed["horas_dia"], ed["dias_mes"], kwh,
+        ))
+        conexion.execute(SQL_SUMAR_ESTIMADO, (usuario_id, kwh))
+
+    def anadir_electrodomestico(self, usuario_id: str, ed: dict) -> None:
+        try:
+            with self._transaccion(escritura=True) as conexion:
+                self._insertar_electrodomestico(conexion, usuario_id, ed)
+        except sqlite3.IntegrityError:
+            raise KeyError(ed["id"])
+
+    def actualizar_electrodomestico(self, usuario_id: str, ed_id: str, cambios: dict) -> Optional[dict]:
+        """Aplica los cambios al electrodoméstico indicado. Devuelve None si el usuario no lo tenía."""
+        with self._transaccion(escritura=True) as conexion:
+            fila = conexion.execute(SQL_ELECTRODOMESTICO, (usuario_id, ed_id)).fetchone()
+            if fila is None:
+                return None
+            ed = dict(fila)
+            kwh_anterior = ed.pop("kwh")
+            ed.update({k: v for k, v in cambios.items() if k in ed and k != "id"})
+            kwh = consumo_electrodomestico_kwh(ed)
+            conexion.execute(SQL_ACTUALIZAR_ELECTRODOMESTICO, (
+                ed["nombre"], ed["cantidad"], ed["potencia"], ed["eficiencia"], ed["horas_dia"], ed["dias_mes"], kwh, usuario_id, ed_id,
+            ))
+            conexion.execute(SQL_SUMAR_ESTIMADO, (usuario_id, kwh - kwh_anterior))
+            return ed
+
+    def eliminar_electrodomestico(self, usuario_id: str, ed_id: str) -> bool:
+        with self._transaccion(escritura=True) as conexion:
+            fila = conexion.execute(SQL_ELECTRODOMESTICO, (usuario_id, ed_id)).fetchone()
+            if fila is None:
+                return False
+            conexion.execute(SQL_BORRAR_ELECTRODOMESTICO, (usuario_id, ed_id))
+            conexion.execute(SQL_SUMAR_ESTIMADO, (usuario_id, -fila["kwh"]))
+            return True
+
+    # CONSEJOS
+    def marcar_consejo_cumplido(self, usuario_id: str, consejo_id: str, puntos: int, fecha: str) -> Optional[int]:
+        """
+        Marca el consejo, suma los puntos y registra el progreso del día.
+        Devuelve el nuevo total de puntos, o None si el consejo ya estaba cumplido.
+        """
+        with self._transaccion(escritura=True) as conexion:
+            if conexion.execute(SQL_INSERTAR_CONSEJO, (usuario_id, consejo_id)).rowcount == 0:
+                return None
+            conexion.execute(SQL_SUMAR_PUNTOS, (puntos, usuario_id))
+            total = conexion.execute(SQL_PUNTOS, (usuario_id,)).fetchone()[0]
+            conexion.execute(SQL_GUARDAR_PROGRESO, (usuario_id, fecha, total))
+            return total
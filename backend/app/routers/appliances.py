@@ -1,11 +1,14 @@
 """
 Endpoints para la gestión de electrodomésticos usando Supabase
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
-from frontend.services import api_client  
+import httpx
+from postgrest import APIError
+from .. import paginacion
+from ..supabase_async import supabase
 
 router = APIRouter(
     tags=["electrodomesticos"]
@@ -27,6 +30,22 @@ class Electrodomestico(ElectrodomesticoCreate):
     id: str
     created_at: datetime
 
+class ElectrodomesticoParcial(BaseModel):
+    """Electrodoméstico con solo las columnas pedidas en `fields`."""
+    id: Optional[str] = None
+    usuario_id: Optional[str] = None
+    nombre: Optional[str] = None
+    cantidad: Optional[int] = None
+    potencia: Optional[float] = None
+    eficiencia: Optional[str] = None
+    horas_dia: Optional[float] = None
+    dias_mes: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class PaginaElectrodomesticos(BaseModel):
+    electrodomesticos: List[ElectrodomesticoParcial]
+    siguiente: Optional[str] = None
+
 class ElectrodomesticoUpdate(BaseModel):
     nombre: Optional[str] = None
     cantidad: Optional[int] = None
@@ -35,79 +54,100 @@ class ElectrodomesticoUpdate(BaseModel):
     horas_dia: Optional[float] = None
     dias_mes: Optional[int] = None
 
-@router.get("/electrodomesticos/{usuario_id}", response_model=List[Electrodomestico],
+async def _ejecutar(consulta, contexto: str):
+    """Ejecuta una consulta en Supabase sin bloquear el event loop y traduce los errores a HTTP."""
+    try:
+        return await supabase.ejecutar(consulta)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail=f"{contexto}: Supabase no respondió a tiempo")
+    except (APIError, httpx.HTTPError) as e:
+        raise HTTPException(status_code=500, detail=f"{contexto}: {str(e)}")
+
+CAMPOS_ELECTRODOMESTICO = tuple(ElectrodomesticoParcial.model_fields)
+# Orden de las páginas: de alta, con el id para desempatar.
+CLAVES_PAGINA = ("created_at", "id")
+TIPOS_CLAVES_PAGINA = (str, str)
+DESCRIPCION_FIELDS = "Columnas a devolver separadas por comas, p. ej. `nombre,potencia,cantidad`. Por defecto, todas."
+
+def _columnas(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return paginacion.columnas_pedidas(fields, CAMPOS_ELECTRODOMESTICO)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/electrodomesticos/{usuario_id}", response_model=List[ElectrodomesticoParcial], response_model_exclude_unset=True,
            summary="Obtener electrodomésticos de un usuario")
-async def obtener_electrodomesticos(usuario_id: str):
+async def obtener_electrodomesticos(usuario_id: str, fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS)):
+    columnas = _columnas(fields)
+    response = await _ejecutar(
+        supabase.table("electrodomesticos").select(",".join(columnas) if columnas else "*").eq("usuario_id", usuario_id),
+        "Error de base de datos")
+    if not response.data:
+        raise HTTPException(status_code=404, detail="No se encontraron electrodomésticos")
+    return response.data
+
+@router.get("/electrodomesticos/{usuario_id}/pagina", response_model=PaginaElectrodomesticos, response_model_exclude_unset=True,
+           summary="Obtener una página de electrodomésticos de un usuario")
+async def obtener_pagina_electrodomesticos(
+    usuario_id: str,
+    limite: int = Query(paginacion.LIMITE_POR_DEFECTO, ge=1, le=paginacion.LIMITE_MAXIMO),
+    despues: Optional[str] = Query(None, description="Cursor `siguiente` de la página anterior."),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+):
+    """
+    Paginación por clave sobre (fecha de alta, id): cada página continúa después del cursor
+    `siguiente` de la anterior, que es null en la última página.
+    """
+    columnas = _columnas(fields)
     try:
-        response = supabase = api_client.get_supabase_client()
-        response = supabase.table("electrodomesticos")\
-                         .select("*")\
-                         .eq("usuario_id", usuario_id)\
-                         .execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=404, detail="No se encontraron electrodomésticos")
-        return response.data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
+        clave = paginacion.decodificar_cursor(despues, TIPOS_CLAVES_PAGINA) if despues else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    consulta = supabase.table("electrodomesticos").select(paginacion.columnas_consulta(columnas, CLAVES_PAGINA)).eq("usuario_id", usuario_id)
+    response = await _ejecutar(paginacion.consulta_pagina(consulta, CLAVES_PAGINA, limite, clave), "Error de base de datos")
+    filas, ultima = paginacion.cortar(response.data, CLAVES_PAGINA, limite)
+    return {
+        "electrodomesticos": paginacion.proyectar(filas, columnas),
+        "siguiente": paginacion.codificar_cursor(ultima) if ultima else None,
+    }
 
 @router.post("/electrodomesticos", response_model=Electrodomestico,
             summary="Añadir nuevo electrodoméstico")
 async def crear_electrodomestico(electrodomestico: ElectrodomesticoCreate):
-    try:
-        # Convertir a dict y asegurar tipos correctos
-        data = electrodomestico.dict()
-        data["cantidad"] = int(data["cantidad"])
-        data["dias_mes"] = int(data["dias_mes"])
-        
-        response = supabase = api_client.get_supabase_client()
-        response = supabase.table("electrodomesticos")\
-                         .insert(data)\
-                         .execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=400, detail="No se pudo crear el electrodoméstico")
-        return response.data[0]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al crear: {str(e)}")
+    # Convertir a dict y asegurar tipos correctos
+    data = electrodomestico.dict()
+    data["cantidad"] = int(data["cantidad"])
+    data["dias_mes"] = int(data["dias_mes"])
+
+    response = await _ejecutar(supabase.table("electrodomesticos").insert(data), "Error al crear")
+    if not response.data:
+        raise HTTPException(status_code=400, detail="No se pudo crear el electrodoméstico")
+    return response.data[0]
 
 @router.put("/electrodomesticos/{electrodomestico_id}", response_model=Electrodomestico,
            summary="Actualizar electrodoméstico")
 async def actualizar_electrodomestico(electrodomestico_id: str, datos: ElectrodomesticoUpdate):
-    try:
-        # Filtrar campos None para actualización parcial
-        update_data = {k: v for k, v in datos.dict().items() if v is not None}
-        
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No hay datos para actualizar")
-        
-        response = supabase = api_client.get_supabase_client()
-        response = supabase.table("electrodomesticos")\
-                         .update(update_data)\
-                         .eq("id", electrodomestico_id)\
-                         .execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado")
-        return response.data[0]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al actualizar: {str(e)}")
+    # Filtrar campos None para actualización parcial
+    update_data = {k: v for k, v in datos.dict().items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No hay datos para actualizar")
+
+    response = await _ejecutar(
+        supabase.table("electrodomesticos").update(update_data).eq("id", electrodomestico_id),
+        "Error al actualizar")
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado")
+    return response.data[0]
 
 @router.delete("/electrodomesticos/{electrodomestico_id}",
               summary="Eliminar electrodoméstico")
 async def eliminar_electrodomestico(electrodomestico_id: str):
-    try:
-        response = supabase = api_client.get_supabase_client()
-        response = supabase.table("electrodomesticos")\
-                         .delete()\
-                         .eq("id", electrodomestico_id)\
-                         .execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado")
-        return {"mensaje": "Electrodoméstico eliminado correctamente"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al eliminar: {str(e)}")
+    response = await _ejecutar(
+        supabase.table("electrodomesticos").delete().eq("id", electrodomestico_id),
+        "Error al eliminar")
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado")
+    return {"mensaje": "Electrodoméstico eliminado correctamente"}
 
 # Endpoint para el catálogo base (opcional)
 @router.get("/catalogo/electrodomesticos",
@@ -5,33 +5,38 @@ import uuid
 from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from .. import schemas
-from ..database import db_usuarios
+from ..database import en_almacenamiento, usuarios
 
 router = APIRouter()
 
 @router.post("/login", summary="Autenticar un usuario.")
 async def login(peticion: schemas.PeticionLogin):
-    if peticion.username in db_usuarios and db_usuarios[peticion.username]["password"] == peticion.password:
-        return {"mensaje": "Inicio de sesión exitoso", "usuario_id": db_usuarios[peticion.username]["id"]}
+    user_data = await en_almacenamiento(usuarios.por_username, peticion.username)
+    if user_data and user_data["password"] == peticion.password:
+        return {"mensaje": "Inicio de sesión exitoso", "usuario_id": user_data["id"]}
     raise HTTPException(status_code=401, detail="Credenciales incorrectas")
 
 @router.post("/registro", summary="Registrar un nuevo usuario.")
 async def registro(peticion: schemas.PeticionRegistro):
-    if peticion.username in db_usuarios:
+    if await en_almacenamiento(usuarios.existe, peticion.username):
         raise HTTPException(status_code=409, detail="El usuario ya existe")
     
     nuevo_usuario_id = f"user-{uuid.uuid4().hex[:8]}"
-    db_usuarios[peticion.username] = {
-        "id": nuevo_usuario_id,
-        "username": peticion.username,
-        "password": peticion.password,
-        "nombre": peticion.nombre,
-        "ubicacion": peticion.ubicacion,
-        "nivel_subsidio": peticion.nivel_subsidio,
-        "facturas": [],
-        "electrodomesticos": [],
-        "puntos_sostenibilidad": 0,
-        "consejos_cumplidos": [],
-        "progreso_sostenibilidad": [{"fecha": datetime.now().strftime("%Y-%m-%d"), "puntos": 0}]
-    }
+    try:
+        await en_almacenamiento(usuarios.registrar, {
+            "id": nuevo_usuario_id,
+            "username": peticion.username,
+            "password": peticion.password,
+            "nombre": peticion.nombre,
+            "ubicacion": peticion.ubicacion,
+            "nivel_subsidio": peticion.nivel_subsidio,
+            "facturas": [],
+            "electrodomesticos": [],
+            "puntos_sostenibilidad": 0,
+            "consejos_cumplidos": [],
+            "progreso_sostenibilidad": [{"fecha": datetime.now().strftime("%Y-%m-%d"), "puntos": 0}]
+        })
+    except ValueError:
+        # Otro worker registró el mismo username entre la comprobación y el alta.
+        raise HTTPException(status_code=409, detail="El usuario ya existe")
     return {"mensaje": "Usuario registrado correctamente", "usuario_id": nuevo_usuario_id}
\ No newline at end of file
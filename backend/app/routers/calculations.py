@@ -1,27 +1,176 @@
 """
 Endpoints para realizar cálculos de costo y huella de carbono.
 """
-from fastapi import APIRouter
-from .. import schemas, utils
-from ..database import db_usuarios
+import json
+import math
+import os
+import secrets
+from datetime import datetime
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+from .. import schemas, tarifas, utils
+from ..database import en_almacenamiento, usuarios
 
 router = APIRouter(
     prefix="/calcular",
     tags=["calculos"]
 )
 
+def _usuario_o_404(usuario_id: str) -> dict:
+    if user_data := usuarios.por_id(usuario_id):
+        return user_data
+    raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
 @router.post("/costo", summary="Calcular costo estimado basado en kWh y subsidio.")
 async def calcular_costo_endpoint(peticion: schemas.CalculoKWH):
-    user_location = "Resistencia, Chaco"
-    for user in db_usuarios.values():
-        if user["nivel_subsidio"] == peticion.nivel_subsidio:
-            user_location = user["ubicacion"]
-            break
-            
-    costo_calculado = utils.calcular_costo_rango(peticion.kwh, peticion.nivel_subsidio, user_location)
+    """
+    La ubicación se toma de `ubicacion` (una dirección o una clase tarifaria como "rural_chaco")
+    o del usuario indicado en `usuario_id`; si no se indica ninguna, se usa Resistencia, Chaco.
+    Con `usuario_id`, el nivel de subsidio del usuario se usa salvo que se envíe explícitamente.
+    """
+    ubicacion, nivel_subsidio = peticion.ubicacion, peticion.nivel_subsidio
+    if peticion.usuario_id:
+        user_data = await en_almacenamiento(_usuario_o_404, peticion.usuario_id)
+        ubicacion = ubicacion or user_data["ubicacion"]
+        if "nivel_subsidio" not in peticion.model_fields_set:
+            nivel_subsidio = user_data["nivel_subsidio"]
+
+    costo_calculado = utils.calcular_costo_rango(peticion.kwh, nivel_subsidio, ubicacion or tarifas.UBICACION_POR_DEFECTO, peticion.mes)
     return {"costo_estimado": costo_calculado}
 
 @router.post("/huella_carbono", summary="Calcular huella de carbono basada en kWh.")
 async def calcular_huella_carbono_endpoint(peticion: schemas.CalculoKWH):
     huella = utils.calcular_huella_carbono(peticion.kwh)
-    return {"huella_carbono_kg_co2": huella}
\ No newline at end of file
+    return {"huella_carbono_kg_co2": huella}
+
+# CÁLCULOS POR LOTE
+# Las filas se leen sin un modelo Pydantic por fila: se pasan directo a columnas NumPy.
+MAX_FILAS_LOTE = 1_000_000
+TIPOS_NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+async def _leer_filas(request: Request) -> list:
+    """Lee el cuerpo como un array JSON de filas o como un flujo NDJSON (una fila por línea)."""
+    try:
+        if request.headers.get("content-type", "").split(";")[0].strip() in TIPOS_NDJSON:
+            filas, resto = [], b""
+            async for trozo in request.stream():
+                lineas = (resto + trozo).split(b"\n")
+                resto = lineas.pop()
+                filas.extend(json.loads(linea) for linea in lineas if linea.strip())
+            if resto.strip():
+                filas.append(json.loads(resto))
+        else:
+            filas = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e}")
+    if not isinstance(filas, list) or not all(isinstance(f, dict) for f in filas):
+        raise HTTPException(status_code=422, detail="Se esperaba una lista de objetos")
+    if len(filas) > MAX_FILAS_LOTE:
+        raise HTTPException(status_code=413, detail=f"El lote supera las {MAX_FILAS_LOTE} filas")
+    return filas
+
+def _error_fila(fila: int, detalle: str) -> HTTPException:
+    return HTTPException(status_code=422, detail=f"Fila {fila}: {detalle}")
+
+def _columna_kwh(filas: list) -> np.ndarray:
+    kwh = np.empty(len(filas), dtype=float)
+    for i, f in enumerate(filas):
+        valor = f.get("kwh")
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            raise _error_fila(i, "'kwh' debe ser numérico")
+        try:
+            valor = float(valor)
+        except OverflowError:
+            valor = math.inf
+        if not math.isfinite(valor):
+            raise _error_fila(i, "'kwh' está fuera de rango")
+        kwh[i] = valor
+    return kwh
+
+def _columna_mes(filas: list) -> np.ndarray:
+    mes_actual = datetime.now().month
+    meses = np.empty(len(filas), dtype=np.int64)
+    for i, f in enumerate(filas):
+        mes = f.get("mes", mes_actual)
+        if isinstance(mes, bool) or not isinstance(mes, int) or not 1 <= mes <= 12:
+            raise _error_fila(i, "'mes' debe ser un entero entre 1 y 12")
+        meses[i] = mes
+    return meses
+
+def _parametros_filas(filas: list) -> tuple:
+    """
+    Nivel de subsidio y ubicación de cada fila. Con `usuario_id`, los que la fila no indica se
+    toman del usuario, igual que en `/costo`; cada usuario se busca una sola vez por lote.
+    """
+    usuarios_lote = {}
+    niveles, ubicaciones = [], []
+    for i, f in enumerate(filas):
+        nivel, ubicacion = f.get("nivel_subsidio", "medio"), f.get("ubicacion")
+        usuario_id = f.get("usuario_id")
+        if usuario_id and not isinstance(usuario_id, str):
+            raise _error_fila(i, "'usuario_id' debe ser un texto")
+        if usuario_id and (not ubicacion or "nivel_subsidio" not in f):
+            if usuario_id not in usuarios_lote:
+                usuarios_lote[usuario_id] = _usuario_o_404(usuario_id)
+            user_data = usuarios_lote[usuario_id]
+            ubicacion = ubicacion or user_data["ubicacion"]
+            if "nivel_subsidio" not in f:
+                nivel = user_data["nivel_subsidio"]
+        if not isinstance(nivel, str):
+            raise _error_fila(i, "'nivel_subsidio' debe ser un texto")
+        if ubicacion and not isinstance(ubicacion, str):
+            raise _error_fila(i, "'ubicacion' debe ser un texto")
+        niveles.append(nivel)
+        ubicaciones.append(ubicacion or tarifas.UBICACION_POR_DEFECTO)
+    return niveles, ubicaciones
+
+@router.post("/costo/lote", summary="Calcular el costo estimado de muchas facturas en una sola petición.")
+async def calcular_costo_lote_endpoint(request: Request):
+    """
+    Recibe un array JSON o un flujo NDJSON de filas
+    `{"kwh": float, "nivel_subsidio": str, "ubicacion": str, "usuario_id": str, "mes": int}`
+    (solo `kwh` es obligatorio) y devuelve los costos en el mismo orden.
+    """
+    filas = await _leer_filas(request)
+    kwh = _columna_kwh(filas)
+    niveles, ubicaciones = await en_almacenamiento(_parametros_filas, filas)
+    costos = utils.calcular_costo_lote(kwh, niveles, ubicaciones, _columna_mes(filas))
+    return JSONResponse({"costos_estimados": costos.tolist()})
+
+@router.post("/huella_carbono/lote", summary="Calcular la huella de carbono de muchos consumos en una sola petición.")
+async def calcular_huella_carbono_lote_endpoint(request: Request):
+    """Recibe un array JSON o un flujo NDJSON de filas `{"kwh": float}` y devuelve las huellas en el mismo orden."""
+    filas = await _leer_filas(request)
+    huellas = utils.calcular_huella_carbono_lote(_columna_kwh(filas))
+    return JSONResponse({"huellas_carbono_kg_co2": huellas.tolist()})
+
+@router.get("/cache", summary="Obtener estadísticas de la caché de costos.")
+async def estadisticas_cache_costos():
+    return utils.cache_costos.estadisticas()
+
+@router.get("/tarifas", summary="Obtener la versión del cuadro tarifario vigente.")
+async def obtener_tarifas():
+    return {"version": tarifas.cuadro_actual().version}
+
+# Clave que exigen las operaciones de administración en el encabezado X-Admin-Clave.
+# Sin BIOTRACK_ADMIN_CLAVE esas operaciones quedan deshabilitadas.
+CLAVE_ADMIN = os.environ.get("BIOTRACK_ADMIN_CLAVE", "")
+
+def _exigir_admin(x_admin_clave: str = Header("", description="Clave de administración (BIOTRACK_ADMIN_CLAVE).")) -> None:
+    if not CLAVE_ADMIN:
+        raise HTTPException(status_code=403, detail="Operación deshabilitada: falta configurar BIOTRACK_ADMIN_CLAVE")
+    if not secrets.compare_digest(x_admin_clave.encode(), CLAVE_ADMIN.encode()):
+        raise HTTPException(status_code=403, detail="Clave de administración incorrecta")
+
+@router.post("/tarifas/recargar", summary="Recargar el cuadro tarifario desde su archivo.", dependencies=[Depends(_exigir_admin)])
+async def recargar_tarifas():
+    """
+    Recarga el cuadro en el worker que atiende la petición. Los demás workers lo recargan solos en
+    BIOTRACK_TARIFAS_REVISAR segundos (5 por defecto), cuando ven que cambió el archivo.
+    """
+    try:
+        cuadro = tarifas.recargar_tarifas()
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Cuadro tarifario inválido: {e}")
+    return {"mensaje": "Tarifas recargadas", "version": cuadro.version}
@@ -1,34 +1,86 @@
 """
 Endpoints para la gestión de facturas de un usuario.
 """
-from fastapi import APIRouter, HTTPException
-from .. import schemas
-from ..database import db_usuarios
+from typing import Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query
+from .. import paginacion, schemas
+from ..database import en_almacenamiento, numero_mes, usuarios
 
 router = APIRouter(
     prefix="/facturas",
     tags=["facturas"]
 )
 
-@router.get("/{username}", summary="Obtener todas las facturas de un usuario.")
-async def obtener_facturas(username: str):
-    if user_data := db_usuarios.get(username):
-        return user_data["facturas"]
+PATRON_PERIODO = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+CAMPOS_FACTURA = ("id", "mes", "anio", "consumo_kwh", "costo")
+DESCRIPCION_FIELDS = "Columnas a devolver separadas por comas, p. ej. `mes,anio,consumo_kwh`. Por defecto, todas."
+
+def _periodo(valor: Optional[str]) -> Optional[Tuple[int, int]]:
+    if valor is None:
+        return None
+    anio, mes = valor.split("-")
+    return int(anio), int(mes)
+
+def _columnas(fields: Optional[str]):
+    try:
+        return paginacion.columnas_pedidas(fields, CAMPOS_FACTURA)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/{username}", summary="Obtener las facturas de un usuario, en orden cronológico.")
+async def obtener_facturas(
+    username: str,
+    desde: Optional[str] = Query(None, pattern=PATRON_PERIODO, description="Primer período incluido, AAAA-MM."),
+    hasta: Optional[str] = Query(None, pattern=PATRON_PERIODO, description="Último período incluido, AAAA-MM."),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+):
+    columnas = _columnas(fields)
+    if user_data := await en_almacenamiento(usuarios.por_username, username):
+        return paginacion.proyectar(await en_almacenamiento(usuarios.facturas, user_data["id"], _periodo(desde), _periodo(hasta)), columnas)
     raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
+@router.get("/{username}/pagina", summary="Obtener una página de facturas de un usuario.")
+async def obtener_pagina_facturas(
+    username: str,
+    limite: int = Query(paginacion.LIMITE_POR_DEFECTO, ge=1, le=paginacion.LIMITE_MAXIMO),
+    despues: Optional[str] = Query(None, description="Cursor `siguiente` de la página anterior."),
+    orden: str = Query("asc", pattern="^(asc|desc)$", description="`asc` cronológico, `desc` de la más reciente a la más antigua."),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+):
+    """
+    Paginación por clave sobre (año, mes, id): cada página continúa después del cursor
+    `siguiente` de la anterior, que es null en la última página.
+    """
+    columnas = _columnas(fields)
+    try:
+        clave = paginacion.decodificar_cursor(despues, (int, int, str)) if despues else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not (user_data := await en_almacenamiento(usuarios.por_username, username)):
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    filas = await en_almacenamiento(usuarios.facturas_pagina, user_data["id"], limite + 1, clave, descendente=orden == "desc")
+    filas, ultima = paginacion.cortar(filas, ("anio", "mes", "id"), limite)
+    siguiente = paginacion.codificar_cursor((ultima[0], numero_mes(ultima[1]), ultima[2])) if ultima else None
+    return {"facturas": paginacion.proyectar(filas, columnas), "siguiente": siguiente}
+
 @router.post("/{username}", summary="Añadir una nueva factura para un usuario.")
 async def anadir_factura(username: str, factura: schemas.Factura):
-    if username in db_usuarios:
-        db_usuarios[username]["facturas"].append(factura.model_dump())
+    if user_data := await en_almacenamiento(usuarios.por_username, username):
+        try:
+            await en_almacenamiento(usuarios.anadir_factura, user_data["id"], factura.model_dump())
+        except KeyError:
+            raise HTTPException(status_code=409, detail="Ya existe una factura con ese id")
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
         return {"mensaje": "Factura añadida correctamente"}
     raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
 @router.delete("/{username}/{factura_id}", summary="Eliminar una factura de un usuario.")
 async def eliminar_factura(username: str, factura_id: str):
-    if user_data := db_usuarios.get(username):
-        original_count = len(user_data["facturas"])
-        user_data["facturas"] = [f for f in user_data["facturas"] if f["id"] != factura_id]
-        if len(user_data["facturas"]) < original_count:
+    if user_data := await en_almacenamiento(usuarios.por_username, username):
+        if await en_almacenamiento(usuarios.eliminar_factura, user_data["id"], factura_id):
             return {"mensaje": "Factura eliminada correctamente"}
         raise HTTPException(status_code=404, detail="Factura no encontrada")
-    raise HTTPException(status_code=404, detail="Usuario no encontrado")
\ No newline at end of file
+    raise HTTPException(status_code=404, detail="Usuario no encontrado")
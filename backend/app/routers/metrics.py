@@ -1,110 +1,160 @@
 """
 Endpoints para obtener métricas consolidadas y generar datos de prueba.
 """
+import functools
 import random
 import uuid
-import pandas as pd
+from typing import Optional, Sequence
+import numpy as np
 from fastapi import APIRouter, HTTPException
-from ..database import db_usuarios, BASE_ELECTRODOMESTICOS
-from ..utils import calcular_huella_carbono, calcular_costo_rango, generar_consejos_dinamicos
+from .. import consejos
+from ..database import en_almacenamiento, usuarios, BASE_ELECTRODOMESTICOS
+from ..utils import calcular_huella_carbono, calcular_costo_rango, calcular_costo_lote, generar_consejos_dinamicos
 
 router = APIRouter(
     tags=["metricas"]
 )
 
-@router.get("/metricas/resumen/{usuario_id}", summary="Obtener métricas de resumen para la página de Inicio.")
-async def obtener_metricas_resumen(usuario_id: str):
-    user_data = next((u for u in db_usuarios.values() if u["id"] == usuario_id), None)
-    if not user_data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+CONSEJO_BIENVENIDA = {"id": "con-000", "texto": "¡Bienvenido! Empieza a registrar tus datos.", "urgente": False}
 
-    total_consumo = sum(f["consumo_kwh"] for f in user_data["facturas"])
-    total_costo = sum(f["costo"] for f in user_data["facturas"])
-    total_huella = calcular_huella_carbono(total_consumo)
+class _Panel:
+    """
+    Métricas de un usuario calculadas una sola vez y a pedido: cada sección usa los totales,
+    la huella y los consejos ya calculados por otra en lugar de volver a recorrer los datos.
+    """
+    def __init__(self, usuario_id: str, user_data: dict):
+        self.usuario_id = usuario_id
+        self.user_data = user_data
+        self.agregados = usuarios.agregados(usuario_id)
 
-    desglose = []
-    for ed in user_data["electrodomesticos"]:
-        consumo_ed = (ed["potencia"] / 1000) * ed["horas_dia"] * ed["dias_mes"] * ed["cantidad"]
-        desglose.append({"nombre": ed["nombre"], "total_kwh": round(consumo_ed, 2)})
+    @functools.cached_property
+    def huella(self) -> float:
+        return calcular_huella_carbono(self.agregados.consumo_kwh)
 
-    consejos = generar_consejos_dinamicos(total_consumo, total_huella, user_data["puntos_sostenibilidad"], user_data["consejos_cumplidos"])
-    no_cumplidos = [c for c in consejos if not c.get("cumplido")]
-    consejo_dia = random.choice(no_cumplidos) if no_cumplidos else {"id": "con-000", "texto": "¡Bienvenido! Empieza a registrar tus datos.", "urgente": False}
+    @functools.cached_property
+    def consejos(self) -> Sequence[dict]:
+        return generar_consejos_dinamicos(self.agregados.consumo_kwh, self.huella, self.user_data["puntos_sostenibilidad"], self.user_data["consejos_cumplidos"])
 
-    estimado_consumo = sum(item["total_kwh"] for item in desglose)
-    estimado_costo = calcular_costo_rango(estimado_consumo, user_data["nivel_subsidio"], user_data["ubicacion"])
+    def consejo_dia(self) -> dict:
+        return consejos.catalogo.consejo_del_dia(self.usuario_id, self.agregados.consumo_kwh, self.user_data["consejos_cumplidos"]) or CONSEJO_BIENVENIDA
 
-    return {
-        "consumo_total_kwh": total_consumo,
-        "costo_total": total_costo,
-        "huella_co2_total": total_huella,
-        "puntos_sostenibilidad": user_data["puntos_sostenibilidad"],
-        "consejo_dinamico": consejo_dia,
-        "desglose_electrodomesticos": desglose,
-        "resumen_actividad": {
-            "facturas_consumo": total_consumo,
-            "facturas_costo": total_costo,
+    def desglose(self) -> list:
+        return [
+            {"nombre": ed["nombre"], "total_kwh": round(self.agregados.kwh_electrodomesticos[ed["id"]], 2)}
+            for ed in usuarios.electrodomesticos(self.usuario_id)
+        ]
+
+    @functools.cached_property
+    def resumen_actividad(self) -> dict:
+        estimado_consumo = self.agregados.estimado_kwh
+        return {
+            "facturas_consumo": self.agregados.consumo_kwh,
+            "facturas_costo": self.agregados.costo,
             "estimado_consumo": estimado_consumo,
-            "estimado_costo": estimado_costo
+            "estimado_costo": calcular_costo_rango(estimado_consumo, self.user_data["nivel_subsidio"], self.user_data["ubicacion"]),
         }
-    }
 
-@router.get("/metricas/perfil/{usuario_id}", summary="Obtener métricas para la página de Perfil.")
-async def obtener_metricas_perfil(usuario_id: str):
-    user_data = next((u for u in db_usuarios.values() if u["id"] == usuario_id), None)
+    def progreso(self) -> dict:
+        return {
+            "puntos_sostenibilidad": self.user_data["puntos_sostenibilidad"],
+            "consejos_cumplidos_count": len(self.user_data["consejos_cumplidos"]),
+            "progreso_sostenibilidad": self.user_data["progreso_sostenibilidad"],
+            "resumen_por_anio": self.agregados.resumen_por_anio(),
+        }
+
+    def perfil(self) -> dict:
+        return {campo: self.user_data.get(campo, "N/A") for campo in ("nombre", "username", "ubicacion", "nivel_subsidio")}
+
+def _panel(usuario_id: str) -> _Panel:
+    user_data = usuarios.por_id(usuario_id)
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return _Panel(usuario_id, user_data)
 
-    total_consumo_facturas = sum(f["consumo_kwh"] for f in user_data["facturas"])
-    total_costo_facturas = sum(f["costo"] for f in user_data["facturas"])
+# Los endpoints arman la respuesta en una función síncrona que corre con en_almacenamiento: las
+# secciones del panel consultan `usuarios` a medida que se piden.
+def _resumen(usuario_id: str) -> dict:
+    panel = _panel(usuario_id)
+    return {
+        "consumo_total_kwh": panel.agregados.consumo_kwh,
+        "costo_total": panel.agregados.costo,
+        "huella_co2_total": panel.huella,
+        "puntos_sostenibilidad": panel.user_data["puntos_sostenibilidad"],
+        "consejo_dinamico": panel.consejo_dia(),
+        "desglose_electrodomesticos": panel.desglose(),
+        "resumen_actividad": panel.resumen_actividad,
+    }
 
-    df_electrodomesticos = pd.DataFrame(user_data["electrodomesticos"])
-    total_consumo_estimado = 0
-    if not df_electrodomesticos.empty:
-        df_electrodomesticos["total_kwh"] = (df_electrodomesticos["potencia"] * df_electrodomesticos["horas_dia"] * df_electrodomesticos["dias_mes"] * df_electrodomesticos["cantidad"]) / 1000
-        total_consumo_estimado = df_electrodomesticos["total_kwh"].sum()
-    
-    total_costo_estimado = calcular_costo_rango(total_consumo_estimado, user_data["nivel_subsidio"], user_data["ubicacion"])
+@router.get("/metricas/resumen/{usuario_id}", summary="Obtener métricas de resumen para la página de Inicio.")
+async def obtener_metricas_resumen(usuario_id: str):
+    return await en_almacenamiento(_resumen, usuario_id)
 
+def _perfil(usuario_id: str) -> dict:
+    panel = _panel(usuario_id)
     return {
-        "puntos_sostenibilidad": user_data["puntos_sostenibilidad"],
-        "consejos_cumplidos_count": len(user_data["consejos_cumplidos"]),
+        **panel.progreso(),
         "emisiones_sesion_kg_co2": random.uniform(0.1, 5.0),
         "energia_sesion_kwh": random.uniform(0.1, 15.0),
-        "progreso_sostenibilidad": user_data["progreso_sostenibilidad"],
-        "resumen_actividad": {
-            "facturas_consumo": total_consumo_facturas,
-            "facturas_costo": total_costo_facturas,
-            "estimado_consumo": total_consumo_estimado,
-            "estimado_costo": total_costo_estimado
-        },
-        "nombre": user_data.get("nombre", "N/A"),
-        "username": user_data.get("username", "N/A"),
-        "ubicacion": user_data.get("ubicacion", "N/A"),
-        "nivel_subsidio": user_data.get("nivel_subsidio", "N/A"),
+        "resumen_actividad": panel.resumen_actividad,
+        **panel.perfil(),
     }
 
+@router.get("/metricas/perfil/{usuario_id}", summary="Obtener métricas para la página de Perfil.")
+async def obtener_metricas_perfil(usuario_id: str):
+    return await en_almacenamiento(_perfil, usuario_id)
+
+# DASHBOARD
+# Secciones que se pueden pedir con `secciones=a,b`; sin el parámetro se devuelven todas.
+SECCIONES_DASHBOARD = {
+    "totales": lambda p: {
+        "consumo_total_kwh": p.agregados.consumo_kwh,
+        "costo_total": p.agregados.costo,
+        "resumen_actividad": p.resumen_actividad,
+    },
+    "huella": lambda p: {"huella_co2_total": p.huella},
+    "desglose": lambda p: p.desglose(),
+    "consejo_dia": lambda p: p.consejo_dia(),
+    "consejos": lambda p: p.consejos,
+    "progreso": lambda p: p.progreso(),
+    "perfil": lambda p: p.perfil(),
+}
+
+@router.get("/dashboard/{usuario_id}", summary="Obtener en una sola respuesta las métricas de las páginas de Inicio, Perfil y Consejos.")
+async def obtener_dashboard(usuario_id: str, secciones: Optional[str] = None):
+    pedidas = [s.strip() for s in secciones.split(",") if s.strip()] if secciones else list(SECCIONES_DASHBOARD)
+    desconocidas = [s for s in pedidas if s not in SECCIONES_DASHBOARD]
+    if desconocidas:
+        raise HTTPException(status_code=422, detail=f"Secciones desconocidas: {', '.join(desconocidas)}")
+    return await en_almacenamiento(_dashboard, usuario_id, list(dict.fromkeys(pedidas)))
+
+def _dashboard(usuario_id: str, secciones: list) -> dict:
+    panel = _panel(usuario_id)
+    return {seccion: SECCIONES_DASHBOARD[seccion](panel) for seccion in secciones}
+
 @router.post("/generar_datos_prueba/{username}", summary="Generar datos de prueba para un usuario.")
 async def generar_datos_prueba(username: str):
-    user_data = db_usuarios.get(username)
+    return await en_almacenamiento(_generar_datos_prueba, username)
+
+def _generar_datos_prueba(username: str) -> dict:
+    user_data = usuarios.por_username(username)
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
     # Generar facturas
-    if not user_data["facturas"]:
+    if not usuarios.agregados(user_data["id"]).facturas:
         meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio"]
-        for mes in meses:
-            consumo = random.uniform(100, 400)
-            costo = calcular_costo_rango(consumo, user_data["nivel_subsidio"], user_data["ubicacion"])
-            user_data["facturas"].append({
+        consumos = [random.uniform(100, 400) for _ in meses]
+        costos = calcular_costo_lote(consumos, user_data["nivel_subsidio"], user_data["ubicacion"], np.arange(1, len(meses) + 1))
+        for mes, consumo, costo in zip(meses, consumos, costos):
+            usuarios.anadir_factura(user_data["id"], {
                 "id": str(uuid.uuid4()), "mes": mes, "anio": 2024,
-                "consumo_kwh": round(consumo, 2), "costo": round(costo, 2)
+                "consumo_kwh": round(consumo, 2), "costo": float(costo)
             })
 
     # Generar electrodomésticos
-    if not user_data["electrodomesticos"]:
+    if not usuarios.electrodomesticos(user_data["id"]):
         for item in random.sample(BASE_ELECTRODOMESTICOS, k=min(5, len(BASE_ELECTRODOMESTICOS))):
-            user_data["electrodomesticos"].append({
+            usuarios.anadir_electrodomestico(user_data["id"], {
                 "id": str(uuid.uuid4()), "nombre": item["nombre"],
                 "cantidad": random.randint(1, 2), "potencia": item.get("potencia_base", 0.0),
                 "eficiencia": item["eficiencia_estandar"],
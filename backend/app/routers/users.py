@@ -2,7 +2,7 @@
 Endpoints para la gestión de perfiles de usuario.
 """
 from fastapi import APIRouter, HTTPException
-from ..database import db_usuarios
+from ..database import en_almacenamiento, usuarios
 from .. import schemas
 
 router = APIRouter(
@@ -12,20 +12,17 @@ router = APIRouter(
 
 @router.get("/{usuario_id}", summary="Obtener datos de perfil de un usuario por ID.")
 async def obtener_perfil_usuario(usuario_id: str):
-    for user_data in db_usuarios.values():
-        if user_data["id"] == usuario_id:
-            perfil = user_data.copy()
-            perfil.pop("password")
-            return perfil
+    if user_data := await en_almacenamiento(usuarios.por_id, usuario_id):
+        perfil = {clave: valor for clave, valor in user_data.items() if clave != "password"}
+        perfil["facturas"] = await en_almacenamiento(usuarios.facturas, usuario_id)
+        perfil["electrodomesticos"] = await en_almacenamiento(usuarios.electrodomesticos, usuario_id)
+        return perfil
     raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
 @router.put("/{usuario_id}", summary="Actualizar datos de perfil de un usuario por ID.")
 async def actualizar_perfil_usuario(usuario_id: str, datos_actualizados: schemas.PerfilUsuarioUpdate):
-    for username, user_data in db_usuarios.items():
-        if user_data["id"] == usuario_id:
-            update_data = datos_actualizados.model_dump(exclude_unset=True)
-            for key, value in update_data.items():
-                if value is not None:
-                    db_usuarios[username][key] = value
-            return {"mensaje": "Perfil actualizado correctamente"}
+    update_data = datos_actualizados.model_dump(exclude_unset=True)
+    cambios = {key: value for key, value in update_data.items() if value is not None}
+    if await en_almacenamiento(usuarios.actualizar, usuario_id, cambios) is not None:
+        return {"mensaje": "Perfil actualizado correctamente"}
     raise HTTPException(status_code=404, detail="Usuario no encontrado")
\ No newline at end of file
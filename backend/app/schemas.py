@@ -2,7 +2,7 @@
 Define los esquemas de Pydantic utilizados para la validación de datos
 en las solicitudes y respuestas de la API.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict
 
 class PeticionLogin(BaseModel):
@@ -35,6 +35,9 @@ class Electrodomestico(BaseModel):
 class CalculoKWH(BaseModel):
     kwh: float
     nivel_subsidio: str = "medio"
+    ubicacion: str | None = None
+    usuario_id: str | None = None
+    mes: int | None = Field(default=None, ge=1, le=12)
 
 class MarcarConsejoCumplido(BaseModel):
     consejo_id: str
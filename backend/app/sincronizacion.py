@@ -0,0 +1,109 @@
+"""
+Sincronización incremental de los datos de un usuario.
+Cada alta, modificación o baja en las tablas sincronizadas deja una fila en `cambios` con una versión
+creciente por usuario. Un cliente que ya tiene una copia pide solo los cambios posteriores a su
+versión y los aplica, en lugar de volver a descargar las tablas completas.
+
+En la base alojada la tabla la llenan los triggers de SQL_CAMBIOS; la base local de supabase_local
+la llena de la misma forma.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+TABLAS_SINCRONIZADAS = ("facturas", "electrodomesticos", "consejos_cumplidos")
+LIMITE_CAMBIOS = 1000
+COLUMNAS_CAMBIOS = "version,tabla,fila_id,operacion,fila"
+
+SQL_CAMBIOS = """
+-- La versión es un contador por usuario que se incrementa con la fila del usuario bloqueada: otra
+-- transacción del mismo usuario espera a que la primera confirme, así que las versiones se confirman
+-- en orden y un cliente que ya leyó la N+1 nunca pierde la N. Una secuencia global (bigserial) no
+-- lo garantiza, porque reparte números al insertar y las transacciones pueden confirmar en otro orden.
+alter table public.usuarios add column if not exists version_cambios bigint not null default 0;
+
+create table if not exists public.cambios (
+    usuario_id uuid not null,
+    version bigint not null,
+    tabla text not null,
+    fila_id uuid not null,
+    operacion text not null check (operacion in ('INSERT', 'UPDATE', 'DELETE')),
+    fila jsonb,
+    creado_en timestamptz not null default now(),
+    primary key (usuario_id, version)
+);
+
+create or replace function public.registrar_cambio() returns trigger language plpgsql as $$
+declare
+    v_usuario uuid := case when tg_op = 'DELETE' then old.usuario_id else new.usuario_id end;
+    v_version bigint;
+begin
+    update public.usuarios set version_cambios = version_cambios + 1 where id = v_usuario
+        returning version_cambios into v_version;
+    if tg_op = 'DELETE' then
+        insert into public.cambios (usuario_id, version, tabla, fila_id, operacion) values (v_usuario, v_version, tg_table_name, old.id, tg_op);
+        return old;
+    end if;
+    insert into public.cambios (usuario_id, version, tabla, fila_id, operacion, fila) values (v_usuario, v_version, tg_table_name, new.id, tg_op, to_jsonb(new));
+    return new;
+end $$;
+
+create trigger facturas_cambios after insert or update or delete on public.facturas
+    for each row execute function public.registrar_cambio();
+create trigger electrodomesticos_cambios after insert or update or delete on public.electrodomesticos
+    for each row execute function public.registrar_cambio();
+create trigger consejos_cumplidos_cambios after insert or update or delete on public.consejos_cumplidos
+    for each row execute function public.registrar_cambio();
+"""
+
+def consulta_cambios(consulta, usuario_id: str, desde: int, limite: int = LIMITE_CAMBIOS):
+    """
+    Completa una consulta de supabase-py sobre `cambios` (síncrona o asíncrona): los cambios del
+    usuario posteriores a `desde`, en orden de versión, con una fila extra para saber si hay más.
+    """
+    return consulta.select(COLUMNAS_CAMBIOS).eq("usuario_id", usuario_id).gt("version", desde).order("version").limit(limite + 1)
+
+def consulta_version(consulta, usuario_id: str):
+    """Última versión registrada para el usuario; se lee antes de una carga completa."""
+    return consulta.select("version").eq("usuario_id", usuario_id).order("version", desc=True).limit(1)
+
+def compactar(cambios: List[dict], desde: int, limite: int = LIMITE_CAMBIOS) -> dict:
+    """
+    Resume hasta `limite + 1` filas de `cambios` ordenadas por versión en el delta que recibe el cliente:
+    por tabla, las filas insertadas o modificadas (en su último estado) y los ids borrados.
+    `version` es la que el cliente debe guardar y `hay_mas` indica que falta pedir otra tanda.
+    """
+    hay_mas = len(cambios) > limite
+    cambios = cambios[:limite]
+    ultimo: Dict[tuple, dict] = {}
+    for cambio in cambios:
+        ultimo.pop((cambio["tabla"], cambio["fila_id"]), None)
+        ultimo[(cambio["tabla"], cambio["fila_id"])] = cambio
+    delta = {tabla: {"upserts": [], "borrados": []} for tabla in TABLAS_SINCRONIZADAS}
+    for (tabla, fila_id), cambio in ultimo.items():
+        if tabla not in delta:
+            continue
+        if cambio["operacion"] == "DELETE":
+            delta[tabla]["borrados"].append(fila_id)
+        else:
+            delta[tabla]["upserts"].append(cambio["fila"])
+    return {"version": cambios[-1]["version"] if cambios else desde, "hay_mas": hay_mas, **delta}
+
+def aplicar(replica: Dict[str, Dict[str, dict]], delta: dict, columnas: Optional[Dict[str, Sequence[str]]] = None) -> bool:
+    """
+    Aplica un delta sobre una réplica {tabla: {id: fila}}. Si se indican `columnas` por tabla, las filas
+    se guardan proyectadas. Devuelve True si la réplica cambió.
+    """
+    cambio = False
+    for tabla, filas in replica.items():
+        parte = delta.get(tabla)
+        if not parte:
+            continue
+        for fila_id in parte["borrados"]:
+            cambio |= filas.pop(fila_id, None) is not None
+        elegidas = (columnas or {}).get(tabla)
+        for fila in parte["upserts"]:
+            filas[fila["id"]] = {c: fila.get(c) for c in elegidas} if elegidas else dict(fila)
+            cambio = True
+    return cambio
+
+def indexar(filas: Iterable[dict]) -> Dict[str, dict]:
+    return {fila["id"]: fila for fila in filas}
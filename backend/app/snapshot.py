@@ -0,0 +1,266 @@
+"""
+Snapshots binarios del almacenamiento en memoria: cada tabla se guarda por columnas como arrays
+NumPy y al arrancar se lee con memoria mapeada, sin reinterpretar un JSON fila por fila.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import struct
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .cache_disco import crear_privado
+from .database import AgregadosUsuario, ColeccionFacturas, Electrodomestico, RepositorioUsuarios, Usuario
+
+RUTA_SNAPSHOT = os.environ.get("BIOTRACK_SNAPSHOT_PATH")
+INTERVALO_SNAPSHOT = float(os.environ.get("BIOTRACK_SNAPSHOT_INTERVALO", "300"))
+# Usuarios que se copian por vez antes de ceder el event loop al guardar.
+USUARIOS_POR_TRAMO = int(os.environ.get("BIOTRACK_SNAPSHOT_TRAMO", "500"))
+
+MAGICO = b"BTSNAP\x00\x02"
+ALINEACION = 64
+TEXTO = "texto"
+
+# Columnas de cada tabla: un dtype NumPy o TEXTO. "usuario" es la posición del usuario en la tabla usuarios.
+TABLAS = {
+    "usuarios": {"id": TEXTO, "username": TEXTO, "password": TEXTO, "nombre": TEXTO, "ubicacion": TEXTO, "nivel_subsidio": TEXTO, "puntos_sostenibilidad": "<i8"},
+    "facturas": {"usuario": "<i4", "id": TEXTO, "anio": "<i2", "mes": "<i1", "consumo_kwh": "<f8", "costo": "<f8"},
+    "electrodomesticos": {"usuario": "<i4", "id": TEXTO, "nombre": TEXTO, "cantidad": "<i8", "potencia": "<f8", "eficiencia": TEXTO, "horas_dia": "<f8", "dias_mes": "<i8"},
+    "consejos_cumplidos": {"usuario": "<i4", "consejo_id": TEXTO},
+    "progreso_sostenibilidad": {"usuario": "<i4", "fecha": "<i4", "puntos": "<i8"},
+}
+
+logger = logging.getLogger(__name__)
+
+# ESCRITURA
+def _columnas_vacias() -> Dict[str, Dict[str, list]]:
+    return {tabla: {columna: [] for columna in columnas} for tabla, columnas in TABLAS.items()}
+
+def _tramos_vacios() -> Dict[str, list]:
+    # Las columnas de las facturas ya son arrays: se copian por tramos y se unen al final.
+    return {columna: [] for columna in ("usuario", "anio", "mes", "consumo_kwh", "costo")}
+
+def _copiar_usuario(i: int, usuario: Usuario, tablas: Dict[str, Dict[str, list]], tramos: Dict[str, list]) -> None:
+    """Agrega a las columnas una copia de los datos del usuario que ocupa la posición `i`."""
+    facturas, electrodomesticos = tablas["facturas"], tablas["electrodomesticos"]
+    consejos, progreso = tablas["consejos_cumplidos"], tablas["progreso_sostenibilidad"]
+    for columna, valores in tablas["usuarios"].items():
+        valores.append(getattr(usuario, columna))
+    ids, anios, meses, kwh, costos = usuario.facturas.columnas()
+    facturas["id"].extend(ids)
+    tramos["usuario"].append(np.full(len(ids), i, dtype="<i4"))
+    for columna, valores in (("anio", anios), ("mes", meses), ("consumo_kwh", kwh), ("costo", costos)):
+        tramos[columna].append(np.array(valores, dtype=TABLAS["facturas"][columna]))
+    for ed in usuario.electrodomesticos:
+        for columna, valores in electrodomesticos.items():
+            valores.append(i if columna == "usuario" else getattr(ed, columna))
+    consejos["usuario"].extend([i] * len(usuario.consejos_cumplidos))
+    consejos["consejo_id"].extend(usuario.consejos_cumplidos)
+    progreso["usuario"].extend([i] * len(usuario.progreso_fechas))
+    progreso["fecha"].extend(usuario.progreso_fechas)
+    progreso["puntos"].extend(usuario.progreso_puntos)
+
+def _unir_tramos(tablas: Dict[str, Dict[str, list]], tramos: Dict[str, list]) -> Dict[str, Dict[str, list]]:
+    facturas = tablas["facturas"]
+    for columna, partes in tramos.items():
+        facturas[columna] = np.concatenate(partes) if partes else np.zeros(0, dtype=TABLAS["facturas"][columna])
+    return tablas
+
+def _columnas(repositorio: RepositorioUsuarios) -> Dict[str, Dict[str, list]]:
+    """Vuelca el repositorio en columnas. Las facturas quedan ordenadas por usuario, año y mes."""
+    tablas, tramos = _columnas_vacias(), _tramos_vacios()
+    for i, usuario in enumerate(repositorio.usuarios()):
+        _copiar_usuario(i, usuario, tablas, tramos)
+    return _unir_tramos(tablas, tramos)
+
+def _codificar_texto(textos: List[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Une los textos en un solo bloque UTF-8 y guarda dónde empieza cada uno (en caracteres)."""
+    textos = ["" if t is None else str(t) for t in textos]
+    indices = np.zeros(len(textos) + 1, dtype="<i8")
+    np.cumsum(np.fromiter(map(len, textos), dtype="<i8", count=len(textos)), out=indices[1:])
+    return indices, np.frombuffer("".join(textos).encode("utf-8", "surrogatepass"), dtype=np.uint8)
+
+def _escribir(ruta: str, tablas: Dict[str, Dict[str, list]]) -> None:
+    """
+    Escribe el snapshot en un archivo temporal y lo renombra, para no dejar nunca uno a medias.
+    Incluye las contraseñas, así que el archivo solo lo puede leer su dueño (0600).
+    """
+    bloques: List[np.ndarray] = []
+    encabezado = {"version": 2, "creado": datetime.now().isoformat(), "tablas": {}}
+    posicion = 0
+
+    def agregar(array: np.ndarray) -> dict:
+        nonlocal posicion
+        bloques.append(array)
+        descriptor = {"dtype": array.dtype.str, "offset": posicion, "largo": len(array)}
+        posicion += -(-array.nbytes // ALINEACION) * ALINEACION
+        return descriptor
+
+    for tabla, columnas in tablas.items():
+        descriptores = {}
+        for columna, valores in columnas.items():
+            tipo = TABLAS[tabla][columna]
+            if tipo == TEXTO:
+                indices, datos = _codificar_texto(valores)
+                descriptores[columna] = {"indices": agregar(indices), "datos": agregar(datos)}
+            else:
+                descriptores[columna] = agregar(np.asarray(valores, dtype=tipo))
+        encabezado["tablas"][tabla] = {"filas": len(next(iter(columnas.values()))), "columnas": descriptores}
+
+    cabecera = json.dumps(encabezado).encode("utf-8")
+    inicio_datos = -(-(len(MAGICO) + 8 + len(cabecera)) // ALINEACION) * ALINEACION
+    temporal = f"{ruta}.tmp"
+    crear_privado(temporal)
+    try:
+        with open(temporal, "wb") as f:
+            f.write(MAGICO + struct.pack("<Q", len(cabecera)) + cabecera)
+            f.write(b"\0" * (inicio_datos - f.tell()))
+            for array in bloques:
+                f.write(array.tobytes())
+                f.write(b"\0" * (-array.nbytes % ALINEACION))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporal)
+        raise
+
+def escribir_snapshot(repositorio: RepositorioUsuarios, ruta: str) -> None:
+    _escribir(ruta, _columnas(repositorio))
+
+# LECTURA
+def _leer_encabezado(ruta: str) -> Tuple[dict, int]:
+    with open(ruta, "rb") as f:
+        if f.read(len(MAGICO)) != MAGICO:
+            raise ValueError(f"{ruta} no es un snapshot de BioTrack compatible")
+        (largo,) = struct.unpack("<Q", f.read(8))
+        cabecera = f.read(largo)
+    inicio_datos = -(-(len(MAGICO) + 8 + largo) // ALINEACION) * ALINEACION
+    return json.loads(cabecera), inicio_datos
+
+def _array(mapa: np.ndarray, inicio_datos: int, descriptor: dict) -> np.ndarray:
+    dtype = np.dtype(descriptor["dtype"])
+    inicio = inicio_datos + descriptor["offset"]
+    return mapa[inicio:inicio + descriptor["largo"] * dtype.itemsize].view(dtype)
+
+def _decodificar_texto(indices: np.ndarray, datos: np.ndarray) -> List[str]:
+    texto = datos.tobytes().decode("utf-8", "surrogatepass")
+    limites = indices.tolist()
+    return [texto[a:b] for a, b in zip(limites, limites[1:])]
+
+def leer_snapshot(ruta: str) -> Tuple[List[Usuario], Dict[str, AgregadosUsuario]]:
+    """Reconstruye los usuarios y sus agregados a partir de un snapshot."""
+    encabezado, inicio_datos = _leer_encabezado(ruta)
+    mapa = np.memmap(ruta, dtype=np.uint8, mode="r")
+
+    def tabla(nombre: str) -> Dict[str, object]:
+        columnas = {}
+        for columna, descriptor in encabezado["tablas"][nombre]["columnas"].items():
+            if TABLAS[nombre][columna] == TEXTO:
+                columnas[columna] = _decodificar_texto(_array(mapa, inicio_datos, descriptor["indices"]), _array(mapa, inicio_datos, descriptor["datos"]))
+            else:
+                columnas[columna] = _array(mapa, inicio_datos, descriptor)
+        return columnas
+
+    u = tabla("usuarios")
+    usuarios = [
+        Usuario(*campos)
+        for campos in zip(u["id"], u["username"], u["password"], u["nombre"], u["ubicacion"], u["nivel_subsidio"], u["puntos_sostenibilidad"].tolist())
+    ]
+    agregados = {usuario.id: AgregadosUsuario() for usuario in usuarios}
+
+    ed = tabla("electrodomesticos")
+    for i, *campos in zip(
+        ed["usuario"].tolist(), ed["id"], ed["nombre"], ed["cantidad"].tolist(), ed["potencia"].tolist(), ed["eficiencia"], ed["horas_dia"].tolist(), ed["dias_mes"].tolist()
+    ):
+        electrodomestico = Electrodomestico(*campos)
+        usuarios[i].electrodomesticos.append(electrodomestico)
+        agregados[usuarios[i].id].fijar_electrodomestico(electrodomestico.id, electrodomestico.consumo_kwh)
+    c = tabla("consejos_cumplidos")
+    for i, consejo_id in zip(c["usuario"].tolist(), c["consejo_id"]):
+        usuarios[i].consejos_cumplidos.append(consejo_id)
+    p = tabla("progreso_sostenibilidad")
+    limites = np.searchsorted(p["usuario"], np.arange(len(usuarios) + 1)).tolist()
+    for i, usuario in enumerate(usuarios):
+        usuario.progreso_fechas.extend(p["fecha"][limites[i]:limites[i + 1]].tolist())
+        usuario.progreso_puntos.extend(p["puntos"][limites[i]:limites[i + 1]].tolist())
+
+    _cargar_facturas(usuarios, agregados, tabla("facturas"))
+    return usuarios, agregados
+
+def _cargar_facturas(usuarios: List[Usuario], agregados: Dict[str, AgregadosUsuario], f: Dict[str, object]) -> None:
+    """
+    Arma la colección de facturas de cada usuario directamente desde las columnas y calcula sus
+    agregados con NumPy. Las filas vienen ordenadas por (usuario, año, mes): cada grupo es un tramo contiguo.
+    """
+    usuario, anio, mes, kwh, costo = f["usuario"], f["anio"], f["mes"], f["consumo_kwh"], f["costo"]
+    n = len(usuarios)
+    limites = np.searchsorted(usuario, np.arange(n + 1)).tolist()
+    # Las columnas pasan como bytes en el orden nativo: `array` las copia de un solo bloque.
+    nativas = [columna.astype(columna.dtype.newbyteorder("=")) for columna in (anio, mes, kwh, costo)]
+    for i, u in enumerate(usuarios):
+        a, b = limites[i], limites[i + 1]
+        u.facturas = ColeccionFacturas.desde_columnas(f["id"][a:b], *(columna[a:b].tobytes() for columna in nativas))
+
+    conteo = np.bincount(usuario, minlength=n).tolist()
+    total_kwh = np.bincount(usuario, weights=kwh, minlength=n).tolist()
+    total_costo = np.bincount(usuario, weights=costo, minlength=n).tolist()
+    for u, cantidad, suma_kwh, suma_costo in zip(usuarios, conteo, total_kwh, total_costo):
+        agregado = agregados[u.id]
+        agregado.facturas, agregado.consumo_kwh, agregado.costo = cantidad, suma_kwh, suma_costo
+
+    if len(usuario) == 0:
+        return
+    for claves, destino in (((usuario, anio), "por_anio"), ((usuario, anio, mes), "por_mes")):
+        cambio = np.zeros(len(usuario), dtype=bool)
+        cambio[0] = True
+        for columna in claves:
+            cambio[1:] |= columna[1:] != columna[:-1]
+        inicios = np.flatnonzero(cambio)
+        cantidades = np.diff(np.append(inicios, len(usuario))).tolist()
+        sumas_kwh = np.add.reduceat(kwh, inicios).tolist()
+        sumas_costo = np.add.reduceat(costo, inicios).tolist()
+        valores_claves = [columna[inicios].tolist() for columna in claves]
+        for fila, cantidad, suma_kwh, suma_costo in zip(zip(*valores_claves), cantidades, sumas_kwh, sumas_costo):
+            clave = fila[1] if destino == "por_anio" else fila[1:]
+            getattr(agregados[usuarios[fila[0]].id], destino)[clave] = [cantidad, suma_kwh, suma_costo]
+
+# CICLO DE VIDA
+def restaurar(repositorio: RepositorioUsuarios, ruta: str) -> bool:
+    """Carga el snapshot en el repositorio si existe. Devuelve False si no había ninguno."""
+    if not os.path.exists(ruta):
+        return False
+    usuarios, agregados = leer_snapshot(ruta)
+    repositorio.reemplazar(usuarios, agregados)
+    logger.info("Snapshot restaurado desde %s: %d usuarios", ruta, len(usuarios))
+    return True
+
+async def guardar(repositorio: RepositorioUsuarios, ruta: str) -> None:
+    """
+    Copia los datos dentro del event loop, donde los modifican los endpoints, para que ningún usuario
+    quede copiado a medias; la copia avanza de a USUARIOS_POR_TRAMO usuarios y cede el loop entre
+    tramos, así las peticiones no esperan a que termine. Unir, codificar y escribir queda a un hilo.
+    """
+    tablas, tramos = _columnas_vacias(), _tramos_vacios()
+    usuarios = repositorio.usuarios()
+    for inicio in range(0, len(usuarios), USUARIOS_POR_TRAMO):
+        parciales = _tramos_vacios()
+        for i in range(inicio, min(inicio + USUARIOS_POR_TRAMO, len(usuarios))):
+            _copiar_usuario(i, usuarios[i], tablas, parciales)
+        # Cada tramo se une aquí, así el hilo no tiene que unir un array por usuario sin soltar el GIL.
+        for columna, partes in parciales.items():
+            if partes:
+                tramos[columna].append(np.concatenate(partes))
+        await asyncio.sleep(0)
+    await asyncio.to_thread(lambda: _escribir(ruta, _unir_tramos(tablas, tramos)))
+
+async def guardar_periodicamente(repositorio: RepositorioUsuarios, ruta: str, intervalo: float) -> None:
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            await guardar(repositorio, ruta)
+        except Exception:
+            logger.exception("No se pudo guardar el snapshot en %s", ruta)
@@ -0,0 +1,121 @@
+"""
+Acceso asíncrono a Supabase (PostgREST) para los handlers `async def`.
+Todas las consultas comparten un cliente HTTP con conexiones keep-alive (HTTP/2 si está
+instalado `h2`), un límite de peticiones en vuelo y timeouts, sin bloquear el event loop.
+Las lecturas idénticas simultáneas se agrupan en una sola petición.
+"""
+import asyncio
+import importlib.util
+import os
+from typing import List, Optional
+import httpx
+from postgrest import APIResponse, AsyncPostgrestClient
+from . import supabase_local
+from .cache import UnVueloAsync
+from .config import SUPABASE_KEY, SUPABASE_URL
+
+MAX_CONCURRENCIA = int(os.environ.get("BIOTRACK_SUPABASE_CONCURRENCIA", "32"))
+TIMEOUT = float(os.environ.get("BIOTRACK_SUPABASE_TIMEOUT", "10"))
+
+HTTP2_DISPONIBLE = importlib.util.find_spec("h2") is not None
+
+class ClienteSupabaseAsync:
+    """
+    Cliente PostgREST asíncrono. Las consultas se arman igual que con supabase-py
+    (`cliente.table(...).select(...).eq(...)`) y se ejecutan con `await cliente.ejecutar(consulta)`.
+    """
+    def __init__(self, url: str, clave: str, max_concurrencia: int = MAX_CONCURRENCIA, timeout: float = TIMEOUT,
+                 transporte: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = f"{url.rstrip('/')}/rest/v1"
+        self.encabezados = {"apikey": clave, "Authorization": f"Bearer {clave}"}
+        self.max_concurrencia = max_concurrencia
+        self.timeout = timeout
+        self._transporte = transporte
+        self._http: Optional[httpx.AsyncClient] = None
+        self._postgrest: Optional[AsyncPostgrestClient] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._bucle: Optional[asyncio.AbstractEventLoop] = None
+        self._vuelos: Optional[UnVueloAsync] = None
+
+    def _cliente(self) -> AsyncPostgrestClient:
+        # El pool y el semáforo pertenecen al event loop que los creó; si el loop cambia se rehacen.
+        bucle = asyncio.get_running_loop()
+        if self._postgrest is None or self._bucle is not bucle:
+            self._http = httpx.AsyncClient(
+                headers=self.encabezados,
+                http2=HTTP2_DISPONIBLE,
+                limits=httpx.Limits(max_connections=self.max_concurrencia, max_keepalive_connections=self.max_concurrencia, keepalive_expiry=60),
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                transport=self._transporte,
+                follow_redirects=True,
+            )
+            self._postgrest = AsyncPostgrestClient(self.url, headers=self.encabezados, http_client=self._http)
+            self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+            self._vuelos = UnVueloAsync()
+            self._bucle = bucle
+        return self._postgrest
+
+    def table(self, nombre: str):
+        return self._cliente().from_(nombre)
+
+    def rpc(self, funcion: str, parametros: Optional[dict] = None):
+        return self._cliente().rpc(funcion, parametros or {})
+
+    @staticmethod
+    def _clave_lectura(consulta) -> Optional[tuple]:
+        """Identifica una lectura (GET/HEAD) por recurso, parámetros y encabezados que cambian la respuesta."""
+        peticion = getattr(consulta, "request", None)
+        metodo = str(getattr(peticion, "http_method", ""))
+        if not metodo.endswith(("GET", "HEAD")):
+            return None
+        encabezados = peticion.headers
+        return (metodo, str(peticion.path), str(peticion.params), encabezados.get("accept"), encabezados.get("prefer"))
+
+    async def ejecutar(self, consulta) -> APIResponse:
+        """
+        Ejecuta una consulta respetando el límite de peticiones simultáneas. Además de los timeouts
+        por operación de httpx, la petición completa no puede superar `timeout` segundos.
+        Si ya está en curso una lectura idéntica, espera su respuesta en lugar de repetirla.
+        """
+        self._cliente()
+        clave = self._clave_lectura(consulta)
+        if clave is None:
+            return await self._ejecutar(consulta)
+        return await self._vuelos.hacer(clave, lambda: self._ejecutar(consulta))
+
+    def estadisticas(self) -> dict:
+        return self._vuelos.estadisticas() if self._vuelos is not None else {"llamadas": 0, "compartidas": 0}
+
+    async def _ejecutar(self, consulta) -> APIResponse:
+        async with self._semaforo:
+            try:
+                return await asyncio.wait_for(consulta.execute(), self.timeout)
+            except asyncio.TimeoutError:
+                raise httpx.TimeoutException(f"Supabase no respondió en {self.timeout} s")
+
+    # MUTACIONES CON DUEÑO
+    # Filtran por `id` y `usuario_id` en la misma sentencia: la verificación de pertenencia y la
+    # escritura no pueden intercalarse con otra petición y cuestan un solo viaje. Devuelven las
+    # filas afectadas, vacías si la fila no existe o es de otro usuario.
+    async def actualizar_de_usuario(self, tabla: str, fila_id: str, usuario_id: str, datos: dict) -> List[dict]:
+        """Lanza ValueError si, sin `id` ni `usuario_id`, no queda ningún campo para actualizar."""
+        datos = {k: v for k, v in datos.items() if k not in ("id", "usuario_id")}
+        if not datos:
+            raise ValueError("No se proporcionaron campos válidos para actualizar")
+        consulta = self.table(tabla).update(datos).eq("id", fila_id).eq("usuario_id", usuario_id)
+        return (await self.ejecutar(consulta)).data
+
+    async def eliminar_de_usuario(self, tabla: str, fila_id: str, usuario_id: str) -> List[dict]:
+        consulta = self.table(tabla).delete().eq("id", fila_id).eq("usuario_id", usuario_id)
+        return (await self.ejecutar(consulta)).data
+
+    async def cerrar(self) -> None:
+        """Cierra las conexiones abiertas; el cliente se vuelve a crear si se usa otra vez."""
+        if self._http is not None and self._bucle is asyncio.get_running_loop():
+            await self._http.aclose()
+        self._http = self._postgrest = self._semaforo = self._bucle = self._vuelos = None
+
+if supabase_local.USAR_SUPABASE_LOCAL:
+    supabase = ClienteSupabaseAsync(supabase_local.URL_LOCAL, supabase_local.CLAVE_LOCAL, transporte=supabase_local.transporte)
+else:
+    supabase = ClienteSupabaseAsync(SUPABASE_URL, SUPABASE_KEY)
@@ -0,0 +1,440 @@
+"""
+Sustituto local de Supabase para pruebas y benchmarks sin conexión.
+Implementa en memoria el subconjunto de la API de PostgREST que usa la aplicación, como un
+transporte de httpx: tanto supabase-py como el cliente asíncrono lo usan sin cambios en las consultas.
+Cada viaje de ida y vuelta se cuenta y puede demorarse una latencia configurable.
+Las escrituras en las tablas sincronizadas se registran en `cambios`, como lo hacen los triggers en la base alojada.
+
+Se activa con BIOTRACK_SUPABASE=local. BIOTRACK_SUPABASE_LATENCIA_MS fija la latencia inyectada y
+BIOTRACK_SUPABASE_DATOS un archivo JSON {tabla: [filas]} con los datos iniciales.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from .paginacion import mes_num
+from .sincronizacion import TABLAS_SINCRONIZADAS
+
+USAR_SUPABASE_LOCAL = os.environ.get("BIOTRACK_SUPABASE", "remoto") == "local"
+LATENCIA = float(os.environ.get("BIOTRACK_SUPABASE_LATENCIA_MS", "0")) / 1000
+RUTA_DATOS = os.environ.get("BIOTRACK_SUPABASE_DATOS")
+
+URL_LOCAL = "http://supabase.local"
+CLAVE_LOCAL = "clave-local"
+
+def _ahora() -> str:
+    return datetime.now().isoformat()
+
+def _uuid() -> str:
+    return str(uuid.uuid4())
+
+# Columnas con valor por defecto, columnas únicas (además de `id`), claves foráneas y columnas generadas
+# (se recalculan en cada alta y modificación) de cada tabla.
+REFERENCIA_USUARIO = {"usuario_id": "usuarios"}
+TABLAS = {
+    "usuarios": {"defectos": {"id": _uuid, "creado_en": _ahora, "puntos_sostenibilidad": lambda: 0}, "unicas": ("email",)},
+    "facturas": {"defectos": {"id": _uuid, "created_at": _ahora}, "unicas": (), "referencias": REFERENCIA_USUARIO,
+                 "generadas": {"mes_num": lambda fila: mes_num(fila.get("mes"))}},
+    "electrodomesticos": {"defectos": {"id": _uuid, "created_at": _ahora}, "unicas": (), "referencias": REFERENCIA_USUARIO},
+    "consejos_cumplidos": {"defectos": {"id": _uuid, "created_at": _ahora}, "unicas": (), "referencias": REFERENCIA_USUARIO},
+    "consejos": {"defectos": {"id": _uuid}, "unicas": ()},
+    "catalogo_electrodomesticos": {"defectos": {"id": _uuid}, "unicas": ()},
+    "cambios": {"defectos": {"creado_en": _ahora}, "unicas": ()},
+}
+
+class ErrorPostgrest(Exception):
+    def __init__(self, estado: int, codigo: str, mensaje: str):
+        super().__init__(mensaje)
+        self.estado, self.codigo, self.mensaje = estado, codigo, mensaje
+
+    def respuesta(self) -> httpx.Response:
+        return httpx.Response(self.estado, json={"code": self.codigo, "message": self.mensaje, "details": None, "hint": None})
+
+# FILTROS
+def _sin_comillas(valor: str) -> str:
+    """Quita las comillas de un valor y resuelve sus escapes (`\\"`, `\\\\`), como PostgREST."""
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", valor[1:-1], flags=re.DOTALL)
+    return valor
+
+def _como(valor, referencia):
+    """Convierte el texto de un filtro al tipo del valor de la columna para compararlos."""
+    if isinstance(referencia, bool):
+        return valor.lower() == "true"
+    if isinstance(referencia, (int, float)):
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
+    return valor
+
+def _comparar(op: str, valor, criterio: str) -> bool:
+    if op == "is":
+        return {"null": valor is None, "true": valor is True, "false": valor is False}[criterio.lower()]
+    if valor is None:
+        return False
+    if op == "in":
+        return any(valor == _como(_sin_comillas(c), valor) for c in _partir(criterio[1:-1]))
+    if op in ("like", "ilike"):
+        patron = "^" + ".*".join(re.escape(p) for p in criterio.replace("%", "*").split("*")) + "$"
+        return re.match(patron, str(valor), re.IGNORECASE if op == "ilike" else 0) is not None
+    criterio = _como(_sin_comillas(criterio), valor)
+    try:
+        return {"eq": valor == criterio, "neq": valor != criterio, "gt": valor > criterio, "gte": valor >= criterio,
+                "lt": valor < criterio, "lte": valor <= criterio}[op]
+    except TypeError:
+        return False
+    except KeyError:
+        raise ErrorPostgrest(400, "PGRST100", f"Operador no soportado: {op}")
+
+def _partir(texto: str) -> List[str]:
+    """Separa por comas de primer nivel, respetando paréntesis y comillas."""
+    partes, nivel, comillas, escape, actual = [], 0, False, False, ""
+    for c in texto:
+        if escape:
+            escape = False
+        elif comillas and c == "\\":
+            escape = True
+        elif c == '"':
+            comillas = not comillas
+        elif not comillas and c == "(":
+            nivel += 1
+        elif not comillas and c == ")":
+            nivel -= 1
+        elif not comillas and nivel == 0 and c == ",":
+            partes.append(actual)
+            actual = ""
+            continue
+        actual += c
+    if actual:
+        partes.append(actual)
+    return partes
+
+def _condicion(columna: str, expresion: str) -> Callable[[dict], bool]:
+    """Compila un filtro `columna=[not.]op.valor` en una función sobre filas."""
+    negar = expresion.startswith("not.")
+    if negar:
+        expresion = expresion[4:]
+    op, _, criterio = expresion.partition(".")
+    prueba = lambda fila: _comparar(op, fila.get(columna), criterio)
+    return (lambda fila: not prueba(fila)) if negar else prueba
+
+def _logica(operador: str, expresion: str) -> Callable[[dict], bool]:
+    """Compila `or=(...)` / `and=(...)`, con grupos anidados como `and(a.eq.1,b.lt.2)`."""
+    condiciones = []
+    for parte in _partir(expresion[1:-1]):
+        negar = parte.startswith("not.")
+        cuerpo = parte[4:] if negar else parte
+        if cuerpo.startswith(("and(", "or(")):
+            sub_op, _, resto = cuerpo.partition("(")
+            condicion = _logica(sub_op, "(" + resto)
+        else:
+            columna, _, resto = cuerpo.partition(".")
+            condicion = _condicion(columna, resto)
+        condiciones.append((lambda f, c=condicion: not c(f)) if negar else condicion)
+    if operador == "or":
+        return lambda fila: any(c(fila) for c in condiciones)
+    return lambda fila: all(c(fila) for c in condiciones)
+
+PARAMETROS_RESERVADOS = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+def _filtros(parametros: List[Tuple[str, str]]) -> List[Callable[[dict], bool]]:
+    filtros = []
+    for clave, valor in parametros:
+        if clave in PARAMETROS_RESERVADOS:
+            continue
+        if clave in ("or", "and", "not.or", "not.and"):
+            condicion = _logica(clave.rsplit(".", 1)[-1], valor)
+            filtros.append((lambda f, c=condicion: not c(f)) if clave.startswith("not.") else condicion)
+        else:
+            filtros.append(_condicion(_sin_comillas(clave), valor))
+    return filtros
+
+def _ordenar(filas: List[dict], orden: str) -> List[dict]:
+    for termino in reversed(_partir(orden)):
+        columna, *modificadores = termino.split(".")
+        desc = "desc" in modificadores
+        nulos_primero = "nullsfirst" in modificadores or (desc and "nullslast" not in modificadores)
+        presentes = [f for f in filas if f.get(columna) is not None]
+        nulos = [f for f in filas if f.get(columna) is None]
+        presentes.sort(key=lambda f: f[columna], reverse=desc)
+        filas = nulos + presentes if nulos_primero else presentes + nulos
+    return filas
+
+def _proyectar(filas: List[dict], seleccion: Optional[str]) -> List[dict]:
+    if not seleccion or seleccion == "*":
+        return [dict(f) for f in filas]
+    columnas = [_sin_comillas(c) for c in _partir(seleccion)]
+    if any("(" in c for c in columnas):
+        raise ErrorPostgrest(400, "PGRST100", "Los recursos embebidos no están soportados")
+    # `alias:columna` renombra la columna en la respuesta.
+    pares = [c.split(":", 1) if ":" in c else (c, c) for c in columnas]
+    return [{alias: f.get(columna) for alias, columna in pares} for f in filas]
+
+class BaseLocal:
+    """Tablas, vistas y funciones RPC en memoria, con contadores de viajes."""
+    def __init__(self, latencia: float = LATENCIA):
+        self.latencia = latencia
+        self.tablas: Dict[str, List[dict]] = {nombre: [] for nombre in TABLAS}
+        self.vistas: Dict[str, Callable[["BaseLocal"], List[dict]]] = dict(VISTAS)
+        self.funciones: Dict[str, Callable[["BaseLocal", dict], object]] = dict(FUNCIONES)
+        self.viajes: Counter = Counter()
+        self._candado = threading.RLock()
+        # Último número de versión de cambios de cada usuario (usuarios.version_cambios en la base alojada).
+        self._versiones: Counter = Counter()
+
+    def sembrar(self, datos: Dict[str, List[dict]]) -> None:
+        """Carga filas iniciales; las columnas con valor por defecto se completan."""
+        with self._candado:
+            for tabla, filas in datos.items():
+                self._insertar(tabla, filas, upsert=False, conflicto=None)
+
+    def vaciar(self) -> None:
+        with self._candado:
+            for filas in self.tablas.values():
+                filas.clear()
+
+    def reiniciar_contadores(self) -> None:
+        self.viajes.clear()
+
+    def total_viajes(self) -> int:
+        return sum(self.viajes.values())
+
+    def _registrar_cambio(self, recurso: str, operacion: str, fila: dict) -> None:
+        # Hace lo mismo que los triggers de sincronizacion.SQL_CAMBIOS en la base alojada.
+        if recurso not in TABLAS_SINCRONIZADAS:
+            return
+        self._versiones[fila.get("usuario_id")] += 1
+        self.tablas["cambios"].append({
+            "version": self._versiones[fila.get("usuario_id")], "usuario_id": fila.get("usuario_id"), "tabla": recurso, "fila_id": fila["id"],
+            "operacion": operacion, "fila": None if operacion == "DELETE" else dict(fila), "creado_en": _ahora(),
+        })
+
+    # OPERACIONES
+    @staticmethod
+    def _generar(recurso: str, fila: dict) -> None:
+        for columna, calcular in TABLAS.get(recurso, {}).get("generadas", {}).items():
+            fila[columna] = calcular(fila)
+
+    def _filas(self, recurso: str) -> List[dict]:
+        if recurso in self.tablas:
+            return self.tablas[recurso]
+        if recurso in self.vistas:
+            return self.vistas[recurso](self)
+        raise ErrorPostgrest(404, "42P01", f'relation "public.{recurso}" does not exist')
+
+    def _tabla(self, recurso: str) -> List[dict]:
+        if recurso not in self.tablas:
+            self._filas(recurso)
+            raise ErrorPostgrest(405, "PGRST205", f'"{recurso}" es una vista de solo lectura')
+        return self.tablas[recurso]
+
+    def _insertar(self, recurso: str, filas: List[dict], upsert: bool, conflicto: Optional[List[str]]) -> List[dict]:
+        tabla = self._tabla(recurso)
+        esquema = TABLAS.get(recurso, {"defectos": {}, "unicas": ()})
+        claves = conflicto or ["id"]
+        insertadas = []
+        for fila in filas:
+            nueva = {columna: defecto() for columna, defecto in esquema["defectos"].items() if columna not in fila}
+            nueva.update(fila)
+            existente = next((f for f in tabla if all(f.get(c) == nueva.get(c) for c in claves)), None)
+            if existente is not None and upsert:
+                existente.update(fila)
+                self._generar(recurso, existente)
+                insertadas.append(existente)
+                self._registrar_cambio(recurso, "UPDATE", existente)
+                continue
+            for columnas in (["id"], *([c] for c in esquema["unicas"])):
+                if nueva.get(columnas[0]) is not None and any(f.get(columnas[0]) == nueva[columnas[0]] for f in tabla):
+                    raise ErrorPostgrest(409, "23505", f'duplicate key value violates unique constraint "{recurso}_{columnas[0]}_key"')
+            for columna, referida in esquema.get("referencias", {}).items():
+                if nueva.get(columna) is not None and not any(f["id"] == nueva[columna] for f in self.tablas[referida]):
+                    raise ErrorPostgrest(409, "23503", f'insert or update on table "{recurso}" violates foreign key constraint "{recurso}_{columna}_fkey"')
+            self._generar(recurso, nueva)
+            tabla.append(nueva)
+            insertadas.append(nueva)
+            self._registrar_cambio(recurso, "INSERT", nueva)
+        return insertadas
+
+    def atender(self, metodo: str, ruta: str, parametros: List[Tuple[str, str]], encabezados: httpx.Headers, cuerpo: bytes) -> httpx.Response:
+        recurso = ruta.rsplit("/rest/v1/", 1)[-1]
+        self.viajes[(metodo, recurso)] += 1
+        try:
+            with self._candado:
+                return self._atender(metodo, recurso, parametros, encabezados, cuerpo)
+        except ErrorPostgrest as e:
+            return e.respuesta()
+
+    def _atender(self, metodo, recurso, parametros, encabezados, cuerpo) -> httpx.Response:
+        consulta = dict(parametros)
+        prefer = encabezados.get("prefer", "")
+        datos = json.loads(cuerpo) if cuerpo else None
+
+        if recurso.startswith("rpc/"):
+            funcion = self.funciones.get(recurso[4:])
+            if funcion is None:
+                raise ErrorPostgrest(404, "PGRST202", f"No existe la función {recurso[4:]}")
+            argumentos = datos if metodo == "POST" else {k: v for k, v in parametros}
+            return httpx.Response(200, json=funcion(self, argumentos or {}))
+
+        if metodo in ("GET", "HEAD"):
+            filas = self._filas(recurso)
+        elif metodo == "POST":
+            filas = self._insertar(recurso, datos if isinstance(datos, list) else [datos],
+                                   upsert="resolution=merge-duplicates" in prefer,
+                                   conflicto=consulta["on_conflict"].split(",") if "on_conflict" in consulta else None)
+        elif metodo == "PATCH":
+            filtros = _filtros(parametros)
+            filas = [f for f in self._tabla(recurso) if all(c(f) for c in filtros)]
+            for f in filas:
+                f.update(datos)
+                self._generar(recurso, f)
+                self._registrar_cambio(recurso, "UPDATE", f)
+        elif metodo == "DELETE":
+            tabla = self._tabla(recurso)
+            filtros = _filtros(parametros)
+            filas = [f for f in tabla if all(c(f) for c in filtros)]
+            tabla[:] = [f for f in tabla if not all(c(f) for c in filtros)]
+            for f in filas:
+                self._registrar_cambio(recurso, "DELETE", f)
+        else:
+            raise ErrorPostgrest(405, "PGRST117", f"Método no soportado: {metodo}")
+
+        if metodo in ("GET", "HEAD"):
+            filtros = _filtros(parametros)
+            filas = [f for f in filas if all(c(f) for c in filtros)]
+            if "order" in consulta:
+                filas = _ordenar(filas, consulta["order"])
+        total = len(filas)
+        inicio = int(consulta.get("offset", 0))
+        if metodo in ("GET", "HEAD") and ("limit" in consulta or inicio):
+            filas = filas[inicio:inicio + int(consulta["limit"])] if "limit" in consulta else filas[inicio:]
+
+        encabezados_respuesta = {}
+        if "count=" in prefer:
+            fin = inicio + len(filas) - 1
+            encabezados_respuesta["Content-Range"] = f"{inicio}-{fin}/{total}" if filas else f"*/{total}"
+        estado = 201 if metodo == "POST" else 200
+        if metodo != "GET" and "return=representation" not in prefer:
+            return httpx.Response(204 if metodo != "POST" else 201, headers=encabezados_respuesta)
+        if metodo == "HEAD":
+            return httpx.Response(200, headers=encabezados_respuesta)
+
+        filas = _proyectar(filas, consulta.get("select"))
+        if encabezados.get("accept") == "application/vnd.pgrst.object+json":
+            if len(filas) != 1:
+                raise ErrorPostgrest(406, "PGRST116", f"JSON object requested, multiple (or no) rows returned: {len(filas)}")
+            return httpx.Response(estado, json=filas[0], headers=encabezados_respuesta)
+        return httpx.Response(estado, json=filas, headers=encabezados_respuesta)
+
+class TransporteLocal(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Transporte de httpx que responde desde una BaseLocal, para clientes síncronos y asíncronos."""
+    def __init__(self, base: BaseLocal):
+        self.base = base
+
+    def _atender(self, peticion: httpx.Request) -> httpx.Response:
+        parametros = peticion.url.params.multi_items()
+        return self.base.atender(peticion.method, peticion.url.path, parametros, peticion.headers, peticion.read())
+
+    def handle_request(self, peticion: httpx.Request) -> httpx.Response:
+        if self.base.latencia:
+            time.sleep(self.base.latencia)
+        return self._atender(peticion)
+
+    async def handle_async_request(self, peticion: httpx.Request) -> httpx.Response:
+        if self.base.latencia:
+            await asyncio.sleep(self.base.latencia)
+        return self._atender(peticion)
+
+# VISTAS
+# Equivalentes en memoria de las vistas de la base que consulta el frontend.
+FACTOR_EMISION_CO2 = 0.3
+
+def _por_usuario(filas: List[dict], columna: str = "usuario_id") -> Dict[str, List[dict]]:
+    agrupadas: Dict[str, List[dict]] = {}
+    for f in filas:
+        agrupadas.setdefault(f.get(columna), []).append(f)
+    return agrupadas
+
+def _kwh_electrodomestico(ed: dict) -> float:
+    return (ed.get("potencia") or 0) / 1000 * (ed.get("horas_dia") or 0) * (ed.get("dias_mes") or 0) * (ed.get("cantidad") or 0)
+
+def _vista_metricas_resumen(base: BaseLocal) -> List[dict]:
+    facturas = _por_usuario(base.tablas["facturas"])
+    electrodomesticos = _por_usuario(base.tablas["electrodomesticos"])
+    filas = []
+    for u in base.tablas["usuarios"]:
+        consumo = sum(f.get("consumo_kwh") or 0 for f in facturas.get(u["id"], []))
+        filas.append({
+            "usuario_id": u["id"],
+            "consumo_total_kwh": consumo,
+            "costo_total": sum(f.get("costo") or 0 for f in facturas.get(u["id"], [])),
+            "huella_co2_total": round(consumo * FACTOR_EMISION_CO2, 2),
+            "puntos_sostenibilidad": u.get("puntos_sostenibilidad", 0),
+            "desglose_electrodomesticos": [{"nombre": ed["nombre"], "total_kwh": round(_kwh_electrodomestico(ed), 2)} for ed in electrodomesticos.get(u["id"], [])],
+        })
+    return filas
+
+def _vista_metricas_perfil(base: BaseLocal) -> List[dict]:
+    cumplidos = _por_usuario(base.tablas["consejos_cumplidos"])
+    return [{
+        "id": u["id"],
+        "nombre": u.get("nombre"),
+        "username": u.get("email"),
+        "ubicacion": u.get("ubicacion"),
+        "nivel_subsidio": u.get("nivel_subsidio"),
+        "puntos_sostenibilidad": u.get("puntos_sostenibilidad", 0),
+        "consejos_cumplidos_count": len(cumplidos.get(u["id"], [])),
+    } for u in base.tablas["usuarios"]]
+
+def _vista_consejos_personalizados(base: BaseLocal) -> List[dict]:
+    cumplidos = {(c.get("usuario_id"), c.get("consejo_id")) for c in base.tablas["consejos_cumplidos"]}
+    return [{**c, "usuario_id": u["id"], "cumplido": (u["id"], c["id"]) in cumplidos}
+            for u in base.tablas["usuarios"] for c in base.tablas["consejos"]]
+
+VISTAS = {
+    "metricas_resumen": _vista_metricas_resumen,
+    "cargar_metricas_perfil": _vista_metricas_perfil,
+    "vista_consejos_personalizados": _vista_consejos_personalizados,
+}
+
+# FUNCIONES RPC
+def _rpc_datos_usuario(base: BaseLocal, argumentos: dict) -> dict:
+    usuario_id = argumentos.get("p_usuario_id")
+    usuario = next((u for u in base.tablas["usuarios"] if u["id"] == usuario_id), None)
+    return {
+        "usuario": _proyectar([usuario], "id,email,nombre,ubicacion,nivel_subsidio,puntos_sostenibilidad")[0] if usuario else None,
+        "facturas": _proyectar([f for f in base.tablas["facturas"] if f.get("usuario_id") == usuario_id], "id,mes,anio,consumo_kwh,costo"),
+        "consejos_cumplidos": [c["consejo_id"] for c in base.tablas["consejos_cumplidos"] if c.get("usuario_id") == usuario_id],
+    }
+
+FUNCIONES = {
+    "datos_usuario": _rpc_datos_usuario,
+}
+
+# INSTANCIA COMPARTIDA
+base = BaseLocal()
+if RUTA_DATOS:
+    with open(RUTA_DATOS, encoding="utf-8") as f:
+        base.sembrar(json.load(f))
+transporte = TransporteLocal(base)
+
+_cliente_sincrono = None
+_candado_cliente = threading.Lock()
+
+def crear_cliente():
+    """Cliente de supabase-py que habla con la base local; se comparte entre llamadas."""
+    global _cliente_sincrono
+    from supabase import ClientOptions, create_client
+    with _candado_cliente:
+        if _cliente_sincrono is None:
+            http = httpx.Client(transport=transporte)
+            _cliente_sincrono = create_client(URL_LOCAL, CLAVE_LOCAL, options=ClientOptions(httpx_client=http))
+    return _cliente_sincrono
@@ -0,0 +1,281 @@
+"""
+Carga los cuadros tarifarios desde un archivo local y los compila en tablas de
+bloques acumulados: el costo de un consumo es una búsqueda binaria y una multiplicación-suma.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+RUTA_TARIFAS = os.environ.get("BIOTRACK_TARIFAS", os.path.join(os.path.dirname(__file__), "tarifas.json"))
+# Cada cuántos segundos se revisa si cambió el archivo de tarifas.
+REVISAR_CADA = float(os.environ.get("BIOTRACK_TARIFAS_REVISAR", "5"))
+
+logger = logging.getLogger(__name__)
+
+UBICACION_URBANA_CHACO = 0
+UBICACION_RURAL_CHACO = 1
+UBICACION_OTRA = 2
+CLASES_UBICACION = {"urbana_chaco": UBICACION_URBANA_CHACO, "rural_chaco": UBICACION_RURAL_CHACO, "otra": UBICACION_OTRA}
+UBICACION_POR_DEFECTO = "Resistencia, Chaco"
+
+def clase_ubicacion(ubicacion: str) -> int:
+    """
+    Clasifica una ubicación según el cuadro tarifario que le corresponde.
+    También acepta directamente el nombre de una clase (p. ej. "rural_chaco").
+    """
+    if ubicacion in CLASES_UBICACION:
+        return CLASES_UBICACION[ubicacion]
+    if "Chaco" not in ubicacion:
+        return UBICACION_OTRA
+    return UBICACION_RURAL_CHACO if "Rural" in ubicacion else UBICACION_URBANA_CHACO
+
+@dataclass(frozen=True)
+class TablaBloques:
+    """Bloques de consumo con el costo acumulado al inicio de cada uno."""
+    inicios: np.ndarray
+    acumulados: np.ndarray
+    precios: np.ndarray
+
+    @classmethod
+    def compilar(cls, bloques: List[List[Optional[float]]]) -> "TablaBloques":
+        tamanos = [float("inf") if tamano is None else float(tamano) for tamano, _ in bloques]
+        precios = [float(precio) for _, precio in bloques]
+        if tamanos and tamanos[-1] != float("inf"):
+            # Más allá del último bloque definido no se cobra energía.
+            tamanos.append(float("inf"))
+            precios.append(0.0)
+        if float("inf") in tamanos[:-1]:
+            raise ValueError("Solo el último bloque puede no tener límite")
+        tamanos_finitos = np.array(tamanos[:-1])
+        inicios = np.concatenate(([0.0], np.cumsum(tamanos_finitos)))
+        acumulados = np.concatenate(([0.0], np.cumsum(tamanos_finitos * np.array(precios[:-1]))))
+        return cls(inicios[:len(precios)], acumulados[:len(precios)], np.array(precios))
+
+    def costo(self, kwh: np.ndarray) -> np.ndarray:
+        """Costo de energía para consumos no negativos."""
+        if len(self.precios) == 0:
+            return np.zeros_like(kwh)
+        if len(self.precios) == 1:
+            return kwh * self.precios[0]
+        i = np.searchsorted(self.inicios, kwh, side="right") - 1
+        return self.acumulados[i] + (kwh - self.inicios[i]) * self.precios[i]
+
+    @functools.cached_property
+    def _listas(self) -> Tuple[List[float], List[float], List[float]]:
+        return self.inicios.tolist(), self.acumulados.tolist(), self.precios.tolist()
+
+    def costo_escalar(self, kwh: float) -> float:
+        """Igual que `costo` para un solo consumo, con una búsqueda binaria sobre listas y sin NumPy."""
+        inicios, acumulados, precios = self._listas
+        if not precios:
+            return 0.0
+        i = bisect_right(inicios, kwh) - 1
+        return acumulados[i] + (kwh - inicios[i]) * precios[i]
+
+def _compilar_escalones(escalones: List[List[float]]) -> Tuple[Tuple[float, float], ...]:
+    escalones = tuple((float(limite), float(valor)) for limite, valor in escalones)
+    if any(a[0] >= b[0] for a, b in zip(escalones, escalones[1:])):
+        raise ValueError("Los límites de los escalones deben ser crecientes")
+    return escalones
+
+def _descuento_escalonado(kwh: np.ndarray, escalones: Tuple[Tuple[float, float], ...]) -> np.ndarray:
+    """Devuelve, para cada consumo, el descuento del primer escalón cuyo límite no supera."""
+    descuento = np.zeros_like(kwh)
+    for limite, valor in reversed(escalones):
+        descuento = np.where(kwh <= limite, valor, descuento)
+    return descuento
+
+def _descuento_escalonado_escalar(kwh: float, escalones: Tuple[Tuple[float, float], ...]) -> float:
+    return next((valor for limite, valor in escalones if kwh <= limite), 0.0)
+
+def _descuento_estacional(kwh: np.ndarray, verano: np.ndarray, escalones_verano, escalones_resto) -> np.ndarray:
+    """Aplica los escalones de verano o del resto del año según el mes de cada factura."""
+    if verano.all():
+        return _descuento_escalonado(kwh, escalones_verano)
+    if not verano.any():
+        return _descuento_escalonado(kwh, escalones_resto)
+    return np.where(verano, _descuento_escalonado(kwh, escalones_verano), _descuento_escalonado(kwh, escalones_resto))
+
+@dataclass(frozen=True)
+class CuadroUbicacion:
+    """Reglas tarifarias de una clase de ubicación."""
+    cargo_fijo: float
+    multiplicador: float
+    tablas: Dict[str, TablaBloques]
+    tabla_por_defecto: TablaBloques
+    bonificacion_verano: Tuple[Tuple[float, float], ...]
+    bonificacion_resto: Tuple[Tuple[float, float], ...]
+    niveles_descuento: frozenset
+    descuento_verano: Tuple[Tuple[float, float], ...]
+    descuento_resto: Tuple[Tuple[float, float], ...]
+
+    @classmethod
+    def compilar(cls, datos: dict) -> "CuadroUbicacion":
+        tablas = {nivel: TablaBloques.compilar(bloques) for nivel, bloques in datos["bloques"].items()}
+        por_defecto = datos.get("bloques_por_defecto")
+        if por_defecto is not None and por_defecto not in tablas:
+            raise ValueError(f"Bloques por defecto desconocidos: {por_defecto}")
+        bonificacion = datos.get("bonificacion_precio", {})
+        descuento = datos.get("descuento_factura", {})
+        return cls(
+            cargo_fijo=float(datos.get("cargo_fijo", 0.0)),
+            multiplicador=float(datos.get("multiplicador", 1.0)),
+            tablas=tablas,
+            tabla_por_defecto=tablas[por_defecto] if por_defecto is not None else TablaBloques.compilar([]),
+            bonificacion_verano=_compilar_escalones(bonificacion.get("verano", [])),
+            bonificacion_resto=_compilar_escalones(bonificacion.get("resto", [])),
+            niveles_descuento=frozenset(descuento.get("niveles", [])),
+            descuento_verano=_compilar_escalones(descuento.get("verano", [])),
+            descuento_resto=_compilar_escalones(descuento.get("resto", [])),
+        )
+
+    def costos(self, kwh: np.ndarray, nivel_subsidio: str, verano: np.ndarray) -> np.ndarray:
+        """Costo final sin redondear para un grupo de facturas con el mismo nivel de subsidio."""
+        costo = self.tablas.get(nivel_subsidio, self.tabla_por_defecto).costo(kwh)
+        if self.bonificacion_verano or self.bonificacion_resto:
+            costo *= 1 - _descuento_estacional(kwh, verano, self.bonificacion_verano, self.bonificacion_resto)
+        costo += self.cargo_fijo
+        if nivel_subsidio in self.niveles_descuento:
+            costo *= 1 - _descuento_estacional(kwh, verano, self.descuento_verano, self.descuento_resto)
+        costo *= self.multiplicador
+        return costo
+
+    def costo(self, kwh: float, nivel_subsidio: str, verano: bool) -> float:
+        """Versión escalar de `costos`, con las mismas operaciones en el mismo orden."""
+        costo = self.tablas.get(nivel_subsidio, self.tabla_por_defecto).costo_escalar(kwh)
+        if self.bonificacion_verano or self.bonificacion_resto:
+            costo *= 1 - _descuento_escalonado_escalar(kwh, self.bonificacion_verano if verano else self.bonificacion_resto)
+        costo += self.cargo_fijo
+        if nivel_subsidio in self.niveles_descuento:
+            costo *= 1 - _descuento_escalonado_escalar(kwh, self.descuento_verano if verano else self.descuento_resto)
+        costo *= self.multiplicador
+        return costo
+
+@dataclass(frozen=True)
+class CuadroTarifario:
+    """Cuadro tarifario completo, compilado e inmutable."""
+    version: str
+    meses_verano: Tuple[int, ...]
+    ubicaciones: Dict[int, CuadroUbicacion]
+
+    @classmethod
+    def compilar(cls, datos: dict) -> "CuadroTarifario":
+        faltantes = set(CLASES_UBICACION) - set(datos["ubicaciones"])
+        if faltantes:
+            raise ValueError(f"Faltan cuadros para: {', '.join(sorted(faltantes))}")
+        return cls(
+            version=str(datos.get("version", "")),
+            meses_verano=tuple(int(m) for m in datos["meses_verano"]),
+            ubicaciones={CLASES_UBICACION[nombre]: CuadroUbicacion.compilar(cuadro) for nombre, cuadro in datos["ubicaciones"].items() if nombre in CLASES_UBICACION},
+        )
+
+    def costos(self, kwh, nivel_subsidio, ubicacion, mes) -> np.ndarray:
+        """Calcula los costos sin redondear de un lote de consumos."""
+        kwh = np.maximum(np.atleast_1d(np.asarray(kwh, dtype=float)), 0.0)
+        n = kwh.shape[0]
+        niveles, cod_nivel = _codificar(nivel_subsidio, n)
+        ubicaciones, cod_ubicacion = _codificar(ubicacion, n)
+        verano = np.broadcast_to(np.isin(datetime.now().month if mes is None else mes, self.meses_verano), (n,))
+
+        clases = np.array([clase_ubicacion(u) for u in ubicaciones], dtype=np.intp)
+        grupo = clases[cod_ubicacion] * len(niveles) + cod_nivel
+        presentes = np.flatnonzero(np.bincount(grupo, minlength=1))
+
+        costos = np.empty(n, dtype=float)
+        for g in presentes:
+            clase, indice_nivel = divmod(int(g), len(niveles))
+            seleccion = grupo == g if len(presentes) > 1 else slice(None)
+            costos[seleccion] = self.ubicaciones[clase].costos(kwh[seleccion], niveles[indice_nivel], verano[seleccion])
+        return costos
+
+    def costo(self, kwh: float, nivel_subsidio: str, ubicacion: str, mes: Optional[int]) -> float:
+        """Costo sin redondear de un solo consumo; evita el armado de arrays del cálculo por lote."""
+        verano = (datetime.now().month if mes is None else mes) in self.meses_verano
+        return self.ubicaciones[clase_ubicacion(ubicacion)].costo(max(float(kwh), 0.0), nivel_subsidio, verano)
+
+def _codificar(valores, n: int) -> Tuple[list, np.ndarray]:
+    """Convierte un valor escalar o un array de textos en (valores únicos, códigos enteros)."""
+    if isinstance(valores, str):
+        return [valores], np.zeros(n, dtype=np.intp)
+    if isinstance(valores, pd.Categorical):
+        return list(valores.categories), valores.codes.astype(np.intp)
+    codigos, unicos = pd.factorize(np.asarray(valores, dtype=object))
+    return list(unicos), codigos
+
+def cargar_cuadro(ruta: str = RUTA_TARIFAS) -> CuadroTarifario:
+    """Lee y compila un cuadro tarifario desde un archivo JSON."""
+    with open(ruta, encoding="utf-8") as f:
+        return CuadroTarifario.compilar(json.load(f))
+
+def _firma(ruta: str) -> Tuple[int, int]:
+    estado = os.stat(ruta)
+    return estado.st_mtime_ns, estado.st_size
+
+# CUADRO VIGENTE
+# Cada proceso (cada worker de uvicorn) tiene su copia del cuadro. Al usarlo, si pasaron REVISAR_CADA
+# segundos, se compara la fecha y el tamaño del archivo con los de la última carga y se recarga si
+# cambiaron: editar el archivo llega a todos los workers en ese plazo, sin avisarle a cada uno.
+_ruta = RUTA_TARIFAS
+_firma_cargada = _firma(_ruta)
+_cuadro = cargar_cuadro(_ruta)
+_proxima_revision = time.monotonic() + REVISAR_CADA
+_candado_recarga = threading.Lock()
+_al_recargar: List[Callable[[], None]] = []
+
+def cuadro_actual() -> CuadroTarifario:
+    if time.monotonic() >= _proxima_revision:
+        _revisar_archivo()
+    return _cuadro
+
+def _revisar_archivo() -> None:
+    global _firma_cargada, _proxima_revision
+    _proxima_revision = time.monotonic() + REVISAR_CADA
+    try:
+        firma = _firma(_ruta)
+    except OSError:
+        return
+    if firma == _firma_cargada:
+        return
+    try:
+        recargar_tarifas(_ruta)
+    except (OSError, ValueError, KeyError, TypeError):
+        # No se reintenta hasta que el archivo vuelva a cambiar; mientras tanto sigue el cuadro anterior.
+        _firma_cargada = firma
+        logger.exception("Cuadro tarifario inválido en %s; se sigue usando la versión %s", _ruta, _cuadro.version)
+
+def al_recargar(funcion: Callable[[], None]) -> Callable[[], None]:
+    """Registra una función a ejecutar cada vez que cambia el cuadro vigente."""
+    _al_recargar.append(funcion)
+    return funcion
+
+def recargar_tarifas(ruta: str = RUTA_TARIFAS) -> CuadroTarifario:
+    """
+    Vuelve a leer el archivo de tarifas y reemplaza el cuadro vigente.
+    Si el archivo es inválido se lanza la excepción y el cuadro anterior sigue en uso.
+    """
+    global _cuadro, _ruta, _firma_cargada
+    # La firma se toma antes de leer: si el archivo cambia en el medio, la próxima revisión lo vuelve a cargar.
+    firma = _firma(ruta)
+    nuevo = cargar_cuadro(ruta)
+    with _candado_recarga:
+        _cuadro, _ruta, _firma_cargada = nuevo, ruta, firma
+        for funcion in _al_recargar:
+            funcion()
+    return nuevo
+
+def calcular_costo(kwh: float, nivel_subsidio: str = "medio", ubicacion: str = "Resistencia, Chaco", mes: Optional[int] = None) -> float:
+    """Calcula con el cuadro vigente el costo sin redondear de un solo consumo."""
+    return cuadro_actual().costo(kwh, nivel_subsidio, ubicacion, mes)
+
+def calcular_costos(kwh, nivel_subsidio="medio", ubicacion="Resistencia, Chaco", mes=None) -> np.ndarray:
+    """Calcula con el cuadro vigente los costos sin redondear de un lote de consumos."""
+    return cuadro_actual().costos(kwh, nivel_subsidio, ubicacion, mes)
@@ -1,21 +1,32 @@
+import asyncio
 import pandas as pd
 import random
 import uuid
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence
 import functools
-from fastapi import FastAPI, HTTPException
-from frontend.services.api_client import get_supabase_client, cargar_datos_facturas
-from frontend.services.api_client import cargar_datos_electrodomesticos
-from fastapi import FastAPI, HTTPException
+import contextlib
+from fastapi import FastAPI, HTTPException, Query
+from postgrest import APIError
+from backend.app import consejos, paginacion, sincronizacion
+from backend.app.supabase_async import supabase
+from backend.app.utils import calcular_costo_rango
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 # - INICIALIZACIÓN DE LA APP -
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        yield
+    finally:
+        await supabase.cerrar()
+
 app = FastAPI(
     title="BioTrack API",
     description="API para gestionar datos de consumo energético y sostenibilidad.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -67,10 +78,14 @@ class ElectrodomesticoDB(Electrodomestico):
 class CalculoKWH(BaseModel):
     kwh: float
     nivel_subsidio: str = "medio"
+    ubicacion: Optional[str] = None
 
 class MarcarConsejoCumplido(BaseModel):
     consejo_id: str
 
+# Código de Postgres para una violación de clave foránea (p. ej. usuario_id inexistente).
+CODIGO_CLAVE_FORANEA = "23503"
+
 # - BASE DE DATOS SIMULADA -
 db_usuarios = {
     "usuario1@example.com": {
@@ -124,116 +139,7 @@ BASE_ELECTRODOMESTICOS = [
 ]
 
 # - FUNCIONES AUXILIARES DE CÁLCULO -
-@functools.lru_cache(maxsize=128)
-def calcular_costo_rango(kwh: float, nivel_subsidio: str, ubicacion: str = "Resistencia, Chaco") -> float:
-    cargo_fijo = 2277.3100  # $/mes para Chaco
-    costo_total_kwh = 0.0
-
-    tarifas_urbanas_n1 = [
-        (50, 118.6888),
-        (100, 126.6517),
-        (150, 151.4252),
-        (float('inf'), 163.8120)
-    ]
-    tarifas_urbanas_n2 = [
-        (50, 52.0293),
-        (100, 59.9922),
-        (150, 84.7657),
-        (50, 97.1525),
-        (float('inf'), 163.8120)
-    ]
-    tarifas_urbanas_n3 = [
-        (50, 67.1414),
-        (100, 75.1043),
-        (100, 99.8778),
-        (50, 151.4252),
-        (float('inf'), 163.8120)
-    ]
-
-    tarifas_rurales = {
-        "alto": [(float('inf'), 147.4494)],
-        "bajo": [(350, 81.7632), (float('inf'), 147.4494)],
-        "medio": [(250, 96.6547), (float('inf'), 147.4494)]
-    }
-
-    if "Chaco" in ubicacion:
-        current_month = datetime.now().month
-        is_summer = current_month in [1, 2, 3, 12]
-        
-        applied_tiers = []
-        if "Rural" in ubicacion:
-            applied_tiers = tarifas_rurales[nivel_subsidio]
-        else: # urbano
-            if nivel_subsidio == "bajo":
-                applied_tiers = tarifas_urbanas_n2
-            elif nivel_subsidio == "medio":
-                applied_tiers = tarifas_urbanas_n3
-            else: # nivel_subsidio == "alto"
-                applied_tiers = tarifas_urbanas_n1
-        
-        remaining_kwh = kwh
-
-        for block_size, rate in applied_tiers:
-            if remaining_kwh <= 0:
-                break
-
-            consumed_in_block = min(remaining_kwh, block_size) if block_size != float('inf') else remaining_kwh
-            
-            current_rate = rate
-
-            if "Rural" not in ubicacion: 
-                if is_summer: # vernao (Ene, Feb, Mar, Dic)
-                    if kwh <= 300:
-                        current_rate *= (1 - 0.60)
-                    elif kwh <= 450:
-                        current_rate *= (1 - 0.50)
-                else: 
-                    if kwh <= 200:
-                        current_rate *= (1 - 0.60)
-                    elif kwh <= 300:
-                        current_rate *= (1 - 0.50)
-
-            costo_total_kwh += consumed_in_block * current_rate
-            remaining_kwh -= consumed_in_block
-        
-        costo_final = costo_total_kwh + cargo_fijo 
-
-        #  "Descuento Verano"
-        if is_summer and nivel_subsidio in ["bajo", "medio"]:
-            if kwh <= 600:
-                costo_final *= (1 - 0.29)
-            elif kwh <= 800:
-                costo_final *= (1 - 0.22)
-            elif kwh <= 1000:
-                costo_final *= (1 - 0.15)
-    
-    else: 
-        tarifa_base_n1 = 106.879 # ARS por kWh (referencia de EDESUR Dic 2024)
-        
-        if nivel_subsidio == "bajo": # Nivel 2 (N2 - Bajos Ingresos)
-            limite_subsidio = 350 # kWh/mes
-            bonificacion_n2 = 0.6815 # 68.15%
-            if kwh <= limite_subsidio:
-                costo_total_kwh = kwh * tarifa_base_n1 * (1 - bonificacion_n2)
-            else:
-                costo_total_kwh = (limite_subsidio * tarifa_base_n1 * (1 - bonificacion_n2)) + \
-                                ((kwh - limite_subsidio) * tarifa_base_n1)
-        elif nivel_subsidio == "medio": # Nivel 3 (N3 - Ingresos Medios)
-            limite_subsidio = 250 # kWh/mes
-            bonificacion_n3 = 0.5270 # 52.70%
-            if kwh <= limite_subsidio:
-                costo_total_kwh = kwh * tarifa_base_n1 * (1 - bonificacion_n3)
-            else:
-                costo_total_kwh = (limite_subsidio * tarifa_base_n1 * (1 - bonificacion_n3)) + \
-                                ((kwh - limite_subsidio) * tarifa_base_n1)
-        elif nivel_subsidio == "alto": # Nivel 1 (N1 - Ingresos Altos)
-            costo_total_kwh = kwh * tarifa_base_n1
-        
-        costo_final = costo_total_kwh
-        # IVA (21%)
-        costo_final = costo_final * (1 + 0.21)
-
-    return round(costo_final, 2)
+catalogo_consejos = consejos.cargar_catalogo(consejos.RUTA_CONSEJOS_AMPLIADO)
 
 @functools.lru_cache(maxsize=128)
 def calcular_huella_carbono(kwh: float) -> float:
@@ -242,117 +148,9 @@ def calcular_huella_carbono(kwh: float) -> float:
     huella = kwh * factor_emision_co2
     return round(huella, 2)
 
-def generar_consejos_dinamicos(consumo_actual: float, huella_carbono_actual: float, puntos_sostenibilidad: int, consejos_cumplidos_ids: List[str]) -> List[Dict]:
-    """Genera una lista de consejos de sostenibilidad personalizados."""
-    all_consejos = [
-        {"id": "con-001", "texto": "Apaga las luces al salir de una habitación.", "urgente": False},
-        {"id": "con-002", "texto": "Desconecta los cargadores cuando no los uses (consumo vampiro).", "urgente": False},
-        {"id": "con-003", "texto": "Considera usar bombillas LED de bajo consumo.", "urgente": True if consumo_actual > 200 else False},
-        {"id": "con-004", "texto": "Revisa el aislamiento de tu hogar para evitar fugas de energía.", "urgente": True if consumo_actual > 300 else False},
-        {"id": "con-005", "texto": "Ajusta la temperatura del aire acondicionado a 24°C en verano.", "urgente": True if consumo_actual > 250 else False},
-        {"id": "con-006", "texto": "Prefiere electrodomésticos de alta eficiencia energética (Clase A o superior).", "urgente": False},
-        {"id": "con-007", "texto": "Utiliza el lavarropas con carga completa y agua fría.", "urgente": False},
-        {"id": "con-008", "texto": "Seca la ropa al aire libre siempre que sea posible.", "urgente": False},
-        {"id": "con-009", "texto": "Descongela los alimentos en la heladera, no a temperatura ambiente.", "urgente": False},
-        {"id": "con-010", "texto": "Limpia regularmente la parte trasera de tu heladera para mejorar su eficiencia.", "urgente": False},
-        {"id": "con-011", "texto": "Toma duchas más cortas para ahorrar agua y energía (si usas termotanque eléctrico).", "urgente": False},
-        {"id": "con-012", "texto": "Aprovecha la luz natural al máximo durante el día.", "urgente": False},
-        {"id": "con-013", "texto": "Si tienes horno eléctrico, evita abrir la puerta constantemente para no perder calor.", "urgente": False},
-        {"id": "con-014", "texto": "Considera instalar paneles solares si tu consumo es muy alto y es viable en tu zona.", "urgente": True if consumo_actual > 400 else False},
-        {"id": "con-015", "texto": "Utiliza colores claros en paredes y techos para aprovechar mejor la iluminación natural y reducir el uso de luz artificial.", "urgente": False},
-        {"id": "con-015", "texto": "Utilizar colores claros en paredes y techos para aprovechar mejor la iluminación natural y reducir el uso de luz artificial.", "urgente": False},
-        {"id": "con-016", "texto": "Reducir al mínimo la iluminación decorativa, tanto interior como exterior, compatible con la seguridad.", "urgente": False},
-        {"id": "con-017", "texto": "Mantener limpias las lámparas y pantallas para aumentar la luminosidad sin aumentar su potencia.", "urgente": False},
-        {"id": "con-018", "texto": "Mantener limpios los vidrios de las ventanas y otros ingresos de luz natural para reducir el consumo de luz artificial.", "urgente": False},
-        {"id": "con-019", "texto": "No dejar luces encendidas en espacios comunes de uso eventual si no están siendo utilizados, por más bajo que sea su consumo.", "urgente": False},
-        {"id": "con-020", "texto": "Apagar las luces al retirarse el encargado si la luz natural es suficiente, y que el vecindario las encienda cuando sea necesario.", "urgente": False},
-        {"id": "con-021", "texto": "Reemplazar luminarias por lámparas más eficientes como las LED cuando se quemen las actuales.", "urgente": False},
-        {"id": "con-022", "texto": "Considerar reguladores de intensidad luminosa electrónicos en espacios que requieran distinta intensidad de iluminación durante el día.", "urgente": False},
-        {"id": "con-023", "texto": "Instalar detectores de movimiento o células fotoeléctricas para el encendido y apagado automático de luces.", "urgente": False},
-        {"id": "con-024", "texto": "Automatizar el encendido de luces en escaleras incluyendo un control sobre cada piso para evitar encendidos simultáneos.", "urgente": False},
-        {"id": "con-025", "texto": "Instalar interruptores independientes para encender solo las luminarias necesarias en cada momento.", "urgente": False},
-        {"id": "con-026", "texto": "El ahorro de agua, aunque no sea caliente, significa un ahorro energético, ya que es bombeada con electricidad.", "urgente": False},
-        {"id": "con-027", "texto": "Incluir en el mantenimiento reparaciones para evitar goteos y fugas en accesorios, válvulas y canillas.", "urgente": False},
-        {"id": "con-028", "texto": "No dejar canillas abiertas inútilmente, por ejemplo, durante la limpieza y el lavado de veredas.", "urgente": False},
-        {"id": "con-029", "texto": "Considerar la incorporación de ahorradores de agua al incorporar o reemplazar accesorios y/o válvulas.", "urgente": False},
-        {"id": "con-030", "texto": "Si la bomba de agua es más grande de lo necesario, evaluar cambiarla, modificarla o instalar un variador de velocidad.", "urgente": True if consumo_actual > 200 else False},
-        {"id": "con-031", "texto": "Si la bomba de agua del edificio tiene más de 10 años, considerar un recambio por una tecnología más eficiente.", "urgente": False},
-        {"id": "con-032", "texto": "Optar por motores más eficientes (Tipo IE3) al incorporar o reemplazar motores nuevos o existentes.", "urgente": False},
-        {"id": "con-033", "texto": "Evitar reparar motores existentes más de dos o tres veces, y siempre solicitar ensayos de rendimiento.", "urgente": False},
-        {"id": "con-034", "texto": "Para alturas inferiores a un tercer piso, priorizar el uso de las escaleras.", "urgente": False},
-        {"id": "con-035", "texto": "Si el ascensor tiene botones separados para subir y bajar, pulsar solo el de la dirección necesaria.", "urgente": False},
-        {"id": "con-036", "texto": "Dentro del ascensor, no permitir que los niños presionen todos los botones de los distintos pisos o salten.", "urgente": False},
-        {"id": "con-037", "texto": "Mantener limpias las luminarias y artefactos del ascensor para aumentar la iluminación sin aumentar su potencia.", "urgente": False},
-        {"id": "con-038", "texto": "Un ascensor eficiente debe incluir un sistema de accionamiento de muy baja fricción, función de ahorro de energía en reposo e iluminación LED con auto-apagado.", "urgente": False},
-        {"id": "con-039", "texto": "En ascensores de gran tráfico, es aconsejable instalar un sistema de control de velocidad que recupere la energía de frenado.", "urgente": False},
-        {"id": "con-040", "texto": "Bajar en 1°C el termostato en invierno puede generar un ahorro del 10% al 20% del consumo de calefacción.", "urgente": False},
-        {"id": "con-041", "texto": "No calefaccionar los ambientes comunes que no se están utilizando.", "urgente": False},
-        {"id": "con-042", "texto": "Cerrar puertas y ventanas de los ambientes comunes cuando la calefacción está encendida. Cerrar cortinas y persianas por la noche.", "urgente": False},
-        {"id": "con-043", "texto": "Para ventilar espacios comunes, es suficiente abrir ventanas entre 5 a 10 minutos para renovar el aire.", "urgente": False},
-        {"id": "con-044", "texto": "Limpiar y hacer mantenimiento de sistemas de calefacción (calderas y calefactores) para reducir el consumo y extender su vida útil.", "urgente": False},
-        {"id": "con-045", "texto": "No cubrir ni colocar objetos al lado de los radiadores, ya que dificulta la emisión de aire caliente.", "urgente": False},
-        {"id": "con-046", "texto": "Verificar anualmente que los radiadores no tengan aire en su interior, ya que dificulta la transmisión de calor.", "urgente": False},
-        {"id": "con-047", "texto": "Asegurar un buen mantenimiento y aislamiento de acumuladores y tuberías de distribución de agua caliente para eliminar pérdidas.", "urgente": False},
-        {"id": "con-048", "texto": "Es preferible bajar la temperatura de los equipos que generan ACS antes que recurrir a la mezcla de agua caliente y fría.", "urgente": False},
-        {"id": "con-049", "texto": "Colocar burletes en puertas y ventanas para reducir las infiltraciones de aire en los espacios comunes calefaccionados.", "urgente": False},
-        {"id": "con-050", "texto": "Realizar una revisión anual de la caldera/generador de calor, incluyendo el quemador, gases de escape y limpieza del sistema.", "urgente": False},
-        {"id": "con-051", "texto": "Chequear que la calidad del agua sea adecuada para evitar incrustaciones de sarro y deposición de óxido; considerar un sistema de tratamiento de agua.", "urgente": False},
-        {"id": "con-052", "texto": "Reubicar termostatos alejados de fuentes de calor y frío, e instalarlos en las salas más utilizadas a 1.5m de altura.", "urgente": False},
-        {"id": "con-053", "texto": "En calderas, regular el caudal de agua con válvulas para ajustarlo a las necesidades reales de calefacción.", "urgente": False},
-        {"id": "con-054", "texto": "Utilizar artefactos sin llama piloto permanente para sistemas de producción instantánea o de acumulación.", "urgente": False},
-        {"id": "con-055", "texto": "Considerar la instalación de calderas más eficientes (baja temperatura o condensación) frente a grandes mantenimientos o recambios.", "urgente": False},
-        {"id": "con-056", "texto": "En calderas grandes, instalar un termómetro en la chimenea para detectar variaciones de temperatura en gases de escape.", "urgente": False},
-        {"id": "con-057", "texto": "Mejorar el aislamiento térmico de la envolvente del edificio (muros, cubiertas, suelos, tabiques, huecos) para reducir la demanda de calefacción y refrigeración.", "urgente": True if consumo_actual > 350 else False},
-        {"id": "con-058", "texto": "Aislar todas las tuberías que pasen por espacios no calefaccionados (sala de calderas, garajes, falsos techos) para evitar pérdidas de calor.", "urgente": False},
-        {"id": "con-059", "texto": "Considerar aislar terrazas o techos, y viviendas que descansan sobre espacios abiertos, sótanos o garajes.", "urgente": False},
-        {"id": "con-060", "texto": "Considerar la incorporación de techos verdes o jardines verticales para mejorar la climatización del edificio.", "urgente": False},
-        {"id": "con-061", "texto": "Establecer un programa de detección periódica de humedad, incluyendo la revisión de goteras y tuberías rotas.", "urgente": False},
-        {"id": "con-062", "texto": "Asegurar un buen diseño en zonas con cambios de espesor o uniones de distintos materiales en la envolvente del edificio para evitar puentes térmicos.", "urgente": False},
-        {"id": "con-063", "texto": "Revisar periódicamente puertas y ventanas para evitar pérdidas por infiltración debido a mal estado.", "urgente": False},
-        {"id": "con-064", "texto": "Considerar la renovación de vidrios y marcos, y la utilización de Doble Vidriado Hermético (DVH) para mejorar la eficiencia y confort.", "urgente": False},
-        {"id": "con-065", "texto": "Incluir persianas o cortinas en aberturas para proteger superficies vidriadas en invierno, y aleros o toldos en aberturas orientadas al norte en verano.", "urgente": False},
-        {"id": "con-066", "texto": "Utilizar luminarias más eficientes y sistemas automáticos como sensores de presencia, e integrar luz natural en garajes para reducir el consumo de iluminación.", "urgente": False},
-        {"id": "con-067", "texto": "Utilizar Tragaluze Tubulares o Tubos Solares para iluminación natural en interiores sin aumentar cargas térmicas.", "urgente": False},
-        {"id": "con-068", "texto": "Realizar un adecuado mantenimiento preventivo en instalaciones de garajes para mejorar el rendimiento y reducir costos.", "urgente": False},
-        {"id": "con-069", "texto": "Al accionar accesos automáticos de garajes, considerar sistemas de bajo rozamiento, motores de alta eficiencia y arrancadores suaves para grandes accesos.", "urgente": False},
-        {"id": "con-070", "texto": "Apagar las luces que no se utilizan en espacios de uso común.", "urgente": False},
-        {"id": "con-071", "texto": "Eliminar las pérdidas de agua en espacios de uso común.", "urgente": False},
-        {"id": "con-072", "texto": "Apagar la calefacción en los espacios de uso común que no se utilizan.", "urgente": False},
-        {"id": "con-073", "texto": "Ajustar la temperatura del aire acondicionado a 24°C en verano; bajarla más es un gasto innecesario.", "urgente": True if consumo_actual > 250 else False},
-        {"id": "con-074", "texto": "Ajustar la temperatura de calefacción a 20°C en invierno para mantener un ambiente confortable.", "urgente": False},
-        {"id": "con-075", "texto": "Utilizar la posición de ventilación en aires acondicionados para ahorrar energía.", "urgente": False},
-        {"id": "con-076", "texto": "Considerar sistemas evaporativos para refrescar el ambiente; su consumo es muy bajo.", "urgente": False},
-        {"id": "con-077", "texto": "En determinados lugares, un ventilador (preferentemente de techo) puede ser suficiente para el confort, produciendo una sensación de descenso de temperatura de 3 a 5°C.", "urgente": False},
-        {"id": "con-078", "texto": "Limpiar los filtros de los aires acondicionados cada temporada.", "urgente": False},
-        {"id": "con-079", "texto": "Al actualizar o realizar grandes mantenimientos en sistemas de climatización, evaluar un recambio por tecnología de mayor eficiencia.", "urgente": False},
-        {"id": "con-080", "texto": "Instalar toldos, aleros o persianas en ventanas con exposición al sol para reducir la ganancia térmica y el uso de aire acondicionado.", "urgente": False},
-    ]
-    
-    # Filtrar consejos ya cumplidos
-    consejos_filtrados = [c for c in all_consejos if c["id"] not in consejos_cumplidos_ids]
-    
-    # Asegurarse de que al menos un consejo urgente aparezca si hay alguno disponible
-    if any(c.get("urgente", False) for c in consejos_filtrados):
-        urgentes_disponibles = [c for c in consejos_filtrados if c.get("urgente", False)]
-        
-        consejos_final = []
-        if urgentes_disponibles:
-            consejos_final.append(random.choice(urgentes_disponibles))
-
-            consejos_filtrados = [c for c in consejos_filtrados if c["id"] != consejos_final[0]["id"]]
-        
-        random.shuffle(consejos_filtrados)
-        consejos_final.extend(consejos_filtrados[:min(len(consejos_filtrados), 4)]) # Add up to 4 more tips
-    else:
-
-        random.shuffle(consejos_filtrados)
-        consejos_final = consejos_filtrados[:min(len(consejos_filtrados), 5)]
-
-
-    for c in all_consejos:
-        c["cumplido"] = c["id"] in consejos_cumplidos_ids
-
-    return all_consejos
+def generar_consejos_dinamicos(consumo_actual: float, huella_carbono_actual: float, puntos_sostenibilidad: int, consejos_cumplidos_ids: List[str]) -> Sequence[Dict]:
+    """Genera una lista de consejos de sostenibilidad personalizados con el catálogo ampliado."""
+    return catalogo_consejos.generar(consumo_actual, consejos_cumplidos_ids)
 
 # - ENDPOINTS DE LA API -
 
@@ -360,7 +158,7 @@ def generar_consejos_dinamicos(consumo_actual: float, huella_carbono_actual: flo
 @app.post("/login")
 async def login(peticion: PeticionLogin):
     # Buscar usuario por email
-    response = supabase.table('usuarios').select("*").eq('email', peticion.username).execute()
+    response = await supabase.ejecutar(supabase.table('usuarios').select("*").eq('email', peticion.username))
     
     if not response.data:
         raise HTTPException(status_code=401, detail="Credenciales incorrectas")
@@ -379,7 +177,7 @@ async def login(peticion: PeticionLogin):
 @app.post("/registro")
 async def registro(peticion: PeticionRegistro):
     # Verificar si el email ya existe
-    response = supabase.table('usuarios').select("id").eq('email', peticion.email).execute()
+    response = await supabase.ejecutar(supabase.table('usuarios').select("id").eq('email', peticion.email))
     
     if response.data:
         raise HTTPException(status_code=409, detail="El usuario ya existe")
@@ -397,7 +195,7 @@ async def registro(peticion: PeticionRegistro):
         "puntos_sostenibilidad": 0
     }
     
-    response = supabase.table('usuarios').insert(nuevo_usuario).execute()
+    response = await supabase.ejecutar(supabase.table('usuarios').insert(nuevo_usuario))
     
     return {
         "mensaje": "Usuario registrado correctamente", 
@@ -405,10 +203,10 @@ async def registro(peticion: PeticionRegistro):
     }
 @app.get("/usuarios/{usuario_id}")
 async def obtener_perfil_usuario(usuario_id: str):
-    response = supabase.table('usuarios').select(
+    response = await supabase.ejecutar(supabase.table('usuarios').select(
         "id", "email", "nombre", "ubicacion", "lat", "lon", 
         "personas", "creado_en", "nivel_subsidio", "puntos_sostenibilidad"
-    ).eq('id', usuario_id).execute()
+    ).eq('id', usuario_id))
     
     if not response.data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -428,40 +226,73 @@ async def actualizar_perfil_usuario(usuario_id: str, datos_actualizados: Dict):
     if not updates:
         raise HTTPException(status_code=400, detail="No se proporcionaron campos válidos para actualizar")
     
-    response = supabase.table('usuarios').update(updates).eq('id', usuario_id).execute()
+    response = await supabase.ejecutar(supabase.table('usuarios').update(updates).eq('id', usuario_id))
     
     if not response.data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
     return {"mensaje": "Perfil actualizado correctamente"}
+# --- Paginación ---
+# Las páginas siguen a la clave de la última fila devuelta (keyset), nunca usan offset.
+CAMPOS_FACTURA = ("id", "mes", "anio", "consumo_kwh", "costo")
+CAMPOS_ELECTRODOMESTICO = ("id", "usuario_id", "nombre", "cantidad", "potencia", "eficiencia", "horas_dia", "dias_mes", "created_at")
+CLAVES_ELECTRODOMESTICO = ("created_at", "id")
+TIPOS_CLAVES_ELECTRODOMESTICO = (str, str)
+
+def _columnas(fields: Optional[str], permitidas) -> Optional[List[str]]:
+    try:
+        return paginacion.columnas_pedidas(fields, permitidas)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def _pagina(tabla: str, usuario_id: str, claves, tipos, columnas, limite: int, despues: Optional[str], descendente: bool = False) -> Dict:
+    try:
+        clave = paginacion.decodificar_cursor(despues, tipos) if despues else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    consulta = supabase.table(tabla).select(paginacion.columnas_consulta(columnas, claves)).eq("usuario_id", usuario_id)
+    try:
+        response = await supabase.ejecutar(paginacion.consulta_pagina(consulta, claves, limite, clave, descendente))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    filas, ultima = paginacion.cortar(response.data, claves, limite)
+    return {tabla: paginacion.proyectar(filas, columnas), "siguiente": paginacion.codificar_cursor(ultima) if ultima else None}
+
 # --- Facturas ---
 # Endpoint para obtener facturas
 @app.get("/facturas/{usuario_id}")
-async def obtener_facturas(usuario_id: str):
+async def obtener_facturas(usuario_id: str, fields: Optional[str] = None):
+    columnas = _columnas(fields, CAMPOS_FACTURA)
+    try:
+        uuid.UUID(usuario_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Error al cargar facturas")
     try:
-        facturas = cargar_datos_facturas(usuario_id)
-        if facturas is None:
-            raise HTTPException(status_code=404, detail="Error al cargar facturas")
-        return facturas
+        response = await supabase.ejecutar(supabase.table("facturas").select(",".join(columnas or CAMPOS_FACTURA)).eq("usuario_id", usuario_id).order("anio", desc=True))
+        return response.data or []
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/facturas/{usuario_id}/pagina", summary="Obtener una página de facturas de un usuario, de la más reciente a la más antigua.")
+async def obtener_pagina_facturas(usuario_id: str, limite: int = Query(paginacion.LIMITE_POR_DEFECTO, ge=1, le=paginacion.LIMITE_MAXIMO),
+                                  despues: Optional[str] = None, fields: Optional[str] = None):
+    return await _pagina("facturas", usuario_id, paginacion.CLAVES_FACTURAS, paginacion.TIPOS_CLAVES_FACTURAS, _columnas(fields, CAMPOS_FACTURA), limite, despues, descendente=True)
     
     
 
 
 @app.post("/facturas/{usuario_id}", summary="Añadir una nueva factura para un usuario.")
 async def anadir_factura(usuario_id: str, factura_data: dict):
-    supabase = get_supabase_client()
     try:
         # Validar datos primero
         if not all(key in factura_data for key in ['mes', 'anio', 'consumo_kwh', 'costo']):
             raise HTTPException(status_code=400, detail="Datos de factura incompletos")
         
         # Insertar en Supabase
-        response = supabase.table("facturas").insert({
+        response = await supabase.ejecutar(supabase.table("facturas").insert({
             "usuario_id": usuario_id,
             **factura_data
-        }).execute()
+        }))
         
         return {"mensaje": "Factura creada", "id": response.data[0]['id']}
     except Exception as e:
@@ -470,41 +301,41 @@ async def anadir_factura(usuario_id: str, factura_data: dict):
 @app.delete("/facturas/{usuario_id}/{factura_id}", summary="Eliminar una factura de un usuario.")
 async def eliminar_factura(usuario_id: str, factura_id: str):
     try:
-        # Verificar que la factura pertenece al usuario
-        factura_response = supabase.table('facturas').select("id").eq('id', factura_id).eq('usuario_id', usuario_id).execute()
-        if not factura_response.data:
-            raise HTTPException(status_code=404, detail="Factura no encontrada para el usuario")
-
-        # Eliminar factura
-        supabase.table('facturas').delete().eq('id', factura_id).execute()
-        return {"mensaje": "Factura eliminada correctamente"}
+        # Se filtra por factura y usuario en la misma sentencia: si no es suya no se borra nada
+        eliminadas = await supabase.eliminar_de_usuario('facturas', factura_id, usuario_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar factura: {str(e)}")
+    if not eliminadas:
+        raise HTTPException(status_code=404, detail="Factura no encontrada para el usuario")
+    return {"mensaje": "Factura eliminada correctamente"}
     
     
     
 # --- Electrodomésticos ---
 @app.get("/electrodomesticos/{usuario_id}")
-async def obtener_electrodomesticos(usuario_id: str):
+async def obtener_electrodomesticos(usuario_id: str, fields: Optional[str] = None):
+    columnas = _columnas(fields, CAMPOS_ELECTRODOMESTICO)
     try:
-        electrodomesticos = cargar_datos_electrodomesticos(usuario_id)
-        if electrodomesticos is None:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        return electrodomesticos
+        uuid.UUID(usuario_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    try:
+        response = await supabase.ejecutar(supabase.table("electrodomesticos").select(",".join(columnas or CAMPOS_ELECTRODOMESTICO)).eq("usuario_id", usuario_id))
+        return response.data or []
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/electrodomesticos/{usuario_id}/pagina", summary="Obtener una página de electrodomésticos de un usuario.")
+async def obtener_pagina_electrodomesticos(usuario_id: str, limite: int = Query(paginacion.LIMITE_POR_DEFECTO, ge=1, le=paginacion.LIMITE_MAXIMO),
+                                           despues: Optional[str] = None, fields: Optional[str] = None):
+    return await _pagina("electrodomesticos", usuario_id, CLAVES_ELECTRODOMESTICO, TIPOS_CLAVES_ELECTRODOMESTICO, _columnas(fields, CAMPOS_ELECTRODOMESTICO), limite, despues)
     
     
     
 @app.post("/electrodomesticos/{usuario_id}", summary="Añadir un nuevo electrodoméstico a un usuario.")
 async def anadir_electrodomestico(usuario_id: str, electrodomestico: Electrodomestico):
     try:
-        # Verificar que el usuario existe
-        user_response = supabase.table('usuarios').select("id").eq('id', usuario_id).execute()
-        if not user_response.data:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-        # Insertar electrodoméstico
+        # La existencia del usuario la verifica la clave foránea usuario_id al insertar
         electrodomestico_data = {
             "usuario_id": usuario_id,
             "nombre": electrodomestico.nombre,
@@ -515,26 +346,29 @@ async def anadir_electrodomestico(usuario_id: str, electrodomestico: Electrodome
             "dias_mes": electrodomestico.dias_mes
         }
         
-        response = supabase.table('electrodomesticos').insert(electrodomestico_data).execute()
-        return {"mensaje": "Electrodoméstico añadido correctamente", "electrodomestico_id": response.data[0]['id']}
+        response = await supabase.ejecutar(supabase.table('electrodomesticos').insert(electrodomestico_data))
+    except APIError as e:
+        if e.code == CODIGO_CLAVE_FORANEA:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        raise HTTPException(status_code=500, detail=f"Error al añadir electrodoméstico: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al añadir electrodoméstico: {str(e)}")
+    return {"mensaje": "Electrodoméstico añadido correctamente", "electrodomestico_id": response.data[0]['id']}
     
     
     
 @app.put("/electrodomesticos/{usuario_id}/{electrodomestico_id}", summary="Actualizar un electrodoméstico de un usuario.")
 async def actualizar_electrodomestico(usuario_id: str, electrodomestico_id: str, datos_actualizados: Dict):
     try:
-        # Verificar que el electrodoméstico pertenece al usuario
-        ed_response = supabase.table('electrodomesticos').select("id").eq('id', electrodomestico_id).eq('usuario_id', usuario_id).execute()
-        if not ed_response.data:
-            raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado para el usuario")
-
-        # Actualizar electrodoméstico
-        supabase.table('electrodomesticos').update(datos_actualizados).eq('id', electrodomestico_id).execute()
-        return {"mensaje": "Electrodoméstico actualizado correctamente"}
+        # Se filtra por electrodoméstico y usuario en la misma sentencia
+        actualizados = await supabase.actualizar_de_usuario('electrodomesticos', electrodomestico_id, usuario_id, datos_actualizados)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al actualizar electrodoméstico: {str(e)}")
+    if not actualizados:
+        raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado para el usuario")
+    return {"mensaje": "Electrodoméstico actualizado correctamente"}
     
     
     
@@ -542,16 +376,13 @@ async def actualizar_electrodomestico(usuario_id: str, electrodomestico_id: str,
 @app.delete("/electrodomesticos/{usuario_id}/{electrodomestico_id}", summary="Eliminar un electrodoméstico de un usuario.")
 async def eliminar_electrodomestico(usuario_id: str, electrodomestico_id: str):
     try:
-        # Verificar que el electrodoméstico pertenece al usuario
-        ed_response = supabase.table('electrodomesticos').select("id").eq('id', electrodomestico_id).eq('usuario_id', usuario_id).execute()
-        if not ed_response.data:
-            raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado para el usuario")
-
-        # Eliminar electrodoméstico
-        supabase.table('electrodomesticos').delete().eq('id', electrodomestico_id).execute()
-        return {"mensaje": "Electrodoméstico eliminado correctamente"}
+        # Se filtra por electrodoméstico y usuario en la misma sentencia
+        eliminados = await supabase.eliminar_de_usuario('electrodomesticos', electrodomestico_id, usuario_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar electrodoméstico: {str(e)}")
+    if not eliminados:
+        raise HTTPException(status_code=404, detail="Electrodoméstico no encontrado para el usuario")
+    return {"mensaje": "Electrodoméstico eliminado correctamente"}
     
     
     
@@ -559,18 +390,24 @@ async def eliminar_electrodomestico(usuario_id: str, electrodomestico_id: str):
 async def obtener_catalogo_electrodomesticos():
     return BASE_ELECTRODOMESTICOS
 
+# --- Sincronización ---
+@app.get("/cambios/{usuario_id}", summary="Obtener las facturas, electrodomésticos y consejos cumplidos que cambiaron desde una versión.")
+async def obtener_cambios(usuario_id: str, desde: int = Query(0, ge=0),
+                          limite: int = Query(sincronizacion.LIMITE_CAMBIOS, ge=1, le=sincronizacion.LIMITE_CAMBIOS)):
+    try:
+        uuid.UUID(usuario_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    try:
+        response = await supabase.ejecutar(sincronizacion.consulta_cambios(supabase.table("cambios"), usuario_id, desde, limite))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return sincronizacion.compactar(response.data, desde, limite)
+
 # - Cálculos -
 @app.post("/calcular/costo", summary="Calcular costo estimado basado en kWh y subsidio.")
 async def calcular_costo_endpoint(peticion: CalculoKWH):
-    user_location = "Resistencia, Chaco"
-    found_user = None
-    for user_data_val in db_usuarios.values():
-        if user_data_val["nivel_subsidio"] == peticion.nivel_subsidio:
-            found_user = user_data_val
-            user_location = found_user["ubicacion"]
-            break
-            
-    costo_calculado = calcular_costo_rango(peticion.kwh, peticion.nivel_subsidio, user_location)
+    costo_calculado = calcular_costo_rango(peticion.kwh, peticion.nivel_subsidio, peticion.ubicacion or "Resistencia, Chaco")
     return {"costo_estimado": costo_calculado}
 
 @app.post("/calcular/huella_carbono", summary="Calcular huella de carbono basada en kWh.")
@@ -643,9 +480,7 @@ async def obtener_metricas_resumen(usuario_id: str):
                 "total_kwh": round(total_kwh_ed, 2)
             })
         
-        consejos_disponibles = generar_consejos_dinamicos(total_consumo_kwh, total_huella_co2, puntos_sostenibilidad, user_data["consejos_cumplidos"])
-        consejos_no_cumplidos = [c for c in consejos_disponibles if not c.get("cumplido")]
-        consejo_dinamico = random.choice(consejos_no_cumplidos) if consejos_no_cumplidos else {"id": "con-000", "texto": "¡Bienvenido a BioTrack! Comienza a registrar tus facturas y electrodomésticos.", "urgente": False}
+        consejo_dinamico = catalogo_consejos.consejo_del_dia(user_data["id"], total_consumo_kwh, user_data["consejos_cumplidos"]) or {"id": "con-000", "texto": "¡Bienvenido a BioTrack! Comienza a registrar tus facturas y electrodomésticos.", "urgente": False}
 
         return {
             "consumo_total_kwh": total_consumo_kwh,
@@ -709,7 +544,7 @@ async def obtener_metricas_perfil(usuario_id: str):
 async def generar_datos_prueba(usuario_id: str):
     try:
         # Verificar que el usuario existe
-        user_response = supabase.table('usuarios').select("id").eq('id', usuario_id).execute()
+        user_response = await supabase.ejecutar(supabase.table('usuarios').select("id, nivel_subsidio, ubicacion").eq('id', usuario_id))
         if not user_response.data:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
@@ -733,8 +568,6 @@ async def generar_datos_prueba(usuario_id: str):
             }
             facturas_prueba.append(factura_data)
         
-        # Insertar facturas de prueba
-        supabase.table('facturas').insert(facturas_prueba).execute()
 
         # Generar electrodomésticos de prueba
         electrodomesticos_prueba = []
@@ -755,8 +588,11 @@ async def generar_datos_prueba(usuario_id: str):
             }
             electrodomesticos_prueba.append(electrodomestico_data)
         
-        # Insertar electrodomésticos de prueba
-        supabase.table('electrodomesticos').insert(electrodomesticos_prueba).execute()
+        # Insertar facturas y electrodomésticos de prueba en paralelo
+        await asyncio.gather(
+            supabase.ejecutar(supabase.table('facturas').insert(facturas_prueba)),
+            supabase.ejecutar(supabase.table('electrodomesticos').insert(electrodomesticos_prueba)),
+        )
 
         return {"mensaje": "Datos de prueba generados exitosamente"}
     except Exception as e:
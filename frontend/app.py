@@ -3,10 +3,19 @@ Archivo principal de la aplicación Streamlit (Frontend).
 Controla el estado de la sesión, la carga de CSS y la navegación entre páginas.
 """
 import os
+import sys
+
+# Streamlit agrega solo la carpeta frontend/ a la ruta de importación; la raíz del proyecto hace
+# falta para los módulos compartidos de backend/app (configuración de Supabase, caché, paginación).
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROYECTO not in sys.path:
+    sys.path.append(RAIZ_PROYECTO)
+
 import streamlit as st
 from components.navigation import mostrar_barra_navegacion
 from auth import mostrar_inicio_sesion
 from pages import summary, profile, invoices, appliances, advice
+from services import api_client
 
 st.set_page_config(page_title="BioTrack", page_icon="🌱", layout="wide")
 
@@ -21,6 +30,10 @@ def cargar_css(ruta_archivo):
 ruta_css = os.path.join("assets", "style.css")
 cargar_css(ruta_css)
 
+# --- Precarga del catálogo ---
+# Se carga una sola vez por proceso y se refresca en segundo plano; las páginas lo leen sin consultar la base.
+api_client.catalogo.iniciar()
+
 # --- Gestión del Estado de la Aplicación ---
 class EstadoApp:
     def __init__(self):
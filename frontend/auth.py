@@ -1,4 +1,4 @@
-from services.api_client import get_supabase_client
+from services.api_client import get_supabase_client, precargar_datos_usuario
 import streamlit as st
 
 def mostrar_inicio_sesion(estado_app):
@@ -21,6 +21,9 @@ def mostrar_inicio_sesion(estado_app):
                         estado_app.sesion_iniciada = True
                         estado_app.usuario_actual = correo
                         estado_app.usuario_actual_id = usuario["id"]
+                        # Los datos de todas las páginas se piden juntos ahora, no al visitar cada una.
+                        with st.spinner("Cargando tus datos..."):
+                            precargar_datos_usuario(usuario["id"])
                         st.rerun()
                     else:
                         st.error("Credenciales incorrectas.")
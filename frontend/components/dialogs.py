@@ -142,7 +142,7 @@ def mostrar_formulario_ocr(uploaded_file, estado_app):
                     res = supabase.table("facturas").insert(payload).execute()
                     if res.data:
                         st.success("¡Factura guardada en la base de datos!")
-                        st.cache_data.clear()
+                        api_client.datos_modificados(estado_app.usuario_actual_id, "facturas")
                         if 'ocr_uploader' in st.session_state:
                             del st.session_state.ocr_uploader
                         st.rerun()
@@ -179,7 +179,7 @@ def dialogo_configurar_electrodomestico(nombre_aparato, datos_catalogo, estado_a
                 res = supabase.table("electrodomesticos").insert(payload).execute()
                 if res.data:
                     st.success("Electrodoméstico añadido.")
-                    st.cache_data.clear()
+                    api_client.datos_modificados(estado_app.usuario_actual_id, "electrodomesticos")
                     st.rerun()
                 else:
                     st.error("Error al añadir electrodoméstico.")
@@ -207,7 +207,7 @@ def dialogo_editar_electrodomestico(aparato, estado_app):
                 res = supabase.table("electrodomesticos").update(payload).eq("id", aparato["id"]).execute()
                 if res.data:
                     st.success("Electrodoméstico actualizado.")
-                    st.cache_data.clear()
+                    api_client.datos_modificados(estado_app.usuario_actual_id, "electrodomesticos")
                     st.rerun()
                 else:
                     st.error("Error al actualizar electrodoméstico.")
@@ -238,7 +238,7 @@ def dialogo_registrar_factura(estado_app):
                 res = supabase.table("facturas").insert(payload).execute()
                 if res.data:
                     st.success("Factura guardada.")
-                    st.cache_data.clear()
+                    api_client.datos_modificados(estado_app.usuario_actual_id, "facturas")
                     st.rerun()
                 else:
                     st.error("Error al guardar factura.")
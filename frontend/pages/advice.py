@@ -16,11 +16,13 @@ def mostrar_consejos(estado_app):
     # --- Panel de Impacto Energético ---
     st.markdown("<p class='titleSection'>Tu Impacto Energético Promedio</p>", unsafe_allow_html=True)
     
+    panel = {}
     try:
-        # Carga de datos con manejo de errores
+        # Carga de datos con manejo de errores; perfil, facturas y consejos se piden juntos
         with st.spinner("Analizando tu consumo..."):
-            metricas_perfil = api_client.cargar_metricas_perfil(estado_app.usuario_actual_id)
-            facturas = api_client.cargar_datos_facturas(estado_app.usuario_actual_id)
+            panel = api_client.cargar_panel(estado_app.usuario_actual_id, ("perfil", "facturas", "consejos"))
+            metricas_perfil = panel["perfil"]
+            facturas = panel["facturas"]
             
             if metricas_perfil and facturas:
                 
@@ -40,7 +42,10 @@ def mostrar_consejos(estado_app):
     
     try:
         with st.spinner("Cargando tus consejos personalizados..."):
-            consejos_data = api_client.cargar_consejos(estado_app.usuario_actual_id)
+            consejos_data = panel["consejos"] if "consejos" in panel else api_client.cargar_consejos(estado_app.usuario_actual_id)
+            if consejos_data is None:
+                # La carga falló y ya mostró el error; no es que no queden consejos.
+                return
             
             if not consejos_data or len(consejos_data) == 0:
                 st.info("""
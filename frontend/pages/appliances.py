@@ -61,7 +61,8 @@ def mostrar_electrodomesticos(estado_app):
     perfil_usuario = api_client.cargar_metricas_perfil(estado_app.usuario_actual_id)
     if perfil_usuario and total_kwh_inventario > 0:
         nivel_subsidio = perfil_usuario.get("nivel_subsidio", "medio")
-        costo_estimado = api_client.calcular_costo_rango(total_kwh_inventario, nivel_subsidio)
+        ubicacion = perfil_usuario.get("ubicacion", "Resistencia, Chaco")
+        costo_estimado = api_client.calcular_costo_rango(total_kwh_inventario, nivel_subsidio, ubicacion)
         huella_kg = api_client.calcular_huella_carbono(total_kwh_inventario)
 
     m1, m2, m3 = st.columns(3)
@@ -88,7 +89,7 @@ def mostrar_electrodomesticos(estado_app):
                 if st.button("🗑️", key=f"del_{aparato['id']}", help="Eliminar", use_container_width=True):
                     if api_client.eliminar_electrodomestico(aparato["id"]):
                         st.success("Electrodoméstico eliminado")
-                        st.cache_data.clear()
+                        api_client.datos_modificados(estado_app.usuario_actual_id, "electrodomesticos")
                         st.rerun()
                     else:
                         st.error("Error al eliminar")
@@ -6,7 +6,30 @@ import pandas as pd
 import plotly.express as px
 from components import dialogs
 from services.api_client import get_supabase_client
-from services.api_client import cargar_datos_facturas
+from services.api_client import cargar_datos_facturas, cargar_pagina_facturas, datos_modificados
+
+def _facturas_paginadas(usuario_id):
+    """
+    Facturas del listado cargadas hasta ahora, de la más reciente a la más antigua. La primera página
+    se pide en cada ejecución; las anteriores se agregan con "Cargar facturas anteriores" y se guardan en
+    la sesión. Devuelve (facturas, hay_mas) o (None, False) si falla la carga.
+    """
+    primera, siguiente = cargar_pagina_facturas(usuario_id)
+    if primera is None:
+        return None, False
+    estado = st.session_state.get("facturas_paginas")
+    # Se descartan las páginas extra si cambió el usuario o la primera página (alta o baja de facturas).
+    if not estado or estado["usuario"] != usuario_id or estado["primera"] != primera:
+        estado = {"usuario": usuario_id, "primera": primera, "extra": [], "siguiente": siguiente}
+        st.session_state.facturas_paginas = estado
+    return primera + estado["extra"], estado["siguiente"] is not None
+
+def _cargar_anteriores():
+    estado = st.session_state.facturas_paginas
+    filas, siguiente = cargar_pagina_facturas(estado["usuario"], despues=estado["siguiente"])
+    if filas is not None:
+        estado["extra"].extend(filas)
+        estado["siguiente"] = siguiente
 
 def mostrar_facturas(estado_app):
     st.title("Análisis de Facturas")
@@ -20,6 +43,8 @@ def mostrar_facturas(estado_app):
         if st.button("⬆️ Subir Factura (OCR)", use_container_width=True):
             dialogs.dialogo_subir_ocr(estado_app)
 
+    # El panel de análisis usa el historial completo (sale de la caché y de la réplica local);
+    # solo el listado de facturas se pagina.
     facturas = cargar_datos_facturas(estado_app.usuario_actual_id)
     if facturas is None:
         st.error("Error al cargar facturas. Por favor intenta nuevamente.")
@@ -98,21 +123,28 @@ def mostrar_facturas(estado_app):
 
         # --- Tabla de detalles ---
         with st.expander("Ver detalle y eliminar facturas"):
-            for _, factura in df_grafico.iterrows():
+            pagina, hay_mas = _facturas_paginadas(estado_app.usuario_actual_id)
+            if pagina is None:
+                st.error("Error al cargar el listado de facturas.")
+                pagina = []
+            for factura in pagina:
                 cols = st.columns([0.6, 0.2, 0.2])
-                cols[0].write(f"{factura['mes']} {factura[year_col]} - {factura['consumo_kwh']} kWh - ${factura['costo']:.2f}")
+                cols[0].write(f"{factura['mes']} {factura['anio']} - {factura['consumo_kwh']} kWh - ${factura['costo']:.2f}")
                 if cols[2].button("🗑️", key=f"del_{factura['id']}", help="Eliminar factura"):
                     try:
                         supabase = get_supabase_client()
                         response = supabase.table("facturas").delete().eq("id", factura["id"]).execute()
-                        if response.error:
-                            st.error(f"Error al eliminar: {response.error.message}")
+                        if not response.data:
+                            st.error("Error al eliminar la factura.")
                         else:
                             st.success("Factura eliminada.")
-                            st.cache_data.clear()
+                            datos_modificados(estado_app.usuario_actual_id, "facturas")
+                            st.session_state.pop("facturas_paginas", None)
                             st.rerun()
                     except Exception as e:
                         st.error(f"Error inesperado: {e}")
+            if hay_mas:
+                st.button("Cargar facturas anteriores", on_click=_cargar_anteriores)
                         
     except Exception as e:
         st.error(f"Error al procesar los datos: {str(e)}")
\ No newline at end of file
@@ -100,7 +100,7 @@ def mostrar_perfil(estado_app):
                     res = supabase.table("usuarios").update(payload).eq("id", estado_app.usuario_actual_id).execute()
                     if res.data:
                         st.success("Perfil actualizado.")
-                        st.cache_data.clear()
+                        api_client.datos_modificados(estado_app.usuario_actual_id, "usuarios")
                         st.rerun()
                     else:
                         st.error("Error al actualizar el perfil.")
@@ -108,9 +108,13 @@ def mostrar_perfil(estado_app):
                     st.error(f"Error al actualizar: {e}")
 
     # --- Acciones de Sesión y Pruebas ---
+    with st.expander("Estadísticas de caché"):
+        st.json(api_client.estadisticas_cache())
     if st.button("Cerrar Sesión", use_container_width=True):
         st.session_state.estado = type(st.session_state.estado)() 
-        st.cache_data.clear()
+        # Los datos cacheados siguen siendo válidos; solo se descarta lo guardado en la sesión.
+        for clave in ("replica_datos", "facturas_paginas"):
+            st.session_state.pop(clave, None)
         st.rerun()
 
    
\ No newline at end of file
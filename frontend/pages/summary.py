@@ -8,16 +8,16 @@ import plotly.express as px
 from services import api_client
 
 def mostrar_resumen_general(estado_app):
-    # Cargar datos del perfil
-    perfil = api_client.cargar_metricas_perfil(estado_app.usuario_actual_id)
+    # Cargar perfil y métricas juntos
+    panel = api_client.cargar_panel(estado_app.usuario_actual_id, ("perfil", "resumen"))
+    perfil = panel["perfil"]
     nombre_usuario = perfil.get('nombre', 'Usuario') if perfil else 'Usuario'
     
     st.title(f"¡Bienvenido a BioTrack, {nombre_usuario}! 👋")
     st.markdown("<p class='titleSection'>Resumen Energético</p>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; margin-bottom: 2rem;'>Acá podes ver un resumen de tu impacto energético y de sostenibilidad.</p>", unsafe_allow_html=True)
     
-    # Cargar métricas
-    metricas = api_client.cargar_metricas_resumen(estado_app.usuario_actual_id)
+    metricas = panel["resumen"]
     if not metricas:
         st.warning("No se pudieron cargar las métricas. Añade facturas y electrodomésticos para ver tu resumen.")
         return